@@ -0,0 +1,196 @@
+import asyncio
+import json
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import HTMLResponse, JSONResponse, StreamingResponse, Response
+from starlette.routing import Route
+
+import run
+from project.utils.metrics import metrics
+from project.utils.profile_tool import ProfileTool
+from project.utils.server_timing import ServerTiming, ServerTimingCollector
+
+'''
+ASGI入口, 和run.py提供相同的接口: uvicorn asgi:app
+缓存命中和只读进程状态的请求直接在事件循环中返回, 其余请求放到有界线程池中计算, 不阻塞事件循环
+'''
+
+# 线程池大小和最多同时在线程池中排队或计算的请求数, 超过时直接返回503
+worker_count = run.service_config.get("asgi_worker_count", 4)
+max_pending_count = run.service_config.get("asgi_max_pending", 64)
+executor = ThreadPoolExecutor(max_workers=worker_count)
+# 只在事件循环中读写, 不需要锁
+pending_count = 0
+
+
+class ServerBusyError(Exception):
+    pass
+
+
+# 事件循环中合并相同的请求: 单线程访问, 不需要锁, 等待的请求不占用线程池
+key_2_future = dict()
+
+
+def on_startup():
+    run.cache_warmer.start()
+
+
+def on_shutdown():
+    executor.shutdown(wait=False)
+
+
+def to_response(result):
+    # 和Flask一致: 字符串按text/html返回, 生成器按NDJSON逐行返回, 其余按json返回
+    if isinstance(result, str):
+        return HTMLResponse(result)
+    if isinstance(result, types.GeneratorType):
+        return StreamingResponse(iter_ndjson(result), media_type="application/x-ndjson")
+    with metrics.stage("serialization"):
+        return JSONResponse(result)
+
+
+async def iter_ndjson(result_iter):
+    # 每一项都在线程池中计算
+    end = object()
+    while True:
+        # 已经开始返回的流不受max_pending_count限制, 否则会中途断开
+        item = await asyncio.get_event_loop().run_in_executor(executor, next, result_iter, end)
+        if item is end:
+            break
+        yield run.to_ndjson_line(item)
+
+
+async def get_request_json(request):
+    body = await request.body()
+    if len(body) == 0:
+        return {}
+    return json.loads(body.decode("utf-8"))
+
+
+async def run_in_executor(handler, request_json):
+    """
+    放到线程池中计算, 已经有max_pending_count个请求在排队或计算时抛出ServerBusyError
+    """
+    global pending_count
+    if pending_count >= max_pending_count:
+        raise ServerBusyError()
+    pending_count += 1
+    try:
+        return await asyncio.get_event_loop().run_in_executor(executor, handler, request_json)
+    finally:
+        pending_count -= 1
+
+
+async def run_coalesced(handler, request_json):
+    """
+    同run.call_coalesced, 参数相同的并发请求等待同一个计算
+    """
+    if handler in run.STREAM_HANDLER_SET:
+        return await run_in_executor(partial(run.call_in_foreground, handler), request_json)
+    key = run.get_single_flight_key(handler, request_json)
+    future = key_2_future.get(key, None)
+    if future is None:
+        future = asyncio.ensure_future(run_in_executor(partial(run.call_in_foreground, handler), request_json))
+        key_2_future[key] = future
+        future.add_done_callback(lambda done_future: key_2_future.pop(key, None))
+    # 一个客户端断开时不取消其他请求在等待的计算
+    return await asyncio.shield(future)
+
+
+def query_endpoint(path, handler):
+    probe = run.PROBE_ROUTE_MAP.get(path, None)
+
+    async def handle(request):
+        start = time.perf_counter()
+        request_json = await get_request_json(request)
+        profile_token = request.headers.get(ProfileTool.TOKEN_HEADER,
+                                            request.query_params.get(ProfileTool.TOKEN_QUERY, None))
+        if profile_token is not None:
+            profile_output = request.query_params.get(ProfileTool.OUTPUT_QUERY, "report")
+            result, status, headers = await run_in_executor(
+                partial(run.profile_handler, handler, profile_token=profile_token, profile_output=profile_output),
+                request_json)
+            response = to_response(result)
+            response.status_code = status
+            response.headers.update(headers)
+            return response
+        result = None
+        server_timing = None
+        if probe is not None:
+            probe_start = time.perf_counter()
+            result, after_hit = probe(request_json)
+            if after_hit is not None:
+                # 不等待也不计入max_pending_count
+                asyncio.get_event_loop().run_in_executor(executor, after_hit)
+            if result is not None:
+                # 和线程池中命中缓存的响应一样只有total一项
+                collector = ServerTimingCollector()
+                collector.add("total", time.perf_counter() - probe_start)
+                server_timing = collector.to_header()
+        if result is None:
+            result, server_timing = await run_coalesced(handler, request_json)
+        response = to_response(result)
+        if server_timing is not None:
+            response.headers[ServerTiming.HEADER] = server_timing
+            response.headers[ServerTiming.ALLOW_ORIGIN_HEADER] = "*"
+        # 流式响应在取完最后一项时记录, 见run.iter_with_server_timing
+        if not isinstance(result, types.GeneratorType):
+            metrics.observe_request(path, time.perf_counter() - start)
+        return response
+
+    async def endpoint(request):
+        try:
+            return await handle(request)
+        except ServerBusyError:
+            return HTMLResponse('server busy', status_code=503)
+
+    return endpoint
+
+
+def status_endpoint(handler):
+    async def endpoint(request):
+        return to_response(handler(None))
+
+    return endpoint
+
+
+async def hello(request):
+    return HTMLResponse('connect success')
+
+
+async def ready(request):
+    result, status = run.ready_handler(None)
+    return JSONResponse(result, status_code=status)
+
+
+async def admin_reload(request):
+    if request.method == "GET":
+        return to_response(run.reload_status_handler(None))
+    result, status = run.admin_reload_handler(await get_request_json(request),
+                                              request.headers.get(run.ADMIN_TOKEN_HEADER, None))
+    response = to_response(result)
+    response.status_code = status
+    return response
+
+
+async def metrics_text(request):
+    return Response(metrics.render(), media_type=run.METRICS_CONTENT_TYPE)
+
+
+route_list = [Route('/', hello), Route('/ready', ready), Route('/metrics', metrics_text),
+              Route('/admin/reload/', admin_reload, methods=["GET", "POST"])]
+for route_path, route_handler in run.QUERY_ROUTE_MAP.items():
+    route_list.append(Route(route_path, query_endpoint(route_path, route_handler), methods=["POST", "GET"]))
+for route_path, route_handler in run.STATUS_ROUTE_MAP.items():
+    route_list.append(Route(route_path, status_endpoint(route_handler), methods=["GET"]))
+
+app = Starlette(routes=route_list,
+                middleware=[Middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"],
+                                       allow_headers=["*"])],
+                on_startup=[on_startup], on_shutdown=[on_shutdown])
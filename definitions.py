@@ -10,3 +10,4 @@ LABEL_DATA_DIR = os.path.join(ROOT_DIR, 'label_data')
 DATA_DIR = os.path.join(ROOT_DIR, 'data')
 Log_DIR = os.path.join(ROOT_DIR, 'logs')
 NEO4j_CONFIG_PATH = os.path.join(ROOT_DIR, 'neo4j_config.json')
+SERVICE_CONFIG_PATH = os.path.join(ROOT_DIR, 'service_config.json')
@@ -0,0 +1,302 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from sekg.graph.exporter.graph_data import GraphData
+from sekg.ir.doc.wrapper import MultiFieldDocumentCollection
+
+import definitions
+from project.cache_module.single_flight import SingleFlight
+from project.index_module.name_index import NameIndex
+from project.index_module.prefix_index import PrefixIndex
+from project.index_module.relation_index import RelationIndex
+from project.storage_module.column_doc_collection import ColumnDocCollection
+from project.storage_module.jsonl_offset_index import JsonLinesOffsetIndex
+from project.storage_module.service_snapshot import ServiceSnapshot
+from project.utils.memory_util import MemoryUtil
+from project.utils.path_util import PathUtil
+
+
+class ArtifactRegistry:
+    """
+    进程内共享的产物注册表.
+    图, 文档集合, 名称映射, json样例代码数据和索引在每个进程中只加载一次, 所有service拿到的是同一个实例.
+    使用快照(use_snapshot)时, 快照中有的产物从快照中取, 不再从原始文件加载和构建.
+    """
+    # 建立在图上的索引和图放在快照的同一分组中
+    GRAPH_GROUP_PREFIX_LIST = ["graph:", "name_index:", "prefix_index:", "relation_index:"]
+
+    def __init__(self):
+        self.__name_2_artifact = dict()
+        self.__name_2_load_seconds = dict()
+        self.__name_2_memory = dict()
+        self.__name_2_load_time = dict()
+        # 产物名 -> 源文件, 写入快照用于判断快照是否过期
+        self.__name_2_source_path = dict()
+        # 只保护上面的字典, 加载在锁外进行, 加载图时/artifacts/和其他产物的获取不用等待
+        self.__lock = threading.Lock()
+        # 同一个产物(或快照分组)同时被多个线程获取时只加载一次
+        self.__loading = SingleFlight()
+        self.__snapshot = None
+        # 正在后台估算内存的进程, fork出的子进程中没有这个线程
+        self.__estimate_pid = None
+
+    def get(self, name, loader, source_path=None):
+        """
+        :param name: 产物名, 同名产物只加载一次
+        :param loader: 无参函数, 第一次获取时调用
+        :param source_path: 产物的源文件
+        """
+        with self.__lock:
+            if source_path is not None:
+                self.__name_2_source_path[name] = str(source_path)
+            if name in self.__name_2_artifact:
+                return self.__name_2_artifact[name]
+            snapshot = self.__snapshot
+        if snapshot is not None and name in snapshot:
+            group_name = snapshot.get_group_name(name)
+            return self.__loading.do(("snapshot", group_name),
+                                     lambda: self.__load_snapshot_group(snapshot, group_name))[name]
+        return self.__loading.do(name, lambda: self.__load(name, loader))
+
+    def __load(self, name, loader):
+        with self.__lock:
+            # 另一个线程刚加载完
+            if name in self.__name_2_artifact:
+                return self.__name_2_artifact[name]
+        start = time.time()
+        artifact = loader()
+        load_seconds = time.time() - start
+        with self.__lock:
+            self.__name_2_artifact[name] = artifact
+            self.__name_2_load_seconds[name] = load_seconds
+            self.__name_2_load_time[name] = start
+        print("load {} in {:.2f}s".format(name, load_seconds))
+        return artifact
+
+    def __load_snapshot_group(self, snapshot, group_name):
+        """
+        :return: 分组中的产物名 -> 注册表中的产物, 已经加载过的产物不被快照中的替换
+        """
+        start = time.time()
+        artifact_dict = snapshot.load_group(group_name)
+        load_seconds = time.time() - start
+        name_2_source = snapshot.meta.get(ServiceSnapshot.SOURCE_META_KEY, dict())
+        with self.__lock:
+            for name, artifact in artifact_dict.items():
+                if name in name_2_source:
+                    self.__name_2_source_path.setdefault(name, name_2_source[name][0])
+                if name not in self.__name_2_artifact:
+                    self.__name_2_artifact[name] = artifact
+                    self.__name_2_load_seconds[name] = load_seconds
+                    self.__name_2_load_time[name] = start
+                artifact_dict[name] = self.__name_2_artifact[name]
+        print("load {} from snapshot in {:.2f}s".format(group_name, load_seconds))
+        return artifact_dict
+
+    def use_snapshot(self, path):
+        """
+        之后获取的产物优先从快照中取
+        :param path: script/build_service_snapshot.py构建的快照文件, 为None时不再使用快照
+        :return: 快照的meta, 快照过期而不使用时返回None
+        """
+        with self.__lock:
+            self.__snapshot = None
+            if path is None:
+                return None
+            snapshot = ServiceSnapshot(path)
+            # 快照中任何一个产物的源文件在构建后变化过时整个快照都不使用
+            if ServiceSnapshot.SOURCE_META_KEY not in snapshot.meta:
+                print("snapshot has no record of its source files, rebuild it: " + str(path))
+                return None
+            changed_source_list = snapshot.get_changed_source_list()
+            if len(changed_source_list) > 0:
+                print("snapshot is outdated, changed since built: {}".format(", ".join(changed_source_list)))
+                return None
+            self.__snapshot = snapshot
+            return snapshot.meta
+
+    @staticmethod
+    def get_snapshot_group(name):
+        for prefix in ArtifactRegistry.GRAPH_GROUP_PREFIX_LIST:
+            if name.startswith(prefix):
+                return "graph:" + name[len(prefix):]
+        return name
+
+    @staticmethod
+    def get_version_artifact_names(pro_name, graph_version, doc_version):
+        """
+        :return: 一个图版本和文档版本对应的产物名, 切换版本后据此释放旧版本
+        """
+        name_list = [prefix + "{}.{}".format(pro_name, graph_version)
+                     for prefix in ArtifactRegistry.GRAPH_GROUP_PREFIX_LIST]
+        name_list.append("doc:{}.{}".format(pro_name, doc_version))
+        return name_list
+
+    def save_snapshot(self, path, meta=None):
+        """
+        把已经加载的全部产物写成一个快照文件
+        """
+        with self.__lock:
+            group_2_artifact_dict = dict()
+            for name, artifact in self.__name_2_artifact.items():
+                group_2_artifact_dict.setdefault(self.get_snapshot_group(name), dict())[name] = artifact
+            meta = dict(meta) if meta is not None else dict()
+            meta[ServiceSnapshot.SOURCE_META_KEY] = {
+                name: [source_path] + ServiceSnapshot.get_source_state(source_path)
+                for name, source_path in self.__name_2_source_path.items() if name in self.__name_2_artifact}
+            return ServiceSnapshot.write(path, group_2_artifact_dict, meta)
+
+    def release(self, name):
+        """
+        从注册表中移除产物, 之后再获取时重新加载. 已经拿到这个产物的service不受影响
+        :return: 是否移除了产物
+        """
+        with self.__lock:
+            if name not in self.__name_2_artifact:
+                return False
+            del self.__name_2_artifact[name]
+            for name_2_value in (self.__name_2_load_seconds, self.__name_2_memory, self.__name_2_load_time):
+                name_2_value.pop(name, None)
+            return True
+
+    def release_outdated(self):
+        """
+        移除源文件在加载之后被修改过的产物, 如同一版本的文件重新生成后, 重新加载时读取新文件
+        :return: 移除的产物名
+        """
+        with self.__lock:
+            load_state_list = [(name, self.__name_2_source_path.get(name), self.__name_2_load_time.get(name))
+                           for name in self.__name_2_artifact]
+        outdated_list = [name for name, source_path, load_time in load_state_list
+                         if source_path is not None and load_time is not None and os.path.exists(source_path)
+                         and os.path.getmtime(source_path) > load_time]
+        for name in outdated_list:
+            self.release(name)
+        return outdated_list
+
+    def get_load_time(self, name):
+        """
+        :return: 产物开始加载的时间戳, 没有加载时返回None
+        """
+        return self.__name_2_load_time.get(name)
+
+    def __contains__(self, name):
+        return name in self.__name_2_artifact
+
+    def get_artifact_names(self):
+        return list(self.__name_2_artifact.keys())
+
+    def graph_data(self, pro_name, version) -> GraphData:
+        graph_path = PathUtil.graph_data(pro_name=pro_name, version=version)
+        return self.get("graph:{}.{}".format(pro_name, version), lambda: GraphData.load(graph_path), graph_path)
+
+    def doc_collection(self, pro_name, version) -> MultiFieldDocumentCollection:
+        """
+        script/build_doc_columns.py构建过列存储时使用按字段惰性加载的ColumnDocCollection
+        """
+        column_path = PathUtil.doc_columns(pro_name=pro_name, version=version)
+        column_id_path = os.path.join(column_path, ColumnDocCollection.ID_FILE_NAME)
+        use_column = os.path.exists(column_id_path)
+
+        def load():
+            if use_column:
+                return ColumnDocCollection(column_path)
+            return MultiFieldDocumentCollection.load(PathUtil.doc(pro_name=pro_name, version=version))
+
+        return self.get("doc:{}.{}".format(pro_name, version), load,
+                        column_id_path if use_column else PathUtil.doc(pro_name=pro_name, version=version))
+
+    @staticmethod
+    def get_doc_path(pro_name, version):
+        """
+        :return: 文档集合实际加载的文件, 构建过列存储时为列存储的id文件
+        """
+        column_id_path = os.path.join(PathUtil.doc_columns(pro_name=pro_name, version=version),
+                                      ColumnDocCollection.ID_FILE_NAME)
+        if os.path.exists(column_id_path):
+            return column_id_path
+        return PathUtil.doc(pro_name=pro_name, version=version)
+
+    @staticmethod
+    def get_available_doc_version(pro_name, doc_version, fallback_version=""):
+        """
+        doc_version的文档由script/classify_doc_sentence.py生成, 还没有生成时退回fallback_version,
+        句子在请求中用fastText模型分类
+        """
+        doc_path = ArtifactRegistry.get_doc_path(pro_name, doc_version)
+        if os.path.exists(doc_path) or not fallback_version:
+            return doc_version
+        print("warning: doc {} not found, run python -m script.classify_doc_sentence to build it; "
+              "fall back to doc {}".format(doc_path, fallback_version))
+        return fallback_version
+
+    def name_index(self, pro_name, version) -> NameIndex:
+        return self.get("name_index:{}.{}".format(pro_name, version),
+                        lambda: NameIndex(self.graph_data(pro_name, version)),
+                        PathUtil.graph_data(pro_name=pro_name, version=version))
+
+    def prefix_index(self, pro_name, version) -> PrefixIndex:
+        return self.get("prefix_index:{}.{}".format(pro_name, version),
+                        lambda: PrefixIndex(self.graph_data(pro_name, version)),
+                        PathUtil.graph_data(pro_name=pro_name, version=version))
+
+    def relation_index(self, pro_name, version) -> RelationIndex:
+        return self.get("relation_index:{}.{}".format(pro_name, version),
+                        lambda: RelationIndex(self.graph_data(pro_name, version)),
+                        PathUtil.graph_data(pro_name=pro_name, version=version))
+
+    def simple_qualified_name_map(self):
+        path = Path(definitions.ROOT_DIR) / "output" / "simple_qualified_name_map.json"
+        return self.json_file(path)
+
+    def json_file(self, path):
+        def load():
+            with open(str(path), 'r') as f:
+                return json.load(f)
+
+        return self.get("json:{}".format(os.path.abspath(str(path))), load, path)
+
+    def json_lines(self, path, field_name) -> JsonLinesOffsetIndex:
+        """
+        每行一个json对象的文件, 按下标惰性取出每行的field_name字段, 文件内容通过内存映射在worker之间共享
+        """
+        return self.get("json_lines:{}:{}".format(os.path.abspath(str(path)), field_name),
+                        lambda: JsonLinesOffsetIndex(path, field_name), path)
+
+    def memory_report(self):
+        """
+        每个产物的加载耗时和估算内存. 索引与图共享字符串对象, 因此各项之和会大于实际占用.
+        估算整个图很慢, 不在请求中计算: 在后台线程中估算, 每个产物(名字中带版本)只估算一次, 还没有估算完的memory为None
+        :return: [{"name", "load_seconds", "memory"}]
+        """
+        with self.__lock:
+            report = [{
+                "name": name,
+                "load_seconds": self.__name_2_load_seconds.get(name),
+                "memory": self.__name_2_memory.get(name),
+            } for name in self.__name_2_artifact]
+            pending_list = [(name, artifact) for name, artifact in self.__name_2_artifact.items()
+                            if name not in self.__name_2_memory]
+            if len(pending_list) > 0 and self.__estimate_pid != os.getpid():
+                self.__estimate_pid = os.getpid()
+                threading.Thread(target=self.__estimate_memory, args=(pending_list,), name="artifact_memory",
+                                 daemon=True).start()
+        return report
+
+    def __estimate_memory(self, pending_list):
+        try:
+            for name, artifact in pending_list:
+                memory = MemoryUtil.estimate_size(artifact)
+                with self.__lock:
+                    # 估算期间被release或重新加载的产物不记录
+                    if self.__name_2_artifact.get(name) is artifact:
+                        self.__name_2_memory[name] = memory
+        finally:
+            with self.__lock:
+                self.__estimate_pid = None
+
+
+artifact_registry = ArtifactRegistry()
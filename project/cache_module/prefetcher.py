@@ -0,0 +1,123 @@
+import os
+import queue
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+class Prefetcher:
+    """
+    低优先级的后台预取线程. 任务放入有界队列, 队列满时直接丢弃;
+    有前台请求在处理时不执行任务; 每个任务执行后按cpu_budget休眠, 后台最多占用cpu_budget比例的时间.
+    任务一般是调用带缓存的接口函数, 结果进入响应缓存, 用户之后的请求直接命中.
+    后台线程在每个进程第一次submit时启动, gunicorn --preload在master中创建的实例fork到worker后仍然可用.
+    cpu_budget只在任务之间生效, 单个任务(如一个很大的类的api_structure)本身的运行时间可能超过预算
+    """
+    # 有前台请求时的等待间隔
+    IDLE_POLL_SECONDS = 0.05
+
+    def __init__(self, max_queue_size=64, cpu_budget=0.2, recent_key_count=1024):
+        """
+        :param max_queue_size: 队列中最多的任务数
+        :param cpu_budget: 后台线程运行时间的比例上限, 0到1之间
+        :param recent_key_count: 记住最近提交过的任务key数, 重复的任务不再提交
+        """
+        self.cpu_budget = cpu_budget
+        self.recent_key_count = recent_key_count
+        self.submit_count = 0
+        self.drop_count = 0
+        self.run_count = 0
+        self.error_count = 0
+        self.__queue = queue.Queue(maxsize=max_queue_size)
+        self.__recent_keys = OrderedDict()
+        self.__foreground_count = 0
+        self.__lock = threading.Lock()
+        self.__thread_pid = None
+
+    def __ensure_started(self):
+        """
+        线程不会随fork复制到子进程中, 每个进程启动自己的线程, 丢弃从父进程复制来的任务
+        """
+        with self.__lock:
+            if self.__thread_pid == os.getpid():
+                return
+            if self.__thread_pid is not None:
+                self.__queue = queue.Queue(maxsize=self.__queue.maxsize)
+                self.__recent_keys.clear()
+            self.__thread_pid = os.getpid()
+            threading.Thread(target=self.__run, args=(self.__queue,), name="prefetcher", daemon=True).start()
+
+    @contextmanager
+    def foreground(self):
+        """
+        前台请求的处理放在with块中, 处理期间后台不执行任务
+        """
+        with self.__lock:
+            self.__foreground_count += 1
+        try:
+            yield
+        finally:
+            with self.__lock:
+                self.__foreground_count -= 1
+
+    def is_foreground_active(self):
+        return self.__foreground_count > 0
+
+    def submit(self, key, task):
+        """
+        :param key: 任务的key, 如("api_structure", qualified_name), 最近提交过的key不再提交
+        :param task: 无参函数, 可以在其中继续submit
+        :return: 是否放入队列
+        """
+        self.__ensure_started()
+        with self.__lock:
+            if key in self.__recent_keys:
+                self.__recent_keys.move_to_end(key)
+                return False
+            self.__recent_keys[key] = True
+            if len(self.__recent_keys) > self.recent_key_count:
+                self.__recent_keys.popitem(last=False)
+            self.submit_count += 1
+        try:
+            self.__queue.put_nowait((key, task))
+            return True
+        except queue.Full:
+            with self.__lock:
+                self.drop_count += 1
+                self.__recent_keys.pop(key, None)
+            return False
+
+    def __run(self, task_queue):
+        while True:
+            key, task = task_queue.get()
+            while self.is_foreground_active():
+                time.sleep(self.IDLE_POLL_SECONDS)
+            start = time.perf_counter()
+            try:
+                task()
+                with self.__lock:
+                    self.run_count += 1
+            except Exception:
+                with self.__lock:
+                    self.error_count += 1
+                print("prefetch {} failed".format(key))
+                traceback.print_exc()
+            finally:
+                task_queue.task_done()
+            # 运行了t秒后休眠t*(1-budget)/budget秒
+            elapsed = time.perf_counter() - start
+            if 0 < self.cpu_budget < 1:
+                time.sleep(elapsed * (1 - self.cpu_budget) / self.cpu_budget)
+
+    def join(self):
+        """
+        等待队列中的任务全部执行完
+        """
+        self.__queue.join()
+
+    def stats(self):
+        with self.__lock:
+            return {"queue": self.__queue.qsize(), "submit": self.submit_count, "drop": self.drop_count,
+                    "run": self.run_count, "error": self.error_count}
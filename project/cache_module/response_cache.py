@@ -0,0 +1,153 @@
+import threading
+from collections import OrderedDict
+
+from project.utils.memory_util import MemoryUtil
+
+
+class ResponseCache:
+    """
+    有界的LRU响应缓存, 条目数超过max_size或估算内存超过max_memory时淘汰最久未使用的条目.
+    key一般为(graph_version, qualified_name, endpoint), 图在一个版本内不变, 因此不需要过期时间, 切换版本时用invalidate_version失效.
+    shared_store不为None时作为第二级缓存, 本进程未命中时从中取, 新结果也写入其中, 多个worker进程共用计算结果.
+    """
+
+    def __init__(self, max_size=256, max_memory=256 * 1024 * 1024, shared_store=None):
+        """
+        :param shared_store: 进程间共享的键值存储, 如MmapKVStore
+        """
+        self.max_size = max_size
+        self.max_memory = max_memory
+        self.shared_store = shared_store
+        self.memory = 0
+        self.hit_count = 0
+        self.miss_count = 0
+        self.shared_hit_count = 0
+        self.evict_count = 0
+        self.__key_2_value = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self.__lock:
+            if key in self.__key_2_value:
+                self.hit_count += 1
+                self.__key_2_value.move_to_end(key)
+                return self.__key_2_value[key][0]
+        missing = object()
+        value = self.get_shared(key, missing)
+        with self.__lock:
+            if value is missing:
+                self.miss_count += 1
+                return default
+            self.hit_count += 1
+            self.shared_hit_count += 1
+        return value
+
+    def get_shared(self, key, default=None):
+        """
+        从共享存储中取, 取到时放入本进程的缓存
+        """
+        if self.shared_store is None:
+            return default
+        missing = object()
+        value = self.shared_store.get(key, missing)
+        if value is missing:
+            return default
+        self.put_local(key, value)
+        return value
+
+    def peek(self, key, default=None, local_only=False):
+        """
+        和get相同, 但未命中时不计数, 用于先查缓存再决定是否计算的场景, 未命中时之后的get_or_compute会计数
+        :param local_only: 只查本进程的缓存, 不读共享存储(要加文件锁和反序列化), 用于事件循环中
+        """
+        # 查找和计数在同一个临界区中, 避免两次加锁之间条目被淘汰
+        with self.__lock:
+            if key in self.__key_2_value:
+                self.hit_count += 1
+                self.__key_2_value.move_to_end(key)
+                return self.__key_2_value[key][0]
+        if local_only:
+            return default
+        missing = object()
+        value = self.get_shared(key, missing)
+        if value is missing:
+            return default
+        with self.__lock:
+            self.hit_count += 1
+            self.shared_hit_count += 1
+        return value
+
+    def put(self, key, value):
+        self.put_local(key, value)
+        if self.shared_store is not None:
+            self.shared_store.put(key, value)
+
+    def put_local(self, key, value):
+        if self.max_size <= 0:
+            return
+        size = MemoryUtil.estimate_size(value)
+        # 单个结果超过内存上限时不缓存
+        if size > self.max_memory:
+            return
+        with self.__lock:
+            if key in self.__key_2_value:
+                self.memory -= self.__key_2_value.pop(key)[1]
+            self.__key_2_value[key] = (value, size)
+            self.memory += size
+            while len(self.__key_2_value) > self.max_size or self.memory > self.max_memory:
+                _, (_, evicted_size) = self.__key_2_value.popitem(last=False)
+                self.memory -= evicted_size
+                self.evict_count += 1
+
+    def get_or_compute(self, key, compute):
+        """
+        :param key: 缓存key
+        :param compute: 无参函数, 缓存未命中时调用并缓存其结果
+        """
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def __contains__(self, key):
+        with self.__lock:
+            return key in self.__key_2_value
+
+    def __len__(self):
+        return len(self.__key_2_value)
+
+    def clear(self):
+        """
+        只清空本进程的缓存, 共享存储按namespace(图的版本)失效
+        """
+        with self.__lock:
+            self.__key_2_value.clear()
+            self.memory = 0
+
+    def invalidate_version(self, version):
+        """
+        移除本进程中key[0]为version的条目, 共享存储中的条目key带版本, 不会再被命中, 由环形缓冲区覆盖
+        :return: 移除的条目数
+        """
+        with self.__lock:
+            key_list = [key for key in self.__key_2_value if isinstance(key, tuple) and key and key[0] == version]
+            for key in key_list:
+                self.memory -= self.__key_2_value.pop(key)[1]
+            return len(key_list)
+
+    def stats(self):
+        with self.__lock:
+            total = self.hit_count + self.miss_count
+            return {
+                "size": len(self.__key_2_value),
+                "max_size": self.max_size,
+                "memory": self.memory,
+                "max_memory": self.max_memory,
+                "hit": self.hit_count,
+                "shared_hit": self.shared_hit_count,
+                "miss": self.miss_count,
+                "evict": self.evict_count,
+                "hit_rate": self.hit_count / total if total > 0 else 0.0,
+            }
@@ -0,0 +1,57 @@
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiter_count = 0
+
+
+class SingleFlight:
+    """
+    合并同时进行的相同计算: 同一个key正在计算时, 后来的线程等待这次计算, 拿到同一个结果(或同一个异常),
+    计算结束后key即被移除, 不缓存结果
+    """
+
+    def __init__(self):
+        self.__key_2_call = dict()
+        self.__lock = threading.Lock()
+        self.call_count = 0
+        self.coalesced_count = 0
+
+    def do(self, key, compute):
+        """
+        :param key: 可哈希的key, 如(接口, 规范化的请求参数)
+        :param compute: 无参函数
+        """
+        with self.__lock:
+            call = self.__key_2_call.get(key, None)
+            if call is not None:
+                call.waiter_count += 1
+                self.coalesced_count += 1
+                leader = False
+            else:
+                call = _Call()
+                self.__key_2_call[key] = call
+                self.call_count += 1
+                leader = True
+        if not leader:
+            call.done.wait()
+        else:
+            try:
+                call.result = compute()
+            except Exception as e:
+                call.error = e
+            finally:
+                with self.__lock:
+                    del self.__key_2_call[key]
+                call.done.set()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def stats(self):
+        with self.__lock:
+            return {"in_flight": len(self.__key_2_call), "call": self.call_count, "coalesced": self.coalesced_count}
@@ -0,0 +1,130 @@
+import atexit
+import fcntl
+import json
+import math
+import os
+import threading
+import time
+import traceback
+from collections import Counter
+
+
+class QueryRecorder:
+    """
+    记录类页面被请求的次数, 定期合并写入按次数排序的热门查询文件[{"qualified_name", "count"}],
+    多个worker进程用flock互斥地合并同一个文件. 服务启动时CacheWarmer按这个文件预热缓存
+    """
+
+    def __init__(self, path, flush_seconds=60, max_name_count=10000):
+        """
+        :param path: 热门查询文件路径
+        :param flush_seconds: 两次写入文件的最短间隔
+        :param max_name_count: 文件中最多保存的名字数
+        """
+        self.path = str(path)
+        self.flush_seconds = flush_seconds
+        self.max_name_count = max_name_count
+        self.__name_2_count = Counter()
+        self.__last_flush_time = time.time()
+        self.__lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def record(self, qualified_name):
+        with self.__lock:
+            self.__name_2_count[qualified_name] += 1
+            need_flush = time.time() - self.__last_flush_time > self.flush_seconds
+        if need_flush:
+            self.flush()
+
+    @staticmethod
+    def load(path):
+        """
+        :return: 按请求次数从高到低排序的[{"qualified_name", "count"}], 文件不存在时为空
+        """
+        if not os.path.exists(str(path)):
+            return []
+        with open(str(path), "r") as f:
+            return json.load(f)
+
+    def flush(self):
+        with self.__lock:
+            name_2_count = self.__name_2_count
+            self.__name_2_count = Counter()
+            self.__last_flush_time = time.time()
+        if len(name_2_count) == 0:
+            return
+        with open(self.path + ".lock", "w") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            for item in self.load(self.path):
+                name_2_count[item["qualified_name"]] += item["count"]
+            popular_list = [{"qualified_name": name, "count": count}
+                            for name, count in name_2_count.most_common(self.max_name_count)]
+            temp_path = "{}.{}.tmp".format(self.path, os.getpid())
+            with open(temp_path, "w") as f:
+                json.dump(popular_list, f)
+            os.replace(temp_path, self.path)
+
+
+class CacheWarmer:
+    """
+    后台线程按顺序对热门查询调用warm_function, 把结果算进缓存.
+    完成的比例达到ready_threshold后is_ready为True, /ready据此判断实例是否可以接收流量
+    """
+
+    def __init__(self, warm_function, qualified_name_list, ready_threshold=0.8):
+        """
+        :param warm_function: 参数为全限定名, 如调用api_base_structure
+        :param qualified_name_list: 按热门程度排序的全限定名
+        :param ready_threshold: 0到1之间, 完成这个比例的预热后就绪
+        """
+        self.warm_function = warm_function
+        self.qualified_name_list = list(qualified_name_list)
+        self.ready_count = int(math.ceil(ready_threshold * len(self.qualified_name_list)))
+        self.warmed_count = 0
+        self.error_count = 0
+        self.start_time = None
+        self.end_time = None
+        self.__thread = None
+        self.__thread_pid = None
+        self.__lock = threading.Lock()
+
+    def start(self):
+        """
+        每个进程只启动一次, 可以在每个请求前调用. 线程不会随fork复制, gunicorn --preload时在worker中调用,
+        fork出的子进程重新预热自己的缓存并报告自己的进度
+        """
+        with self.__lock:
+            if self.__thread_pid == os.getpid():
+                return self
+            self.__thread_pid = os.getpid()
+            self.warmed_count = 0
+            self.error_count = 0
+            self.start_time = time.time()
+            self.end_time = None
+            self.__thread = threading.Thread(target=self.__run, name="cache_warmer", daemon=True)
+            self.__thread.start()
+        return self
+
+    def __run(self):
+        for qualified_name in self.qualified_name_list:
+            try:
+                self.warm_function(qualified_name)
+            except Exception:
+                self.error_count += 1
+                print("warm up {} failed".format(qualified_name))
+                traceback.print_exc()
+            # 失败的也计入完成, 否则一个坏名字会让实例一直不能就绪
+            self.warmed_count += 1
+        self.end_time = time.time()
+
+    def is_ready(self):
+        return self.warmed_count >= self.ready_count
+
+    def join(self, timeout=None):
+        if self.__thread is not None:
+            self.__thread.join(timeout)
+
+    def stats(self):
+        return {"ready": self.is_ready(), "warmed": self.warmed_count, "total": len(self.qualified_name_list),
+                "ready_count": self.ready_count, "error": self.error_count,
+                "seconds": (self.end_time or time.time()) - self.start_time if self.start_time else 0.0}
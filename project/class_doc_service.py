@@ -0,0 +1,116 @@
+import traceback
+
+from project.doc_service import DocService
+from project.json_service import JsonService
+from project.knowledge_service import KnowledgeService
+
+
+class ClassDocService:
+    """
+    一次请求返回一个类的全部文档内容, 各部分共用名称解析和方法列表等中间结果
+    """
+    SECTION_LIST = ["doc", "knowledge", "structure", "key_methods", "terminology", "sample_code",
+                    "parameter_return_value", "constructor", "related_api"]
+    # 批量接口中还可以取方法的结构
+    BATCH_SECTION_LIST = SECTION_LIST + ["method_structure"]
+
+    def __init__(self, knowledge_service: KnowledgeService, doc_service: DocService, json_service: JsonService):
+        self.knowledge_service = knowledge_service
+        self.doc_service = doc_service
+        self.json_service = json_service
+
+    def get_parameter_return_value(self, qualified_name, sample_code_memo=None):
+        """
+        api作为参数和返回值的样例方法及其样例代码
+        :param sample_code_memo: 样例方法名 -> 样例代码, 批量请求中共用
+        """
+        result = dict()
+        result['parameter'] = self.get_sample_method_list(self.json_service.api_as_parameter(qualified_name),
+                                                          sample_code_memo)
+        result['return_value'] = self.get_sample_method_list(self.json_service.api_as_return_value(qualified_name),
+                                                             sample_code_memo)
+        return result
+
+    def get_sample_method_list(self, method_name_list, sample_code_memo=None):
+        if sample_code_memo is None:
+            sample_code_memo = dict()
+        sample_method_list = list()
+        for i in method_name_list:
+            info = dict()
+            info['qualified_name'] = i
+            if i not in sample_code_memo:
+                sample_code_memo[i] = self.get_sample_method_code(i)
+            info['sample_code'] = sample_code_memo[i]
+            sample_method_list.append(info)
+        return sample_method_list
+
+    def get_sample_method_code(self, method_name):
+        api_id = self.knowledge_service.get_api_id_by_name_prefix(method_name[:method_name.rfind("(")])
+        if api_id == -1:
+            return "No sample code available."
+        return self.knowledge_service.get_one_sample_code(api_id)
+
+    def get_batch_doc(self, qualified_name_list, section_list=None):
+        """
+        批量请求的文档, 重复的名字只计算一次, 样例方法的样例代码在整个批次中共用
+        :param qualified_name_list: 已经解析过的全限定名
+        :param section_list: 需要返回的部分, 见BATCH_SECTION_LIST, 为None时返回SECTION_LIST中的全部
+        :return: 生成器, 按qualified_name_list的顺序每算完一个就产出一个结果.
+        某个名字计算出错时这一项为{"qualified_name", "error"}, 其余的名字继续返回
+        """
+        sample_code_memo = dict()
+        name_2_result = dict()
+        for qualified_name in qualified_name_list:
+            if qualified_name not in name_2_result:
+                try:
+                    result = self.get_class_doc(qualified_name, section_list, sample_code_memo)
+                except Exception as e:
+                    print("batch doc {} failed".format(qualified_name))
+                    traceback.print_exc()
+                    result = {"qualified_name": qualified_name, "error": "{}: {}".format(type(e).__name__, e)}
+                name_2_result[qualified_name] = result
+            yield name_2_result[qualified_name]
+
+    def get_class_doc(self, qualified_name, section_list=None, sample_code_memo=None):
+        """
+        :param qualified_name: 已经解析过的类的全限定名
+        :param section_list: 需要返回的部分, 为None时返回SECTION_LIST中的全部
+        :param sample_code_memo: 见get_parameter_return_value
+        :return: section -> 对应接口的返回结果
+        """
+        if section_list is None:
+            section_list = self.SECTION_LIST
+        result = dict()
+        result["qualified_name"] = qualified_name
+        api_id = self.knowledge_service.get_api_id_by_name(qualified_name)
+        if api_id == -1:
+            result["message"] = "can't find api by name"
+            return result
+        # 各部分共用这里解析出的api_id和同一份方法列表(structure和constructor)
+        method_list = None
+        if "constructor" in section_list:
+            method_list = self.knowledge_service.get_method_base_list(api_id)
+
+        if "doc" in section_list:
+            result["doc"] = self.doc_service.get_doc_info(api_id)
+        if "knowledge" in section_list:
+            result["knowledge"] = self.knowledge_service.get_knowledge(qualified_name, api_id)
+        if "structure" in section_list:
+            result["structure"] = self.knowledge_service.get_cached_response(
+                "api_structure", qualified_name,
+                lambda: self.knowledge_service.build_api_base_structure(qualified_name, method_list, api_id=api_id))
+        if "key_methods" in section_list:
+            result["key_methods"] = self.knowledge_service.get_key_methods(qualified_name, api_id)
+        if "terminology" in section_list:
+            result["terminology"] = self.knowledge_service.get_api_terminologies(qualified_name, api_id)
+        if "sample_code" in section_list:
+            result["sample_code"] = self.doc_service.get_sample_code(api_id)
+        if "parameter_return_value" in section_list:
+            result["parameter_return_value"] = self.get_parameter_return_value(qualified_name, sample_code_memo)
+        if "constructor" in section_list:
+            result["constructor"] = self.knowledge_service.get_constructor(qualified_name, method_list, api_id)
+        if "related_api" in section_list:
+            result["related_api"] = self.knowledge_service.get_related_api(qualified_name, api_id)
+        if "method_structure" in section_list:
+            result["method_structure"] = self.knowledge_service.api_method_structure(qualified_name)
+        return result
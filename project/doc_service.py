@@ -1,13 +1,36 @@
+import json
+
 from sekg.ir.doc.wrapper import MultiFieldDocumentCollection, MultiFieldDocument
 
-from project.utils.path_util import PathUtil
+import definitions
+
+from project.artifact_registry import ArtifactRegistry, artifact_registry
+from project.cache_module.response_cache import ResponseCache
+from project.utils.metrics import metrics
 
 
 class DocService:
-    def __init__(self):
-        pro_name = "jabref"
-        data_dir = PathUtil.doc(pro_name=pro_name, version="v3.3")
-        self.doc_collection: MultiFieldDocumentCollection = MultiFieldDocumentCollection.load(data_dir)
+    def __init__(self, doc_collection: MultiFieldDocumentCollection = None, response_cache: ResponseCache = None,
+                 doc_version=""):
+        # 默认按doc_version(不指定时为service_config.json中的版本)从注册表取, 与KnowledgeService共用同一个文档集合,
+        # 这个版本的文档还没有生成时和run.py一样退回doc_fallback_version
+        if doc_collection is None:
+            with open(definitions.SERVICE_CONFIG_PATH, 'r') as f:
+                service_config = json.load(f)
+            doc_version = ArtifactRegistry.get_available_doc_version(
+                service_config["pro_name"], doc_version or service_config["doc_version"],
+                service_config.get("doc_fallback_version", ""))
+            doc_collection = artifact_registry.doc_collection(pro_name=service_config["pro_name"],
+                                                              version=doc_version)
+        self.doc_collection: MultiFieldDocumentCollection = doc_collection
+        # 缓存key中带上文档的版本
+        self.response_cache = response_cache
+        self.doc_version = doc_version
+
+    def get_cached_response(self, endpoint, api_id, compute):
+        if self.response_cache is None:
+            return compute()
+        return self.response_cache.get_or_compute((self.doc_version, api_id, endpoint), compute)
 
     def extract_all_doc(self):
         text_list = []
@@ -19,6 +42,9 @@ class DocService:
 
     # 根据api id返回相应dc文档中描述信息
     def get_doc_info(self, api_id):
+        return self.get_cached_response("get_doc", api_id, lambda: self.build_doc_info(api_id))
+
+    def build_doc_info(self, api_id):
         doc: MultiFieldDocument = self.doc_collection.get_by_id(api_id)
         result = dict()
         result['full_html_description'] = doc.get_doc_text_by_field('full_html_description')
@@ -28,15 +54,19 @@ class DocService:
 
     # 根据api id返回相应dc文件中的sample code
     def get_sample_code(self, api_id):
-        doc: MultiFieldDocument = self.doc_collection.get_by_id(api_id)
-        if doc is None:
-            return None
-        result = dict()
-        sample_code = doc.get_doc_text_by_field('sample_code_cluster')
-        if sample_code is None:
-            sample_code = doc.get_doc_text_by_field("sample_code")
-        result['sample_code'] = sample_code
-        return result
+        return self.get_cached_response("sample_code", api_id, lambda: self.build_sample_code(api_id))
+
+    def build_sample_code(self, api_id):
+        with metrics.stage("sample_code"):
+            doc: MultiFieldDocument = self.doc_collection.get_by_id(api_id)
+            if doc is None:
+                return None
+            result = dict()
+            sample_code = doc.get_doc_text_by_field('sample_code_cluster')
+            if sample_code is None:
+                sample_code = doc.get_doc_text_by_field("sample_code")
+            result['sample_code'] = sample_code
+            return result
 
 
 if __name__ == '__main__':
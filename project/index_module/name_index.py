@@ -0,0 +1,89 @@
+class NameIndex:
+    """
+    qualified_name -> node id 的哈希索引, 在服务启动时构建一次.
+    除精确查找外, 还支持按方法名(不带参数)和简单名查找所有重载.
+    """
+    QUALIFIED_NAME = "qualified_name"
+
+    def __init__(self, graph_data=None):
+        self.name_2_id = dict()
+        self.name_without_parameter_2_ids = dict()
+        self.simple_name_2_ids = dict()
+        if graph_data is not None:
+            self.build(graph_data)
+
+    def build(self, graph_data):
+        self.name_2_id.clear()
+        self.name_without_parameter_2_ids.clear()
+        self.simple_name_2_ids.clear()
+        # 按id顺序遍历, 与find_one_node_by_property返回第一个匹配节点的行为保持一致
+        for node_id in sorted(graph_data.get_node_ids()):
+            node = graph_data.get_node_info_dict(node_id)
+            if node is None or "properties" not in node:
+                continue
+            qualified_name = node["properties"].get(self.QUALIFIED_NAME)
+            if not isinstance(qualified_name, str) or qualified_name == "":
+                continue
+            self.add(qualified_name, node_id)
+
+    def add(self, qualified_name, node_id):
+        self.name_2_id.setdefault(qualified_name, node_id)
+        name_without_parameter = self.remove_parameter(qualified_name)
+        if name_without_parameter != qualified_name:
+            self.name_without_parameter_2_ids.setdefault(name_without_parameter, []).append(node_id)
+        simple_name = self.get_simple_name(qualified_name)
+        self.simple_name_2_ids.setdefault(simple_name, []).append(node_id)
+
+    @staticmethod
+    def remove_parameter(qualified_name):
+        if qualified_name.find("(") == -1:
+            return qualified_name
+        return qualified_name[:qualified_name.find("(")]
+
+    @staticmethod
+    def get_simple_name(qualified_name):
+        name_without_parameter = NameIndex.remove_parameter(qualified_name)
+        return name_without_parameter[name_without_parameter.rfind(".") + 1:]
+
+    def get_id(self, qualified_name):
+        """
+        精确查找
+        :param qualified_name: 全限定名
+        :return: node id, 找不到返回-1
+        """
+        return self.name_2_id.get(qualified_name, -1)
+
+    def get_ids(self, name):
+        """
+        考虑重载的查找, 依次尝试全限定名, 不带参数的方法签名和简单名
+        :param name: 全限定名/不带参数的方法签名/简单名
+        :return: 匹配的node id列表, 按id排序
+        """
+        if name in self.name_2_id:
+            return [self.name_2_id[name]]
+        if name in self.name_without_parameter_2_ids:
+            return list(self.name_without_parameter_2_ids[name])
+        if name in self.simple_name_2_ids:
+            return list(self.simple_name_2_ids[name])
+        return []
+
+    def resolve_id(self, name):
+        """
+        把请求中的名字解析为一个node id. 带类名的不带参数的方法签名取第一个重载;
+        简单名只在唯一匹配时使用, 如"get"这样有歧义的简单名不随便取一个
+        :return: node id, 找不到或有歧义时返回-1
+        """
+        if name in self.name_2_id:
+            return self.name_2_id[name]
+        if name in self.name_without_parameter_2_ids:
+            return self.name_without_parameter_2_ids[name][0]
+        id_list = self.simple_name_2_ids.get(name, [])
+        if len(id_list) == 1:
+            return id_list[0]
+        return -1
+
+    def __len__(self):
+        return len(self.name_2_id)
+
+    def __contains__(self, qualified_name):
+        return qualified_name in self.name_2_id
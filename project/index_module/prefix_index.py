@@ -0,0 +1,56 @@
+from bisect import bisect_left
+
+
+class PrefixIndex:
+    """
+    qualified_name 的有序前缀索引, 在加载图时构建一次.
+    所有以某个前缀开头的名字在排序后的列表中是连续的一段, 用二分查找定位, 查询代价为O(log n + k).
+    """
+    QUALIFIED_NAME = "qualified_name"
+
+    def __init__(self, graph_data=None):
+        self.name_list = []
+        self.id_list = []
+        if graph_data is not None:
+            self.build(graph_data)
+
+    def build(self, graph_data):
+        name_id_list = []
+        for node_id in graph_data.get_node_ids():
+            node = graph_data.get_node_info_dict(node_id)
+            if node is None or "properties" not in node:
+                continue
+            qualified_name = node["properties"].get(self.QUALIFIED_NAME)
+            if not isinstance(qualified_name, str) or qualified_name == "":
+                continue
+            name_id_list.append((qualified_name, node_id))
+        name_id_list.sort()
+        self.name_list = [name for name, _ in name_id_list]
+        self.id_list = [node_id for _, node_id in name_id_list]
+
+    def find_ids(self, prefix):
+        """
+        查找qualified_name以prefix开头的所有节点
+        :param prefix: 前缀
+        :return: node id列表, 按id排序, 与find_nodes_by_property_value_starts_with的遍历顺序一致
+        """
+        result = []
+        index = bisect_left(self.name_list, prefix)
+        while index < len(self.name_list) and self.name_list[index].startswith(prefix):
+            result.append(self.id_list[index])
+            index += 1
+        result.sort()
+        return result
+
+    def find_one_id(self, prefix):
+        """
+        :param prefix: 前缀
+        :return: 第一个匹配的node id, 找不到返回-1
+        """
+        id_list = self.find_ids(prefix)
+        if len(id_list) == 0:
+            return -1
+        return id_list[0]
+
+    def __len__(self):
+        return len(self.name_list)
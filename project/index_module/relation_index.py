@@ -0,0 +1,48 @@
+class RelationIndex:
+    """
+    按(node_id, relation_type, direction)预先建好的邻接表, 直接返回邻居节点id,
+    避免每次查询都对get_all_out_relations/get_all_in_relations求并集再按字符串过滤.
+    """
+    OUT = "out"
+    IN = "in"
+
+    def __init__(self, graph_data=None):
+        self.adjacency = dict()
+        if graph_data is not None:
+            self.build(graph_data)
+
+    def build(self, graph_data):
+        self.adjacency.clear()
+        for node_id in sorted(graph_data.get_node_ids()):
+            for start_id, relation_type, end_id in graph_data.get_all_out_relations(node_id):
+                self.add(start_id, relation_type, end_id)
+        for neighbour_list in self.adjacency.values():
+            neighbour_list.sort()
+
+    def add(self, start_id, relation_type, end_id):
+        self.adjacency.setdefault((start_id, relation_type, self.OUT), []).append(end_id)
+        self.adjacency.setdefault((end_id, relation_type, self.IN), []).append(start_id)
+
+    def get_out_ids(self, node_id, relation_type):
+        """
+        :return: node_id --relation_type--> end 的所有end id
+        """
+        return self.adjacency.get((node_id, relation_type, self.OUT), [])
+
+    def get_in_ids(self, node_id, relation_type):
+        """
+        :return: start --relation_type--> node_id 的所有start id
+        """
+        return self.adjacency.get((node_id, relation_type, self.IN), [])
+
+    def get_neighbour_ids(self, node_id, relation_type):
+        """
+        不区分方向的邻居, 去重
+        """
+        out_ids = self.get_out_ids(node_id, relation_type)
+        in_ids = self.get_in_ids(node_id, relation_type)
+        if len(in_ids) == 0:
+            return out_ids
+        if len(out_ids) == 0:
+            return in_ids
+        return sorted(set(out_ids).union(in_ids))
@@ -1,54 +1,52 @@
 import definitions
 from pathlib import Path
-import json
+
+from project.artifact_registry import ArtifactRegistry, artifact_registry
+from project.utils.java_signature_util import JavaSignatureUtil
 
 api_to_example_json_path = Path(definitions.ROOT_DIR) / "output" / "json" / "api_2_example_sorted.json"
 mid_to_method_info_json_path = Path(definitions.ROOT_DIR) / "output" / "json" / "mid_2_method_info_without_comment.json"
 mid_to_qualified_name_json_path = Path(definitions.ROOT_DIR) / "output" / "json" / "mid_2_qualified_name.json"
+api_to_parameter_return_value_json_path = Path(definitions.ROOT_DIR) / "output" / "json" / "api_2_parameter_return_value.json"
 
 
 class JsonService:
-    def __init__(self):
-        self.methods_info = list() # mid对应每个方法的描述信息
-        self.method_names = list() # mid对应每个方法的全限定名
-        self.api_to_mid = dict() # 每个api对应的相关mid
-        with open(api_to_example_json_path, 'r') as f:
-            self.api_to_mid = json.load(f)
-
-        methods = open(mid_to_method_info_json_path, 'r').readlines()
-        for method in methods:
-            self.methods_info.append(json.loads(method)['method'])
-
-        method_names = []
-        methods = open(mid_to_qualified_name_json_path, 'r').readlines()
-        for method in methods:
-            self.method_names.append(json.loads(method)['qname'])
+    def __init__(self, registry: ArtifactRegistry = artifact_registry):
+        self.api_to_mid = registry.json_file(api_to_example_json_path) # 每个api对应的相关mid
+        self.methods_info = registry.json_lines(mid_to_method_info_json_path, 'method') # mid对应每个方法的描述信息
+        self.method_names = registry.json_lines(mid_to_qualified_name_json_path, 'qname') # mid对应每个方法的全限定名
+        # 每个api作为参数和返回值出现的mid, 由script/build_parameter_return_value_table.py预先计算
+        self.api_to_usage = dict()
+        if api_to_parameter_return_value_json_path.exists():
+            self.api_to_usage = registry.json_file(api_to_parameter_return_value_json_path)
+
+    def build_usage(self, qualified_name):
+        """
+        解析api的每个样例方法的签名, 找出api作为参数类型和返回值类型出现的mid
+        :return: {"parameter": [mid], "return_value": [mid]}
+        """
+        usage = {"parameter": [], "return_value": []}
+        for mid in self.api_to_mid.get(qualified_name, []):
+            signature = JavaSignatureUtil.parse_method_signature(self.methods_info[mid - 1])
+            if signature is None:
+                continue
+            return_type_tokens, parameter_type_tokens = signature
+            if JavaSignatureUtil.contains_type(parameter_type_tokens, qualified_name):
+                usage["parameter"].append(mid)
+            if JavaSignatureUtil.contains_type(return_type_tokens, qualified_name):
+                usage["return_value"].append(mid)
+        return usage
+
+    def get_usage(self, qualified_name):
+        if qualified_name in self.api_to_usage:
+            return self.api_to_usage[qualified_name]
+        return self.build_usage(qualified_name)
 
     def api_as_parameter(self, qualified_name):
-        result = list()
-        mid_list: list = self.api_to_mid[qualified_name]
-        key_word = qualified_name[qualified_name.rfind('.')+1:]
-        for i in range(len(mid_list)):
-            mid = mid_list[i]
-            method_info: str = self.methods_info[mid - 1]
-            method_name = self.method_names[mid - 1]
-            para_str = method_info[method_info.find('('):method_info.find(')')]
-            if method_info.find('{') != -1 and para_str.find(key_word) != -1:
-                result.append(method_name)
-        return result
+        return [self.method_names[mid - 1] for mid in self.get_usage(qualified_name)["parameter"]]
 
     def api_as_return_value(self, qualified_name):
-        result = list()
-        mid_list: list = self.api_to_mid[qualified_name]
-        key_word = qualified_name[qualified_name.rfind('.') + 1:]
-        for i in range(len(mid_list)):
-            mid = mid_list[i]
-            method_info: str = self.methods_info[mid - 1]
-            method_name = self.method_names[mid - 1]
-            prefix = method_info[:method_info.find('(')]
-            if method_info.find('{') != -1 and prefix.find(key_word) != -1:
-                result.append(method_name)
-        return result
+        return [self.method_names[mid - 1] for mid in self.get_usage(qualified_name)["return_value"]]
 
 
 if __name__ == '__main__':
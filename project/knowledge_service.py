@@ -1,4 +1,6 @@
 import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 from sekg.constant.code import CodeEntityRelationCategory
 from sekg.constant.constant import WikiDataConstance
@@ -8,20 +10,55 @@ from script.classify_sentence import FastTextClassifier
 
 from project.extractor_module.constant.constant import RelationNameConstant, FeatureConstant, DomainConstant, \
     FunctionalityConstant, SentenceConstant, CodeConstant
+from project.cache_module.response_cache import ResponseCache
+from project.index_module.name_index import NameIndex
+from project.index_module.prefix_index import PrefixIndex
+from project.index_module.relation_index import RelationIndex
+from project.utils.metrics import metrics
 from project.utils.path_util import PathUtil
+from project.utils.read_only_graph_view import ReadOnlyGraphView
+from project.utils.server_timing import ServerTiming
 import re
-import networkx as nx
 
 
 class KnowledgeService:
-    def __init__(self, doc_collection, graph_data_path=PathUtil.graph_data(pro_name="jabref", version="v3.10")):
-        if isinstance(graph_data_path, GraphData):
-            self.graph_data: GraphData = graph_data_path
+    # 构造方法只需要这几项
+    METHOD_BASE_FIELD_LIST = ["parameters", "return_value", "doc_info"]
+    FUN_DIR_FIELD_LIST = ["functionality", "directive", "functionality_list", "directive_list"]
+    METHOD_FIELD_LIST = METHOD_BASE_FIELD_LIST + ["exception_info", "label", "sample_code", "concepts",
+                                                  "return_value_directive", "throws_directive"] + FUN_DIR_FIELD_LIST
+    def __init__(self, doc_collection, graph_data_path=PathUtil.graph_data(pro_name="jabref", version="v3.10"),
+                 name_index: NameIndex = None, prefix_index: PrefixIndex = None,
+                 relation_index: RelationIndex = None, response_cache: ResponseCache = None, graph_version="",
+                 method_worker_count=0):
+        if isinstance(graph_data_path, (GraphData, ReadOnlyGraphView)):
+            graph_data = graph_data_path
         else:
-            self.graph_data: GraphData = GraphData.load(graph_data_path)
+            graph_data = GraphData.load(graph_data_path)
         self.doc_collection = doc_collection
-        self.functionClassifier = FastTextClassifier()
-        self.G = nx.Graph(self.graph_data.graph)
+        if name_index is None:
+            name_index = NameIndex(graph_data)
+        self.name_index = name_index
+        if prefix_index is None:
+            prefix_index = PrefixIndex(graph_data)
+        self.prefix_index = prefix_index
+        if relation_index is None:
+            relation_index = RelationIndex(graph_data)
+        self.relation_index = relation_index
+        # 服务中只通过只读视图访问图, 并发请求之间不会互相修改节点, 返回的节点要用ReadOnlyGraphView.thaw复制
+        if not isinstance(graph_data, ReadOnlyGraphView):
+            graph_data = ReadOnlyGraphView(graph_data)
+        self.graph_data: ReadOnlyGraphView = graph_data
+        # 缓存key中带上图的版本, 图更新后旧结果不会被命中
+        self.response_cache = response_cache
+        self.graph_version = graph_version
+        # method_worker_count大于1时, get_api_methods中每个方法的字段在线程池中并行计算
+        self.method_executor = None
+        if method_worker_count > 1:
+            self.method_executor = ThreadPoolExecutor(max_workers=method_worker_count)
+        # fastText模型只在文档中没有离线分类结果时才加载
+        self.functionClassifier = None
+        self.__classifier_lock = threading.Lock()
 
     def get_api_characteristic(self, api_id):
         res_list = []
@@ -49,28 +86,16 @@ class KnowledgeService:
         return new_directive_list
 
     def get_return_value_directive(self, api_id):
-        out_relations = self.graph_data.get_all_out_relations(api_id)
-        in_relations = self.graph_data.get_all_in_relations(api_id)
-        all_relations = out_relations.union(in_relations)
-        return_value_directive_id_set = set()
-        for start, relation, end in all_relations:
-            if relation == "has return code directive":
-                return_value_directive_id_set.add(end if start == api_id else start)
-        return_value_directive_list = [self.graph_data.get_node_info_dict(item)["properties"]["description"] for item in return_value_directive_id_set]
+        return_value_directive_id_list = self.relation_index.get_neighbour_ids(api_id, "has return code directive")
+        return_value_directive_list = [self.graph_data.get_node_info_dict(item)["properties"]["description"] for item in return_value_directive_id_list]
         return self.split_and_sort_directive(return_value_directive_list)
 
     def get_throws_directive(self, api_id):
-        out_relations = self.graph_data.get_all_out_relations(api_id)
-        in_relations = self.graph_data.get_all_in_relations(api_id)
-        all_relations = out_relations.union(in_relations)
-        throws_directive_id_set = set()
-        for start, relation, end in all_relations:
-            if relation == "has exception code directive":
-                throws_directive_id_set.add(end if start == api_id else start)
-        throws_directive_list = [self.graph_data.get_node_info_dict(item)["properties"]["short_description"] for item in throws_directive_id_set]
+        throws_directive_id_list = self.relation_index.get_neighbour_ids(api_id, "has exception code directive")
+        throws_directive_list = [self.graph_data.get_node_info_dict(item)["properties"]["short_description"] for item in throws_directive_id_list]
         return self.split_and_sort_directive(throws_directive_list)
 
-    def get_api_methods(self, api_id, if_class=True):
+    def get_method_list(self, api_id, if_class=True):
         res_list = []
         if if_class:
             res_list.extend(self.api_by_relation_search(api_id, CodeEntityRelationCategory.category_code_to_str_map[
@@ -85,66 +110,213 @@ class KnowledgeService:
             if "properties" in method_node and 'full_description' in method_node["properties"]:
                 t["full_description"] = method_node["properties"]["full_description"]
             method_list = [t]
+        return method_list
+
+    def get_method_base_list(self, api_id, if_class=True):
+        """
+        方法列表加上声明, 按声明排序. get_api_methods和get_constructor共用这一结果, 其余字段按需计算
+        """
+        method_list = self.get_method_list(api_id, if_class)
         for m in method_list:
             m["declare"] = self.get_declare_from_method_name(m["name"])
-            m["parameters"] = self.method_parameter(m["id"])
-            m["return_value"] = self.method_return_value(m["id"])
-            m["doc_info"] = self.get_method_doc_info(m["id"])
-            m["exception_info"] = self.get_exception_info(m["id"])
-            m["label"] = self.get_label_info(m["id"], "method")
-            m["sample_code"] = self.get_one_sample_code(m["id"])
-            m["concepts"] = self.get_concept(m["id"])
-            m["return_value_directive"] = self.get_return_value_directive(m["id"])
-            m["throws_directive"] = self.get_throws_directive(m["id"])
-            fun_dir = self.classify_directive_and_functionality(m["id"])
-            m["functionality"] = fun_dir["functionality_str"]
-            m["directive"] = fun_dir["directive_str"]
-            m["functionality_list"] = fun_dir["functionality_list"]
-            m["directive_list"] = fun_dir["directive_list"]
         method_list.sort(key=lambda x: x['declare'])
-        # 排除构造方法
+        return method_list
+
+    def add_method_fields(self, m, field_list, fun_dir_map=None):
+        """
+        :param m: get_method_base_list中的一个方法
+        :param field_list: 需要计算的字段, 取值见METHOD_FIELD_LIST
+        :param fun_dir_map: api_id -> functionality/directive分类结果, 需要FUN_DIR_FIELD_LIST中的字段时必须提供
+        """
+        for field in field_list:
+            if field == "parameters":
+                m["parameters"] = self.method_parameter(m["id"])
+            elif field == "return_value":
+                m["return_value"] = self.method_return_value(m["id"])
+            elif field == "doc_info":
+                m["doc_info"] = self.get_method_doc_info(m["id"])
+            elif field == "exception_info":
+                m["exception_info"] = self.get_exception_info(m["id"])
+            elif field == "label":
+                m["label"] = self.get_label_info(m["id"], "method")
+            elif field == "sample_code":
+                m["sample_code"] = self.get_one_sample_code(m["id"])
+            elif field == "concepts":
+                m["concepts"] = self.get_concept(m["id"])
+            elif field == "return_value_directive":
+                m["return_value_directive"] = self.get_return_value_directive(m["id"])
+            elif field == "throws_directive":
+                m["throws_directive"] = self.get_throws_directive(m["id"])
+            elif field == "functionality":
+                m["functionality"] = fun_dir_map[m["id"]]["functionality_str"]
+            elif field == "directive":
+                m["directive"] = fun_dir_map[m["id"]]["directive_str"]
+            elif field == "functionality_list":
+                m["functionality_list"] = fun_dir_map[m["id"]]["functionality_list"]
+            elif field == "directive_list":
+                m["directive_list"] = fun_dir_map[m["id"]]["directive_list"]
+        return m
+
+    @staticmethod
+    def is_non_negative_int(value):
+        # json中的true/false在python中是bool, bool是int的子类, 不能当作分页参数
+        return isinstance(value, int) and not isinstance(value, bool) and value >= 0
+
+    @staticmethod
+    def get_method_page_param(request_json):
+        """
+        解析方法字段选择和分页参数 method_fields, offset, limit
+        :return: get_api_methods的参数, 参数不合法时返回错误信息
+        """
+        field_list = request_json.get('method_fields', None)
+        if field_list is not None:
+            if not isinstance(field_list, list):
+                return 'method_fields should be a list'
+            for field in field_list:
+                if field not in KnowledgeService.METHOD_FIELD_LIST:
+                    return 'unknown method field: ' + str(field)
+        offset = request_json.get('offset', 0)
+        limit = request_json.get('limit', None)
+        if not KnowledgeService.is_non_negative_int(offset):
+            return 'offset should be a non-negative integer'
+        if limit is not None and not KnowledgeService.is_non_negative_int(limit):
+            return 'limit should be a non-negative integer'
+        return {"field_list": field_list, "offset": offset, "limit": limit}
+
+    @staticmethod
+    def get_page(item_list, offset=0, limit=None):
+        if limit is None:
+            return item_list[offset:]
+        return item_list[offset:offset + limit]
+
+    @staticmethod
+    def split_constructor(method_base_list):
+        """
+        :param method_base_list: get_method_base_list的结果, 构造方法大写开头, 排在最前面
+        :return: (构造方法列表, 其他方法列表)
+        """
         count = 0
-        for m in method_list:
+        for m in method_base_list:
             if m['declare'][0] < 'a':
                 count += 1
             else:
                 break
-        method_list = method_list[count:]
-        return method_list
+        return method_base_list[:count], method_base_list[count:]
+
+    def get_api_methods(self, api_id, if_class=True, method_list=None, fun_dir_map=None, field_list=None, offset=0,
+                        limit=None):
+        """
+        :param method_list: get_method_base_list的结果, 为None时重新查询
+        :param fun_dir_map: api_id -> functionality/directive分类结果, 为None时对这一页的方法批量分类
+        :param field_list: 需要的字段, 为None时计算METHOD_FIELD_LIST中的全部字段
+        :param offset: 分页, 按声明排序后的起始位置
+        :param limit: 分页, 最多返回的方法数, 为None时返回offset之后的全部
+        """
+        with ServerTiming.section("methods"):
+            if method_list is None:
+                method_list = self.get_method_base_list(api_id, if_class)
+            if field_list is None:
+                field_list = self.METHOD_FIELD_LIST
+            # 排除构造方法, 只计算这一页的方法
+            method_list = self.get_page(self.split_constructor(method_list)[1], offset, limit)
+            need_fun_dir = len(set(field_list).intersection(self.FUN_DIR_FIELD_LIST)) > 0
+            if fun_dir_map is None and need_fun_dir:
+                fun_dir_map = self.classify_directive_and_functionality_batch([m["id"] for m in method_list])
+            if self.method_executor is None or len(method_list) <= 1:
+                for m in method_list:
+                    self.add_method_fields(m, field_list, fun_dir_map)
+            else:
+                # 每个方法只读共享数据, 结果写回各自的dict, method_list的顺序不变
+                collector = ServerTiming.get_collector()
+                list(self.method_executor.map(
+                    lambda m: ServerTiming.run_with(collector, self.add_method_fields, m, field_list, fun_dir_map),
+                    method_list))
+            return method_list
 
     def classify_directive_and_functionality(self, api_id):
-        # directive 返回2， functionality 返回1
-        directive_str = ""
-        functionality_str = ""
-        directive_str = []
-        functionality_list = []
-        comment = self.get_method_doc_info(api_id)["comment"]
+        return self.classify_directive_and_functionality_batch([api_id])[api_id]
+
+    def get_function_classifier(self):
+        with self.__classifier_lock:
+            if self.functionClassifier is None:
+                self.functionClassifier = FastTextClassifier()
+        return self.functionClassifier
+
+    def classify_directive_and_functionality_batch(self, api_id_list):
+        """
+        对多个api的注释句子一次性分类, 优先使用文档中离线分类的结果(script/classify_doc_sentence.py),
+        其余的句子只调用一次fastText模型
+        :param api_id_list: api id列表
+        :return: api_id -> classify_directive_and_functionality的结果
+        """
+        with ServerTiming.section("classification"):
+            return self.__classify_directive_and_functionality_batch(api_id_list)
+
+    def __classify_directive_and_functionality_batch(self, api_id_list):
+        result = dict()
+        api_2_sentence_list = dict()
+        all_sentence_list = []
+        for api_id in api_id_list:
+            if api_id in api_2_sentence_list or api_id in result:
+                continue
+            stored_result = self.get_stored_directive_and_functionality(api_id)
+            if stored_result is not None:
+                result[api_id] = stored_result
+                continue
+            sentence_list = self.split_comment_sentence(self.get_method_doc_info(api_id)["comment"])
+            api_2_sentence_list[api_id] = sentence_list
+            all_sentence_list.extend(sentence_list)
+        if len(all_sentence_list) == 0:
+            return result
+        with metrics.stage("classification"):
+            all_label_list = self.get_function_classifier().predict_list(all_sentence_list)
+        index = 0
+        for api_id, sentence_list in api_2_sentence_list.items():
+            label_list = all_label_list[index:index + len(sentence_list)]
+            index += len(sentence_list)
+            result[api_id] = self.build_directive_and_functionality(sentence_list, label_list)
+        return result
+
+    def get_stored_directive_and_functionality(self, api_id):
+        doc: MultiFieldDocument = self.doc_collection.get_by_id(api_id)
+        if doc is None:
+            return None
+        functionality_list = doc.get_doc_text_by_field('functionality_list')
+        directive_list = doc.get_doc_text_by_field('directive_list')
+        if not isinstance(functionality_list, list) or not isinstance(directive_list, list):
+            return None
+        result = dict()
+        result["directive_str"] = "".join(directive_list)
+        result["functionality_str"] = "".join(functionality_list)
+        result["directive_list"] = list(directive_list)
+        result["functionality_list"] = list(functionality_list)
+        return result
+
+    @staticmethod
+    def split_comment_sentence(comment):
         if comment.startswith("Generated by DeepLearning:"):
             comment = comment[comment.find(":")+1:]
-        if comment is not "" or comment is not None:
-            # 分句
-            sentence_list = comment.split(". ")
-            for i in range(len(sentence_list)):
-                if sentence_list[i].find(".") == -1:
-                    sentence_list[i] = sentence_list[i] + ". "
-            # 句子分类
-            directive_list = list()
-            functionality_list = list()
-            for i in sentence_list:
-                if self.functionClassifier.predict(i) == 1:
-                    functionality_list.append(i)
-                else:
-                    directive_list.append(i)
-            # 构建functionality和directive句子
-            functionality_str = ""
-            directive_str = ""
-            for i in directive_list:
-                directive_str += i
-            for i in functionality_list:
-                functionality_str += i
+        # 分句
+        sentence_list = comment.split(". ")
+        for i in range(len(sentence_list)):
+            if sentence_list[i].find(".") == -1:
+                sentence_list[i] = sentence_list[i] + ". "
+        return sentence_list
+
+    @staticmethod
+    def build_directive_and_functionality(sentence_list, label_list):
+        # directive 返回2， functionality 返回1
+        directive_list = list()
+        functionality_list = list()
+        for sentence, label in zip(sentence_list, label_list):
+            if label == 1:
+                functionality_list.append(sentence)
+            else:
+                directive_list.append(sentence)
+        # 构建functionality和directive句子
         result = dict()
-        result["directive_str"] = directive_str
-        result["functionality_str"] = functionality_str
+        result["directive_str"] = "".join(directive_list)
+        result["functionality_str"] = "".join(functionality_list)
         result["directive_list"] = directive_list
         result["functionality_list"] = functionality_list
         return result
@@ -160,8 +332,12 @@ class KnowledgeService:
         return full_description
 
     def get_method_doc_info(self, method_id):
-        res = dict()
         doc: MultiFieldDocument = self.doc_collection.get_by_id(method_id)
+        return self.get_doc_info_from_doc(doc)
+
+    @staticmethod
+    def get_doc_info_from_doc(doc: MultiFieldDocument):
+        res = dict()
         full_description = doc.get_doc_text_by_field('full_description')
         dp_comment = doc.get_doc_text_by_field('dp_comment')
         # 正则处理去掉多余字符
@@ -179,23 +355,26 @@ class KnowledgeService:
         res_list = []
         res_list.extend(self.api_relation_search(method_id, CodeEntityRelationCategory.category_code_to_str_map[
             CodeEntityRelationCategory.RELATION_CATEGORY_HAS_PARAMETER]))
-        for r in res_list:
-            if r[1]['properties']['short_description'] == "":
-                r[1]['properties']['short_description'] = self.get_desc_from_api_id(r[1]["id"])
-            r[1]['properties']['description'] = r[1]['properties']['short_description']
-            r[1]['labels'] = list(r[1]['labels'])
-        return res_list
+        parameter_list = []
+        for relation_type, node in res_list:
+            # 在副本上补充描述, 不修改图中共享的节点
+            node = ReadOnlyGraphView.thaw(node)
+            if node['properties']['short_description'] == "":
+                node['properties']['short_description'] = self.get_desc_from_api_id(node["id"])
+            node['properties']['description'] = node['properties']['short_description']
+            parameter_list.append((relation_type, node))
+        return parameter_list
 
     def method_return_value(self, method_id):
         res_list = []
         res_list.extend(self.api_relation_search(method_id, CodeEntityRelationCategory.category_code_to_str_map[
             CodeEntityRelationCategory.RELATION_CATEGORY_HAS_RETURN_VALUE]))
         if len(res_list) > 0:
-            r = res_list[0]
-            if r[1]['properties']['description'] == "":
-                r[1]['properties']['description'] = self.get_desc_from_api_id(r[1]["id"])
-            r[1]["labels"] = list(r[1]["labels"])
-            return res_list[0]
+            relation_type, node = res_list[0]
+            node = ReadOnlyGraphView.thaw(node)
+            if node['properties']['description'] == "":
+                node['properties']['description'] = self.get_desc_from_api_id(node["id"])
+            return relation_type, node
         return dict()
 
     def get_api_father_class(self, api_id):
@@ -212,18 +391,18 @@ class KnowledgeService:
             CodeEntityRelationCategory.RELATION_CATEGORY_IMPLEMENTS]))
         return self.parse_res_list(res_list)
 
-    def get_api_terminologies(self, api_name):
+    def get_api_terminologies(self, api_name, api_id=None):
         """
         API的术语
+        :param api_id: 已经解析出的api_name的id, 为None时按名字查找
         :return []:
         """
-        api_id = self.get_api_id_by_name(api_name)
+        if api_id is None:
+            api_id = self.get_api_id_by_name(api_name)
         if api_id == -1:
             return []
-        candidates = self.graph_data.get_relations(start_id=api_id, relation_type="has terminology",
-                                                   end_id=None)
         node_list = []
-        for (s, r, e) in candidates:
+        for e in self.relation_index.get_out_ids(api_id, "has terminology"):
             end_node = self.graph_data.get_node_info_dict(e)
             node_list.append((end_node['properties']['terminology_name'], end_node['properties']["score"]))
         sorted(node_list, key=lambda x: x[1], reverse=True)
@@ -273,35 +452,60 @@ class KnowledgeService:
 
     def api_relation_search(self, api_id, relation_type):
         node_list = []
-        candidates = self.graph_data.get_relations(start_id=api_id, relation_type=relation_type,
-                                                   end_id=None)
-        for (s, r, e) in candidates:
-            end_node = self.graph_data.get_node_info_dict(e)
-            node_list.append((r, end_node))
+        with metrics.stage("graph_traversal"):
+            for e in self.relation_index.get_out_ids(api_id, relation_type):
+                end_node = self.graph_data.get_node_info_dict(e)
+                node_list.append((relation_type, end_node))
         return node_list
 
     def api_by_relation_search(self, api_id, relation_type):
         node_list = []
-        candidates = self.graph_data.get_relations(start_id=None, relation_type=relation_type,
-                                                   end_id=api_id)
-        for (s, r, e) in candidates:
-            start_node = self.graph_data.get_node_info_dict(s)
-            node_list.append((r, start_node))
+        with metrics.stage("graph_traversal"):
+            for s in self.relation_index.get_in_ids(api_id, relation_type):
+                start_node = self.graph_data.get_node_info_dict(s)
+                node_list.append((relation_type, start_node))
         return node_list
 
     def get_api_id_by_name(self, name):
-        node = self.graph_data.find_one_node_by_property(property_name=GraphData.DEFAULT_KEY_PROPERTY_QUALIFIED_NAME,
-                                                         property_value=name)
-        if node is not None:
-            api_id = node["id"]
-        else:
-            api_id = -1
-        return api_id
+        return self.name_index.get_id(name)
+
+    def get_cached_response(self, endpoint, qualified_name, compute):
+        """
+        :param endpoint: 接口名
+        :param qualified_name: 查询的全限定名
+        :param compute: 无参函数, 缓存未命中时调用
+        """
+        if self.response_cache is None:
+            return compute()
+        key = (self.graph_version, qualified_name, endpoint)
+        return self.response_cache.get_or_compute(key, compute)
+
+    def peek_cached_response(self, endpoint, qualified_name, local_only=False):
+        """
+        只查缓存, 不计算
+        :param local_only: 见ResponseCache.peek
+        :return: 缓存的结果, 未命中时返回None
+        """
+        if self.response_cache is None:
+            return None
+        return self.response_cache.peek((self.graph_version, qualified_name, endpoint), local_only=local_only)
+
+    def get_api_ids_by_name(self, name):
+        # 考虑重载, 可以是简单名, 全限定名或不带参数的方法签名
+        return self.name_index.get_ids(name)
 
-    def get_knowledge(self, name):
+    def resolve_api_id(self, name):
+        # 请求中的名字, 有歧义的简单名返回-1, 见NameIndex.resolve_id
+        return self.name_index.resolve_id(name)
+
+    def get_api_id_by_name_prefix(self, prefix):
+        return self.prefix_index.find_one_id(prefix)
+
+    def get_knowledge(self, name, api_id=None):
         knowledge = dict()
         knowledge["message"] = ""
-        api_id = self.get_api_id_by_name(name)
+        if api_id is None:
+            api_id = self.get_api_id_by_name(name)
         if api_id == -1:
             knowledge["message"] = "can't find api by name"
             return knowledge
@@ -341,32 +545,74 @@ class KnowledgeService:
         res_list = []
         res_list.extend(self.api_relation_search(api_id, CodeEntityRelationCategory.category_code_to_str_map[
             CodeEntityRelationCategory.RELATION_CATEGORY_HAS_FIELD]))
-        for r in res_list:
-            r[1]['labels'] = list(r[1]['labels'])
-
-        return res_list
+        return [(relation_type, ReadOnlyGraphView.thaw(node)) for relation_type, node in res_list]
 
     def get_concept(self, api_id):
-        out_relations = self.graph_data.get_all_out_relations(api_id)
         concepts_list = []
-        for item in out_relations:
-            if item[1] == "has concept":
-                concepts_list.append(self.graph_data.get_node_info_dict(item[2])["properties"]["qualified_name"])
+        for end_id in self.relation_index.get_out_ids(api_id, "has concept"):
+            concepts_list.append(self.graph_data.get_node_info_dict(end_id)["properties"]["qualified_name"])
         return concepts_list
 
-    def api_base_structure(self, api_name):
+    @staticmethod
+    def get_page_endpoint(endpoint, field_list=None, offset=0, limit=None):
+        """
+        带字段选择和分页参数的缓存key, 默认参数时就是endpoint本身
+        """
+        if field_list is None and offset == 0 and limit is None:
+            return endpoint
+        field_str = "all" if field_list is None else ",".join(sorted(field_list))
+        return "{}?fields={}&offset={}&limit={}".format(endpoint, field_str, offset, limit)
+
+    def api_base_structure(self, api_name, field_list=None, offset=0, limit=None):
+        return self.get_cached_response(self.get_page_endpoint("api_structure", field_list, offset, limit), api_name,
+                                        lambda: self.build_api_base_structure(api_name, field_list=field_list,
+                                                                              offset=offset, limit=limit))
+
+    def api_method_structure(self, api_name, field_list=None, offset=0, limit=None):
+        return self.get_cached_response(self.get_page_endpoint("method_structure", field_list, offset, limit), api_name,
+                                        lambda: self.get_api_methods(self.get_api_id_by_name(api_name), False,
+                                                                     field_list=field_list, offset=offset,
+                                                                     limit=limit))
+
+    def build_api_base_structure(self, api_name, method_list=None, field_list=None, offset=0, limit=None,
+                                 api_id=None):
+        """
+        :param method_list: get_method_base_list的结果, 可以和get_constructor共用, 为None时重新查询
+        :param api_id: 已经解析出的api_name的id, 为None时按名字查找
+        :param field_list: 方法需要的字段, 见get_api_methods
+        :param offset: 方法分页的起始位置
+        :param limit: 方法分页的大小
+        """
         # 继承树
-        api_id = self.get_api_id_by_name(api_name)
+        if api_id is None:
+            api_id = self.get_api_id_by_name(api_name)
         print("searching class name: " + api_name)
         print("api id is " + str(api_id))
         res = dict()
-        res["methods"] = self.get_api_methods(api_id)
-        res["extends"] = self.api_father_class(api_id)
-        res["implements"] = self.api_implement_class(api_id)
-        res["fields"] = self.api_field(api_id)
-        res["label"] = self.get_label_info(api_id, "class")
-        res["concepts"] = self.get_concept(api_id)
-        fun_dir = self.classify_directive_and_functionality(api_id)
+        if method_list is None:
+            with ServerTiming.section("method_list"):
+                method_list = self.get_method_base_list(api_id)
+        not_constructor_list = self.split_constructor(method_list)[1]
+        page_method_list = self.get_page(not_constructor_list, offset, limit)
+        res["method_count"] = len(not_constructor_list)
+        # 类和这一页方法的注释句子一起分类
+        fun_dir_api_id_list = [api_id]
+        if field_list is None or len(set(field_list).intersection(self.FUN_DIR_FIELD_LIST)) > 0:
+            fun_dir_api_id_list.extend([m["id"] for m in page_method_list])
+        fun_dir_map = self.classify_directive_and_functionality_batch(fun_dir_api_id_list)
+        res["methods"] = self.get_api_methods(api_id, method_list=method_list, fun_dir_map=fun_dir_map,
+                                              field_list=field_list, offset=offset, limit=limit)
+        with ServerTiming.section("extends"):
+            res["extends"] = self.api_father_class(api_id)
+        with ServerTiming.section("implements"):
+            res["implements"] = self.api_implement_class(api_id)
+        with ServerTiming.section("fields"):
+            res["fields"] = self.api_field(api_id)
+        with ServerTiming.section("label"):
+            res["label"] = self.get_label_info(api_id, "class")
+        with ServerTiming.section("concepts"):
+            res["concepts"] = self.get_concept(api_id)
+        fun_dir = fun_dir_map[api_id]
         res["functionality"] = fun_dir["functionality_str"]
         res["directive"] = fun_dir["directive_str"]
         res["functionality_list"] = fun_dir["functionality_list"]
@@ -374,22 +620,19 @@ class KnowledgeService:
 
         return res
 
-    def get_api_methods_id(self, api_name):
-        api_id = self.get_api_id_by_name(api_name)
-        methods_list = []
-        for i in self.graph_data.get_all_in_relations(api_id):
-            if "belong to" == i[1]:
-                methods_list.append(i[0])
-        return methods_list
+    def get_api_methods_id(self, api_name, api_id=None):
+        if api_id is None:
+            api_id = self.get_api_id_by_name(api_name)
+        return list(self.relation_index.get_in_ids(api_id, "belong to"))
 
     # 返回类下面5个最关键方法
-    def get_key_methods(self, api_name):
-        method_id_list = self.get_api_methods_id(api_name)
+    def get_key_methods(self, api_name, api_id=None):
+        method_id_list = self.get_api_methods_id(api_name, api_id)
         res_list = list()
         unsorted_list = list()
         for i in method_id_list:
             node: NodeInfo = self.graph_data.find_nodes_by_ids(i)[0]
-            unsorted_list.append((node['properties']['qualified_name'], node['properties']['pr_value']))
+            unsorted_list.append((node['properties']['qualified_name'], node['properties']['pr_value'], i))
         unsorted_list.sort(key=lambda x: x[1], reverse=True)
         count = 0
         for i in unsorted_list:
@@ -397,35 +640,28 @@ class KnowledgeService:
                 break;
             temp = dict()
             temp['qualified_name'] = i[0]
-            temp['sample_code'] = self.get_one_sample_code(api_id=self.get_api_id_by_name(i[0]))
+            temp['sample_code'] = self.get_one_sample_code(api_id=i[2])
             count += 1
             res_list.append(temp)
         return res_list
 
 
     # 返回该类的构造方法信息
-    def get_constructor(self, api_name):
-        api_id: int = self.get_api_id_by_name(name=api_name)
+    def get_constructor(self, api_name, method_list=None, api_id=None):
+        """
+        :param method_list: get_method_base_list的结果, 为None时重新查询
+        :param api_id: 已经解析出的api_name的id, 为None时按名字查找
+        """
+        if api_id is None:
+            api_id = self.get_api_id_by_name(name=api_name)
         res = dict()
-        res_list = []
-        res_list.extend(self.api_by_relation_search(api_id, CodeEntityRelationCategory.category_code_to_str_map[
-            CodeEntityRelationCategory.RELATION_CATEGORY_BELONG_TO]))
-        method_list = self.parse_res_list(res_list)
-        for m in method_list:
-            m["declare"] = self.get_declare_from_method_name(m["name"])
-            m["parameters"] = self.method_parameter(m["id"])
-            m["return_value"] = self.method_return_value(m["id"])
-            m["doc_info"] = self.get_method_doc_info(m["id"])
-        method_list.sort(key=lambda x: x['declare'])
+        if method_list is None:
+            method_list = self.get_method_base_list(api_id)
         # 选取构造方法
-        count = 0
-        for m in method_list:
-            if m['declare'][0] < 'a':
-                count += 1
-            else:
-                break;
-        constructor_list = method_list[:count]
-        res['number_of_constructor'] = count
+        constructor_list = self.split_constructor(method_list)[0]
+        for m in constructor_list:
+            self.add_method_fields(m, self.METHOD_BASE_FIELD_LIST)
+        res['number_of_constructor'] = len(constructor_list)
         res['constructor_detail'] = constructor_list
         return res
 
@@ -458,23 +694,25 @@ class KnowledgeService:
 
     # 返回方法对应的单个sample_code
     def get_one_sample_code(self, api_id):
-        doc: MultiFieldDocument = self.doc_collection.get_by_id(api_id)
-        if doc is None:
-            return "No sample code available."
-        sample_code = doc.get_doc_text_by_field('sample_code')
-        if len(sample_code) == 0 or sample_code is None:
-            return "No sample code available."
-        else:
-            return sample_code[0][2:]
+        with metrics.stage("sample_code"), ServerTiming.section("sample_code"):
+            doc: MultiFieldDocument = self.doc_collection.get_by_id(api_id)
+            if doc is None:
+                return "No sample code available."
+            sample_code = doc.get_doc_text_by_field('sample_code')
+            if len(sample_code) == 0 or sample_code is None:
+                return "No sample code available."
+            else:
+                return sample_code[0][2:]
 
     # 返回相关api
-    def get_related_api(self, qualified_name):
+    def get_related_api(self, qualified_name, api_id=None):
         result = dict()
-        api_id = self.get_api_id_by_name(qualified_name)
+        if api_id is None:
+            api_id = self.get_api_id_by_name(qualified_name)
         node: NodeInfo = self.graph_data.find_nodes_by_ids(api_id)[0]
         related_api = list()
         related_api_simplified = list()
-        related_api = node['properties']['simrank']
+        related_api = list(node['properties']['simrank'])
         for i in related_api:
             related_api_simplified.append(i[i.rfind('.')+1:])
         result['related_api'] = related_api
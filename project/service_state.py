@@ -0,0 +1,111 @@
+import threading
+from contextlib import contextmanager
+
+
+class ServiceState:
+    """
+    一个图版本和文档版本上的全部service. 热切换时整体替换, 一个请求从头到尾使用同一个ServiceState
+    """
+
+    def __init__(self, graph_version, doc_version, graph_data, knowledge_service, doc_service, class_doc_service,
+                 artifact_name_list, cache_version_list, json_service=None, simple_qualified_name_map=None):
+        """
+        :param artifact_name_list: 这个版本在ArtifactRegistry中的产物名, 旧版本下线后释放
+        :param cache_version_list: 响应缓存key中使用的版本, 旧版本下线后失效
+        :param json_service: 这个版本的样例代码和参数/返回值数据
+        :param simple_qualified_name_map: 这个版本的简单类名 -> 全限定名
+        """
+        self.graph_version = graph_version
+        self.doc_version = doc_version
+        self.graph_data = graph_data
+        self.knowledge_service = knowledge_service
+        self.doc_service = doc_service
+        self.class_doc_service = class_doc_service
+        self.artifact_name_list = artifact_name_list
+        self.cache_version_list = cache_version_list
+        self.json_service = json_service
+        self.simple_qualified_name_map = simple_qualified_name_map if simple_qualified_name_map is not None else dict()
+        self.in_flight_count = 0
+
+
+class ServiceStateHolder:
+    """
+    持有当前的ServiceState. 请求在use()中处理, 期间绑定开始时的状态并计入in_flight_count;
+    swap原子地替换当前状态, 之后的请求使用新状态, 再等待旧状态上的请求全部结束
+    """
+
+    def __init__(self, state: ServiceState):
+        self.current = state
+        self.__local = threading.local()
+        self.__condition = threading.Condition()
+
+    @contextmanager
+    def use(self):
+        state = self.acquire()
+        try:
+            with self.bind(state):
+                yield state
+        finally:
+            self.release(state)
+
+    def acquire(self, state=None):
+        """
+        state(默认为当前状态)的in_flight_count加一, 与release成对调用
+        :return: state
+        """
+        with self.__condition:
+            if state is None:
+                state = self.current
+            state.in_flight_count += 1
+        return state
+
+    def release(self, state):
+        with self.__condition:
+            state.in_flight_count -= 1
+            self.__condition.notify_all()
+
+    def keep_in_use(self, result_iter):
+        """
+        在use()中对流式的结果调用. 结果在use()结束后才被取出, 取完或生成器关闭前一直计入当前状态的请求,
+        热切换不会在这之前释放它. 从未开始迭代就被丢弃的生成器不会减少计数, 由swap的drain_timeout兜底
+        """
+        return self.__iter_and_release(self.acquire(self.get()), result_iter)
+
+    def __iter_and_release(self, state, result_iter):
+        try:
+            for item in result_iter:
+                yield item
+        finally:
+            self.release(state)
+
+    @contextmanager
+    def bind(self, state):
+        """
+        当前线程中get()返回state, 不计入in_flight_count, 如切换前用新状态预热
+        """
+        previous_state = getattr(self.__local, "state", None)
+        self.__local.state = state
+        try:
+            yield state
+        finally:
+            self.__local.state = previous_state
+
+    def get(self) -> ServiceState:
+        """
+        :return: 当前线程绑定的状态, 没有绑定时(如后台线程)返回当前状态
+        """
+        state = getattr(self.__local, "state", None)
+        if state is None:
+            return self.current
+        return state
+
+    def swap(self, new_state, drain_timeout=None):
+        """
+        :param drain_timeout: 等待旧状态上请求结束的最长秒数, None表示一直等待
+        :return: (旧状态, 旧状态上的请求是否已全部结束)
+        """
+        with self.__condition:
+            old_state = self.current
+            self.current = new_state
+            drained = self.__condition.wait_for(lambda: old_state.in_flight_count == 0, drain_timeout)
+        return old_state, drained
@@ -0,0 +1,116 @@
+import json
+import os
+import pickle
+import threading
+
+
+class ColumnDocument:
+    """
+    ColumnDocCollection中的一个文档, 只保存id, 字段从所在集合的列中取
+    """
+
+    def __init__(self, collection, doc_id):
+        self.collection = collection
+        self.id = doc_id
+
+    def get_doc_text_by_field(self, field_name):
+        return self.collection.get_field_value(self.id, field_name)
+
+
+class ColumnDocCollection:
+    """
+    按字段分列存储的文档集合, 由script/build_doc_columns.py从MultiFieldDocumentCollection构建.
+    目录中ids.json保存全部文档id和字段名, 每个字段一个列文件<field>.column(文档id -> 字段内容).
+    只提供服务用到的只读接口, 某个字段第一次被访问时才加载对应的列, 不访问的字段不占内存.
+    """
+    ID_FILE_NAME = "ids.json"
+    COLUMN_SUFFIX = ".column"
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.__open()
+
+    def __open(self):
+        with open(os.path.join(self.path, self.ID_FILE_NAME), "r") as f:
+            id_info = json.load(f)
+        self.id_list = id_info["ids"]
+        self.id_set = set(self.id_list)
+        self.field_list = id_info["fields"]
+        self.__field_2_column = dict()
+        self.__lock = threading.Lock()
+
+    def get_column(self, field_name):
+        """
+        :return: 文档id -> 字段内容, 不存在的字段返回空dict
+        """
+        column = self.__field_2_column.get(field_name, None)
+        if column is not None:
+            return column
+        with self.__lock:
+            if field_name not in self.__field_2_column:
+                column = dict()
+                if field_name in self.field_list:
+                    with open(self.get_column_path(self.path, field_name), "rb") as f:
+                        column = pickle.load(f)
+                self.__field_2_column[field_name] = column
+            return self.__field_2_column[field_name]
+
+    def get_field_value(self, doc_id, field_name):
+        """
+        :return: 字段内容, 文档没有这个字段时和sekg的MultiFieldDocument一样返回""
+        """
+        return self.get_column(field_name).get(doc_id, "")
+
+    def get_loaded_fields(self):
+        return list(self.__field_2_column.keys())
+
+    def get_by_id(self, doc_id):
+        if doc_id not in self.id_set:
+            return None
+        return ColumnDocument(self, doc_id)
+
+    def get_document_list(self):
+        return [ColumnDocument(self, doc_id) for doc_id in self.id_list]
+
+    def get_num(self):
+        return len(self.id_list)
+
+    @staticmethod
+    def get_column_path(path, field_name):
+        return os.path.join(str(path), field_name + ColumnDocCollection.COLUMN_SUFFIX)
+
+    @staticmethod
+    def write(document_list, field_list, path):
+        """
+        :param document_list: MultiFieldDocumentCollection.get_document_list()的结果
+        :param field_list: 需要保存的字段, 文档中该字段为空时不保存, 读取时返回""
+        :param path: 输出目录
+        """
+        os.makedirs(str(path), exist_ok=True)
+        id_list = [doc.id for doc in document_list]
+        for field_name in field_list:
+            column = dict()
+            for doc in document_list:
+                value = doc.get_doc_text_by_field(field_name)
+                if value is not None and value != "":
+                    column[doc.id] = value
+            ColumnDocCollection.__replace_file(ColumnDocCollection.get_column_path(path, field_name),
+                                               pickle.dumps(column, protocol=pickle.HIGHEST_PROTOCOL))
+        # ids.json最后写, 服务只在它存在时使用列存储
+        ColumnDocCollection.__replace_file(os.path.join(str(path), ColumnDocCollection.ID_FILE_NAME),
+                                           json.dumps({"ids": id_list, "fields": list(field_list)}).encode("utf-8"))
+
+    @staticmethod
+    def __replace_file(path, data):
+        temp_path = "{}.{}.tmp".format(path, os.getpid())
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+    def __getstate__(self):
+        # 快照中只保存路径, 列仍然按需加载
+        return {"path": self.path}
+
+    def __setstate__(self, state):
+        self.path = state["path"]
+        self.__open()
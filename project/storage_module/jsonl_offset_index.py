@@ -0,0 +1,92 @@
+import json
+import mmap
+import os
+from array import array
+
+
+class JsonLinesOffsetIndex:
+    """
+    每行一个json对象的文件(如mid_2_method_info_without_comment.json)的行偏移索引.
+    索引文件<path>.idx 保存每行起始的字节偏移, 末尾再存一个文件长度, 只需构建一次.
+    运行时对数据文件和索引文件做内存映射, 按下标取值时才解析那一行, 启动时不做解析,
+    多个gunicorn worker共享同一份页缓存.
+    """
+    INDEX_SUFFIX = ".idx"
+    OFFSET_TYPE = "Q"
+
+    def __init__(self, path, field_name=None):
+        """
+        :param path: jsonl文件路径
+        :param field_name: 不为None时, 取值返回每行json对象的该字段
+        """
+        self.path = str(path)
+        self.field_name = field_name
+        self.__open()
+
+    def __open(self):
+        index_path = self.get_index_path(self.path)
+        if not os.path.exists(index_path) or os.path.getmtime(index_path) < os.path.getmtime(self.path):
+            self.build(self.path)
+        self.data = self.__map_file(self.path)
+        self.offsets = memoryview(self.__map_file(index_path)).cast(self.OFFSET_TYPE)
+
+    @staticmethod
+    def __map_file(path):
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return b""
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @staticmethod
+    def get_index_path(path):
+        return str(path) + JsonLinesOffsetIndex.INDEX_SUFFIX
+
+    @staticmethod
+    def build(path):
+        """
+        扫描一遍jsonl文件, 写出偏移索引文件
+        :return: 索引文件路径
+        """
+        offsets = array(JsonLinesOffsetIndex.OFFSET_TYPE)
+        offset = 0
+        with open(str(path), "rb") as f:
+            for line in f:
+                offsets.append(offset)
+                offset += len(line)
+        offsets.append(offset)
+        index_path = JsonLinesOffsetIndex.get_index_path(path)
+        # 先写临时文件再替换, 多个worker同时构建时不会读到写了一半的索引
+        temp_index_path = "{}.{}.tmp".format(index_path, os.getpid())
+        with open(temp_index_path, "wb") as f:
+            offsets.tofile(f)
+        os.replace(temp_index_path, index_path)
+        return index_path
+
+    def get_line(self, index):
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError("line index out of range: {}".format(index))
+        return self.data[self.offsets[index]:self.offsets[index + 1]]
+
+    def __getitem__(self, index):
+        value = json.loads(self.get_line(index).decode("utf-8"))
+        if self.field_name is None:
+            return value
+        return value[self.field_name]
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def __getstate__(self):
+        # mmap不能序列化, 只保存路径, 反序列化时重新映射
+        return {"path": self.path, "field_name": self.field_name}
+
+    def __setstate__(self, state):
+        self.path = state["path"]
+        self.field_name = state["field_name"]
+        self.__open()
@@ -0,0 +1,208 @@
+import fcntl
+import hashlib
+import mmap
+import os
+import pickle
+import struct
+import threading
+from contextlib import contextmanager
+
+
+class MmapKVStore:
+    """
+    本机多个进程共享的键值存储, 数据在一个内存映射文件中, 不需要外部服务.
+    文件格式: 头部 | 槽位表 | 环形数据区.
+    每条记录(key和value的pickle)追加写入环形数据区, 写满后从头覆盖最早的记录, 因此总大小不超过capacity.
+    槽位表是开放寻址的哈希表, 保存key的哈希和记录的逻辑偏移, 偏移早于 写入位置-capacity 的记录已被覆盖, 视为不存在.
+    进程之间用fcntl.flock加锁(读共享, 写独占), 进程内的线程之间再加一把线程锁.
+    头部保存namespace(如图的版本), 打开时namespace不同则清空, 旧版本的结果不会被读到. 超过64字节的namespace保存其哈希.
+    """
+    MAGIC = b"DGKVMM01"
+    NAMESPACE_SIZE = 64
+    HEADER_FORMAT = "<8sIIQQ{}s".format(NAMESPACE_SIZE)
+    HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+    SLOT_FORMAT = "<QQI4x"
+    SLOT_SIZE = struct.calcsize(SLOT_FORMAT)
+    RECORD_HEADER_FORMAT = "<II"
+    RECORD_HEADER_SIZE = struct.calcsize(RECORD_HEADER_FORMAT)
+    # 查找和插入时最多探测的槽位数
+    MAX_PROBE = 8
+    KEY_PROTOCOL = 4
+
+    def __init__(self, path, capacity=256 * 1024 * 1024, slot_count=65536, namespace=""):
+        """
+        :param path: 存储文件路径, 不存在时创建
+        :param capacity: 环形数据区的字节数
+        :param slot_count: 槽位数, 应大于能同时存下的记录数
+        :param namespace: 如图的版本, 与文件中的不同时清空
+        """
+        self.path = str(path)
+        self.capacity = capacity
+        self.slot_count = slot_count
+        self.namespace = namespace
+        self.header_namespace = self.get_header_namespace(namespace)
+        self.data_start = self.HEADER_SIZE + self.slot_count * self.SLOT_SIZE
+        self.file_size = self.data_start + self.capacity
+        self.__thread_lock = threading.Lock()
+        self.__pid = None
+        self.__fd = None
+        self.__data = None
+        self.__open()
+
+    @staticmethod
+    def get_header_namespace(namespace):
+        """
+        :return: 写入头部的namespace, 超过NAMESPACE_SIZE字节时用64位十六进制的哈希代替, 否则会被截断而永远不相等
+        """
+        namespace_bytes = namespace.encode("utf-8")
+        if len(namespace_bytes) <= MmapKVStore.NAMESPACE_SIZE:
+            return namespace
+        return hashlib.blake2b(namespace_bytes, digest_size=MmapKVStore.NAMESPACE_SIZE // 2).hexdigest()
+
+    def __close_inherited(self):
+        # fork之后关闭从父进程继承的映射和文件描述符, 父进程中的不受影响
+        if self.__data is not None:
+            self.__data.close()
+            self.__data = None
+        if self.__fd is not None:
+            os.close(self.__fd)
+            self.__fd = None
+
+    def __open(self):
+        # fork之后子进程要重新打开文件, 否则flock在父子进程之间不互斥
+        self.__close_inherited()
+        self.__fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        self.__pid = os.getpid()
+        fcntl.flock(self.__fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self.__fd).st_size != self.file_size:
+                os.ftruncate(self.__fd, self.file_size)
+            self.__data = mmap.mmap(self.__fd, self.file_size)
+            magic, _, slot_count, capacity, _, namespace = self.__read_header()
+            if magic != self.MAGIC or slot_count != self.slot_count or capacity != self.capacity or \
+                    namespace != self.header_namespace:
+                self.__reset()
+        finally:
+            fcntl.flock(self.__fd, fcntl.LOCK_UN)
+
+    def __ensure_open(self):
+        if self.__pid != os.getpid():
+            self.__open()
+
+    @contextmanager
+    def __locked(self, lock_type):
+        with self.__thread_lock:
+            self.__ensure_open()
+            fcntl.flock(self.__fd, lock_type)
+            try:
+                yield
+            finally:
+                fcntl.flock(self.__fd, fcntl.LOCK_UN)
+
+    def __read_header(self):
+        magic, version, slot_count, capacity, write_pos, namespace = struct.unpack_from(self.HEADER_FORMAT,
+                                                                                        self.__data, 0)
+        return magic, version, slot_count, capacity, write_pos, namespace.rstrip(b"\0").decode("utf-8")
+
+    def __write_header(self, write_pos):
+        struct.pack_into(self.HEADER_FORMAT, self.__data, 0, self.MAGIC, 1, self.slot_count, self.capacity, write_pos,
+                         self.header_namespace.encode("utf-8"))
+
+    def __reset(self):
+        self.__data[self.HEADER_SIZE:self.data_start] = bytes(self.slot_count * self.SLOT_SIZE)
+        self.__write_header(0)
+
+    @staticmethod
+    def hash_key(key_bytes):
+        # 0表示空槽位
+        return int.from_bytes(hashlib.blake2b(key_bytes, digest_size=8).digest(), "little") | 1
+
+    def __read_slot(self, slot):
+        return struct.unpack_from(self.SLOT_FORMAT, self.__data, self.HEADER_SIZE + slot * self.SLOT_SIZE)
+
+    def __write_slot(self, slot, key_hash, offset, length):
+        struct.pack_into(self.SLOT_FORMAT, self.__data, self.HEADER_SIZE + slot * self.SLOT_SIZE, key_hash, offset,
+                         length)
+
+    def __read_record(self, offset):
+        position = self.data_start + offset % self.capacity
+        key_length, value_length = struct.unpack_from(self.RECORD_HEADER_FORMAT, self.__data, position)
+        key_start = position + self.RECORD_HEADER_SIZE
+        return self.__data[key_start:key_start + key_length], \
+            self.__data[key_start + key_length:key_start + key_length + value_length]
+
+    def get(self, key, default=None):
+        key_bytes = pickle.dumps(key, protocol=self.KEY_PROTOCOL)
+        key_hash = self.hash_key(key_bytes)
+        with self.__locked(fcntl.LOCK_SH):
+            write_pos = self.__read_header()[4]
+            for i in range(self.MAX_PROBE):
+                slot_hash, offset, length = self.__read_slot((key_hash + i) % self.slot_count)
+                if slot_hash == 0:
+                    break
+                if slot_hash != key_hash or offset < write_pos - self.capacity:
+                    continue
+                record_key_bytes, value_bytes = self.__read_record(offset)
+                if record_key_bytes == key_bytes:
+                    return pickle.loads(value_bytes)
+        return default
+
+    def put(self, key, value):
+        """
+        :return: 是否写入, 单条记录超过capacity的1/4时不写入
+        """
+        key_bytes = pickle.dumps(key, protocol=self.KEY_PROTOCOL)
+        value_bytes = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        record = struct.pack(self.RECORD_HEADER_FORMAT, len(key_bytes), len(value_bytes)) + key_bytes + value_bytes
+        if len(record) > self.capacity // 4:
+            return False
+        key_hash = self.hash_key(key_bytes)
+        with self.__locked(fcntl.LOCK_EX):
+            write_pos = self.__read_header()[4]
+            # 记录不跨越数据区末尾, 放不下时从头开始写
+            position = write_pos % self.capacity
+            if position + len(record) > self.capacity:
+                write_pos += self.capacity - position
+                position = 0
+            offset = write_pos
+            write_pos += len(record)
+            self.__data[self.data_start + position:self.data_start + position + len(record)] = record
+            # 选同一个key, 空的或已被覆盖的槽位, 都没有时替换最早的记录
+            target_slot = None
+            oldest_slot = None
+            oldest_offset = None
+            for i in range(self.MAX_PROBE):
+                slot = (key_hash + i) % self.slot_count
+                slot_hash, slot_offset, _ = self.__read_slot(slot)
+                if slot_hash == 0 or slot_hash == key_hash or slot_offset < write_pos - self.capacity:
+                    target_slot = slot
+                    break
+                if oldest_offset is None or slot_offset < oldest_offset:
+                    oldest_slot, oldest_offset = slot, slot_offset
+            if target_slot is None:
+                target_slot = oldest_slot
+            self.__write_slot(target_slot, key_hash, offset, len(record))
+            self.__write_header(write_pos)
+        return True
+
+    def clear(self, namespace=None):
+        """
+        清空全部记录
+        :param namespace: 不为None时同时更换namespace, 如图的版本更新后
+        """
+        with self.__locked(fcntl.LOCK_EX):
+            if namespace is not None:
+                self.namespace = namespace
+                self.header_namespace = self.get_header_namespace(namespace)
+            self.__reset()
+
+    def stats(self):
+        with self.__locked(fcntl.LOCK_SH):
+            write_pos = self.__read_header()[4]
+        return {"namespace": self.namespace, "capacity": self.capacity, "used": min(write_pos, self.capacity),
+                "written": write_pos}
+
+    def close(self):
+        with self.__thread_lock:
+            self.__close_inherited()
+            self.__pid = None
@@ -0,0 +1,101 @@
+import json
+import mmap
+import os
+import pickle
+import struct
+
+
+class ServiceSnapshot:
+    """
+    服务启动需要的全部产物的快照文件, 由script/build_service_snapshot.py构建.
+    文件格式: MAGIC | 头部长度(8字节) | 头部json | 各分组的pickle数据.
+    头部记录每个分组相对数据区起点的偏移, 长度和包含的产物名. 同一分组的产物一起序列化, 图和建立在图上的索引放在同一分组中共享字符串.
+    打开时只映射文件并读取头部, 分组在第一次取其中的产物时才反序列化.
+    """
+    MAGIC = b"DGSNAP01"
+    HEADER_LENGTH_FORMAT = "<Q"
+    SOURCE_META_KEY = "sources"
+
+    def __init__(self, path):
+        self.path = str(path)
+        with open(self.path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.data[:len(self.MAGIC)] != self.MAGIC:
+            raise ValueError("not a service snapshot: {}".format(self.path))
+        header_start = len(self.MAGIC) + struct.calcsize(self.HEADER_LENGTH_FORMAT)
+        header_length, = struct.unpack(self.HEADER_LENGTH_FORMAT, self.data[len(self.MAGIC):header_start])
+        header = json.loads(self.data[header_start:header_start + header_length].decode("utf-8"))
+        self.data_start = header_start + header_length
+        self.meta = header["meta"]
+        self.group_2_section = header["groups"]
+        self.name_2_group = dict()
+        for group_name, section in self.group_2_section.items():
+            for name in section["names"]:
+                self.name_2_group[name] = group_name
+
+    def __contains__(self, name):
+        return name in self.name_2_group
+
+    def get_artifact_names(self):
+        return list(self.name_2_group.keys())
+
+    def get_group_name(self, name):
+        return self.name_2_group[name]
+
+    def load_group(self, group_name):
+        """
+        :return: 产物名 -> 产物
+        """
+        section = self.group_2_section[group_name]
+        start = self.data_start + section["offset"]
+        return pickle.loads(memoryview(self.data)[start:start + section["length"]])
+
+    @staticmethod
+    def write(path, group_2_artifact_dict, meta=None):
+        """
+        :param group_2_artifact_dict: 分组名 -> {产物名: 产物}
+        :param meta: 构建时的配置等信息, 原样写入头部
+        """
+        blob_list = []
+        group_2_section = dict()
+        offset = 0
+        for group_name, artifact_dict in group_2_artifact_dict.items():
+            blob = pickle.dumps(artifact_dict, protocol=pickle.HIGHEST_PROTOCOL)
+            group_2_section[group_name] = {"offset": offset, "length": len(blob), "names": list(artifact_dict.keys())}
+            blob_list.append(blob)
+            offset += len(blob)
+        header = {"meta": meta if meta is not None else dict(), "groups": group_2_section}
+        header_bytes = json.dumps(header).encode("utf-8")
+        temp_path = "{}.{}.tmp".format(path, os.getpid())
+        with open(temp_path, "wb") as f:
+            f.write(ServiceSnapshot.MAGIC)
+            f.write(struct.pack(ServiceSnapshot.HEADER_LENGTH_FORMAT, len(header_bytes)))
+            f.write(header_bytes)
+            for blob in blob_list:
+                f.write(blob)
+        os.replace(temp_path, str(path))
+        return str(path)
+
+    @staticmethod
+    def get_source_state(path):
+        """
+        :return: 源文件的[修改时间, 大小], 文件不存在时为空列表
+        """
+        if not os.path.exists(str(path)):
+            return []
+        stat = os.stat(str(path))
+        return [stat.st_mtime, stat.st_size]
+
+    def get_changed_source_list(self):
+        """
+        meta的sources记录了每个产物的源文件和构建时的状态: 产物名 -> [源文件, 修改时间, 大小]
+        :return: 构建快照之后被修改或删除的源文件
+        """
+        changed_list = []
+        for source_path, *state in self.meta.get(self.SOURCE_META_KEY, dict()).values():
+            if self.get_source_state(source_path) != state and source_path not in changed_list:
+                changed_list.append(source_path)
+        return changed_list
+
+    def close(self):
+        self.data.close()
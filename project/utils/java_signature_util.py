@@ -0,0 +1,107 @@
+import re
+
+
+class JavaSignatureUtil:
+    """
+    从样例方法的源码中解析方法签名, 得到返回值和参数中出现的类型
+    """
+    ANNOTATION_PATTERN = re.compile(r"@[\w$.]+(\s*\([^()]*\))?")
+    IDENTIFIER_PATTERN = re.compile(r"[A-Za-z_$][\w$]*(?:\s*\.\s*[A-Za-z_$][\w$]*)*")
+    MODIFIER_SET = {"public", "private", "protected", "static", "final", "abstract", "synchronized", "native",
+                    "strictfp", "default", "transient", "volatile"}
+
+    @staticmethod
+    def get_type_tokens(type_str):
+        """
+        :param type_str: 如 "Map<String, List<BibEntry>>[]"
+        :return: 出现的所有类型名, 如 ["Map", "String", "List", "BibEntry"]
+        """
+        return [re.sub(r"\s+", "", token) for token in JavaSignatureUtil.IDENTIFIER_PATTERN.findall(type_str)]
+
+    @staticmethod
+    def split_parameters(parameter_str):
+        """
+        按不在尖括号内的逗号切分参数列表
+        """
+        parameter_list = []
+        depth = 0
+        start = 0
+        for index, char in enumerate(parameter_str):
+            if char == "<":
+                depth += 1
+            elif char == ">":
+                depth -= 1
+            elif char == "," and depth == 0:
+                parameter_list.append(parameter_str[start:index])
+                start = index + 1
+        parameter_list.append(parameter_str[start:])
+        return [parameter.strip() for parameter in parameter_list if parameter.strip() != ""]
+
+    @staticmethod
+    def remove_type_parameter(prefix):
+        """
+        去掉泛型方法声明中返回值前面的类型参数, 如 "<T extends Entry> List<T> getAll" -> "List<T> getAll"
+        """
+        prefix = prefix.strip()
+        if not prefix.startswith("<"):
+            return prefix
+        depth = 0
+        for index, char in enumerate(prefix):
+            if char == "<":
+                depth += 1
+            elif char == ">":
+                depth -= 1
+                if depth == 0:
+                    return prefix[index + 1:].strip()
+        return prefix
+
+    @staticmethod
+    def parse_method_signature(method_info):
+        """
+        :param method_info: 方法源码, 必须带方法体
+        :return: (返回值中的类型列表, 参数中的类型列表), 没有方法体或无法解析时返回None. 构造方法的返回值类型列表为空
+        """
+        if method_info.find("{") == -1:
+            return None
+        header = JavaSignatureUtil.ANNOTATION_PATTERN.sub(" ", method_info[:method_info.find("{")])
+        parameter_start = header.find("(")
+        if parameter_start == -1:
+            return None
+        depth = 0
+        parameter_end = -1
+        for index in range(parameter_start, len(header)):
+            if header[index] == "(":
+                depth += 1
+            elif header[index] == ")":
+                depth -= 1
+                if depth == 0:
+                    parameter_end = index
+                    break
+        if parameter_end == -1:
+            return None
+
+        prefix_word_list = [word for word in header[:parameter_start].split() if
+                            word not in JavaSignatureUtil.MODIFIER_SET]
+        prefix = JavaSignatureUtil.remove_type_parameter(" ".join(prefix_word_list))
+        # 最后一个标识符是方法名, 前面的是返回值类型
+        return_type_tokens = JavaSignatureUtil.get_type_tokens(prefix)[:-1]
+
+        parameter_type_tokens = []
+        for parameter in JavaSignatureUtil.split_parameters(header[parameter_start + 1:parameter_end]):
+            parameter_word_list = [word for word in parameter.split() if word not in JavaSignatureUtil.MODIFIER_SET]
+            # 最后一个标识符是参数名
+            parameter_type_tokens.extend(JavaSignatureUtil.get_type_tokens(" ".join(parameter_word_list))[:-1])
+        return return_type_tokens, parameter_type_tokens
+
+    @staticmethod
+    def contains_type(type_tokens, qualified_name):
+        """
+        :param type_tokens: parse_method_signature得到的类型列表
+        :param qualified_name: api的全限定名
+        :return: 类型列表中是否有这个api, 按全限定名或简单名匹配
+        """
+        simple_name = qualified_name[qualified_name.rfind(".") + 1:]
+        for token in type_tokens:
+            if token == qualified_name or token[token.rfind(".") + 1:] == simple_name:
+                return True
+        return False
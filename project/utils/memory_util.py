@@ -0,0 +1,34 @@
+import sys
+
+
+class MemoryUtil:
+    """
+    估算python对象占用的内存
+    """
+
+    @staticmethod
+    def estimate_size(obj):
+        """
+        递归累加对象及其包含的dict/list/tuple/set以及普通对象__dict__的sys.getsizeof, 同一对象只计算一次
+        :param obj: 任意python对象
+        :return: 估算的字节数
+        """
+        seen_id_set = set()
+        size = 0
+        stack = [obj]
+        while stack:
+            item = stack.pop()
+            if id(item) in seen_id_set:
+                continue
+            seen_id_set.add(id(item))
+            size += sys.getsizeof(item)
+            if isinstance(item, (str, bytes, int, float, bool)) or item is None:
+                continue
+            if isinstance(item, dict):
+                stack.extend(item.keys())
+                stack.extend(item.values())
+            elif isinstance(item, (list, tuple, set, frozenset)):
+                stack.extend(item)
+            elif hasattr(item, "__dict__"):
+                stack.append(item.__dict__)
+        return size
@@ -0,0 +1,101 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+
+class LatencyHistogram:
+    """
+    累计分布的耗时直方图, 与Prometheus的histogram相同: 每个桶记录耗时小于等于上界的次数
+    """
+    BUCKET_LIST = [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+    # 桶上界的le标签, 统一按浮点数格式化(如"1.0"), 与Prometheus客户端一致
+    BUCKET_LABEL_LIST = [repr(float(bound)) for bound in BUCKET_LIST] + ["+Inf"]
+
+    def __init__(self):
+        # 最后一个是+Inf桶
+        self.bucket_count_list = [0] * (len(self.BUCKET_LIST) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.bucket_count_list[bisect_left(self.BUCKET_LIST, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def get_cumulative_count_list(self):
+        cumulative_count_list = []
+        count = 0
+        for bucket_count in self.bucket_count_list:
+            count += bucket_count
+            cumulative_count_list.append(count)
+        return cumulative_count_list
+
+
+class Metrics:
+    """
+    进程内的耗时统计, 按接口和处理阶段分别记录直方图, render输出Prometheus文本格式.
+    每次记录只做一次二分查找和几次加法, 锁只保护这几步
+    """
+    REQUEST_METRIC = "docgen_request_seconds"
+    STAGE_METRIC = "docgen_stage_seconds"
+    METRIC_2_HELP = {
+        REQUEST_METRIC: "Latency of each route.",
+        STAGE_METRIC: "Latency of each processing stage.",
+    }
+
+    def __init__(self):
+        # (metric, label_name, label_value) -> LatencyHistogram
+        self.__key_2_histogram = dict()
+        self.__lock = threading.Lock()
+
+    def observe(self, metric, label_name, label_value, seconds):
+        key = (metric, label_name, label_value)
+        with self.__lock:
+            histogram = self.__key_2_histogram.get(key, None)
+            if histogram is None:
+                histogram = LatencyHistogram()
+                self.__key_2_histogram[key] = histogram
+            histogram.observe(seconds)
+
+    def observe_request(self, route, seconds):
+        self.observe(self.REQUEST_METRIC, "route", route, seconds)
+
+    @contextmanager
+    def stage(self, stage_name):
+        """
+        记录with块的耗时, 如 with metrics.stage("graph_traversal"): ...
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(self.STAGE_METRIC, "stage", stage_name, time.perf_counter() - start)
+
+    def render(self):
+        """
+        :return: Prometheus文本格式的全部直方图
+        """
+        with self.__lock:
+            item_list = [(key, histogram.get_cumulative_count_list(), histogram.sum, histogram.count)
+                         for key, histogram in self.__key_2_histogram.items()]
+        line_list = []
+        for metric in sorted(self.METRIC_2_HELP.keys()):
+            line_list.append("# HELP {} {}".format(metric, self.METRIC_2_HELP[metric]))
+            line_list.append("# TYPE {} histogram".format(metric))
+            for (item_metric, label_name, label_value), cumulative_count_list, total, count in sorted(item_list):
+                if item_metric != metric:
+                    continue
+                label = '{}="{}"'.format(label_name, label_value)
+                for bound, cumulative_count in zip(LatencyHistogram.BUCKET_LABEL_LIST, cumulative_count_list):
+                    line_list.append('{}_bucket{{{},le="{}"}} {}'.format(metric, label, bound, cumulative_count))
+                line_list.append("{}_sum{{{}}} {}".format(metric, label, total))
+                line_list.append("{}_count{{{}}} {}".format(metric, label, count))
+        return "\n".join(line_list) + "\n"
+
+    def clear(self):
+        with self.__lock:
+            self.__key_2_histogram.clear()
+
+
+metrics = Metrics()
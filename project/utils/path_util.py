@@ -87,6 +87,30 @@ class PathUtil:
             doc_output_dir / ("{pro}.{version}.dc".format(pro=pro_name, version=version)))
         return doc_path
 
+    @staticmethod
+    def shared_response_cache(pro_name):
+        cache_output_dir = Path(OUTPUT_DIR) / "cache"
+        cache_output_dir.mkdir(exist_ok=True, parents=True)
+        return str(cache_output_dir / "{pro}.response_cache.mmap".format(pro=pro_name))
+
+    @staticmethod
+    def popular_query(pro_name):
+        cache_output_dir = Path(OUTPUT_DIR) / "cache"
+        cache_output_dir.mkdir(exist_ok=True, parents=True)
+        return str(cache_output_dir / "{pro}.popular_query.json".format(pro=pro_name))
+
+    @staticmethod
+    def doc_columns(pro_name, version):
+        return PathUtil.doc(pro_name=pro_name, version=version) + ".columns"
+
+    @staticmethod
+    def service_snapshot(pro_name, graph_version, doc_version):
+        snapshot_output_dir = Path(OUTPUT_DIR) / "snapshot" / pro_name
+        snapshot_output_dir.mkdir(exist_ok=True, parents=True)
+        snapshot_path = str(snapshot_output_dir / "{pro}.{graph_version}.{doc_version}.snapshot".format(
+            pro=pro_name, graph_version=graph_version, doc_version=doc_version))
+        return snapshot_path
+
     @staticmethod
     def sub_doc(pro_name, version):
         doc_output_dir = Path(OUTPUT_DIR) / "doc" / pro_name
@@ -0,0 +1,62 @@
+import cProfile
+import hmac
+import io
+import pstats
+import time
+import types
+from pathlib import Path
+
+
+class ProfileTool:
+    """
+    对单个请求做性能分析. 请求头X-Profile-Token或查询参数profile_token与配置的profile_token相同时,
+    处理函数在cProfile下运行, KnowledgeService, JsonService, sekg的GraphData和fastText的调用都会被记录.
+    默认返回按累计耗时排序的前N项报告, profile_output=file时保存.prof文件并正常返回结果.
+    不带这个参数的请求只多一次请求头查找.
+    注意: method_worker_count大于1时线程池中计算的方法字段不在报告中
+    """
+    TOKEN_HEADER = "X-Profile-Token"
+    TOKEN_QUERY = "profile_token"
+    OUTPUT_QUERY = "profile_output"
+    FILE_HEADER = "X-Profile-File"
+
+    @staticmethod
+    def check_token(configured_token, token):
+        # 没有配置token时不允许分析
+        if not configured_token or token is None:
+            return False
+        return hmac.compare_digest(str(configured_token), str(token))
+
+    @staticmethod
+    def run(function, *args):
+        """
+        :return: (function的结果, profiler), 结果是生成器时在分析中全部取出, 再包装成新的生成器返回
+        """
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            result = function(*args)
+            if isinstance(result, types.GeneratorType):
+                item_list = list(result)
+                result = (item for item in item_list)
+        finally:
+            profiler.disable()
+        return result, profiler
+
+    @staticmethod
+    def report(profiler, top_n=30):
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(top_n)
+        return stream.getvalue()
+
+    @staticmethod
+    def save(profiler, profile_dir, name):
+        """
+        保存到<profile_dir>/<name>.<时间>.prof, 可以用snakeviz或pstats查看
+        :return: 文件路径
+        """
+        profile_dir = Path(profile_dir)
+        profile_dir.mkdir(exist_ok=True, parents=True)
+        path = str(profile_dir / "{}.{}.prof".format(name, time.strftime("%Y%m%d-%H%M%S")))
+        profiler.dump_stats(path)
+        return path
@@ -0,0 +1,92 @@
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
+
+
+class ReadOnlyGraphView:
+    """
+    GraphData的只读视图, 多线程的worker中所有请求共享同一个图.
+    返回的节点不能修改(dict -> MappingProxyType, list -> tuple, set -> frozenset),
+    要放进响应里或者修改时先用thaw复制一份普通的dict.
+    最近读取的max_cached_node_count个节点冻结后保存(LRU), 热门节点的重复读取返回同一个对象, 不再复制,
+    其余节点不常驻内存, 进程中不会保留整个图的第二份副本.
+    """
+    READ_METHOD_SET = {"get_node_ids", "get_node_ids_by_label", "get_relations", "get_all_out_relations",
+                       "get_all_in_relations", "exist_node", "exist_relation", "get_node_num", "get_relation_num"}
+
+    def __init__(self, graph_data, max_cached_node_count=10000):
+        self.__graph_data = graph_data
+        self.max_cached_node_count = max_cached_node_count
+        # 节点id -> 冻结的节点, 按最近读取的顺序. 并发时同一个节点可能被冻结两次, 结果相同
+        self.__id_2_frozen_node = OrderedDict()
+        self.__lock = threading.Lock()
+
+    @staticmethod
+    def freeze(value):
+        if isinstance(value, (dict, MappingProxyType)):
+            return MappingProxyType({k: ReadOnlyGraphView.freeze(v) for k, v in value.items()})
+        if isinstance(value, (list, tuple)):
+            return tuple(ReadOnlyGraphView.freeze(item) for item in value)
+        if isinstance(value, (set, frozenset)):
+            return frozenset(value)
+        return value
+
+    @staticmethod
+    def thaw(value):
+        """
+        :return: value的可修改副本, 可以直接jsonify
+        """
+        if isinstance(value, (dict, MappingProxyType)):
+            return {k: ReadOnlyGraphView.thaw(v) for k, v in value.items()}
+        if isinstance(value, (list, tuple, set, frozenset)):
+            return [ReadOnlyGraphView.thaw(item) for item in value]
+        return value
+
+    def __get_cached_node(self, node_id):
+        with self.__lock:
+            frozen_node = self.__id_2_frozen_node.get(node_id, None)
+            if frozen_node is not None:
+                self.__id_2_frozen_node.move_to_end(node_id)
+            return frozen_node
+
+    def get_frozen_node(self, node):
+        node_id = node.get("id", None)
+        if node_id is None:
+            return self.freeze(node)
+        frozen_node = self.__get_cached_node(node_id)
+        if frozen_node is not None:
+            return frozen_node
+        frozen_node = self.freeze(node)
+        if self.max_cached_node_count <= 0:
+            return frozen_node
+        with self.__lock:
+            self.__id_2_frozen_node[node_id] = frozen_node
+            while len(self.__id_2_frozen_node) > self.max_cached_node_count:
+                self.__id_2_frozen_node.popitem(last=False)
+        return frozen_node
+
+    def get_cached_node_count(self):
+        return len(self.__id_2_frozen_node)
+
+    def get_node_info_dict(self, node_id):
+        frozen_node = self.__get_cached_node(node_id)
+        if frozen_node is not None:
+            return frozen_node
+        node = self.__graph_data.get_node_info_dict(node_id)
+        if node is None:
+            return None
+        return self.get_frozen_node(node)
+
+    def find_nodes_by_ids(self, *ids):
+        return [self.get_frozen_node(node) for node in self.__graph_data.find_nodes_by_ids(*ids)]
+
+    def find_one_node_by_property(self, property_name, property_value):
+        node = self.__graph_data.find_one_node_by_property(property_name=property_name, property_value=property_value)
+        if node is None:
+            return None
+        return self.get_frozen_node(node)
+
+    def __getattr__(self, name):
+        if name in self.READ_METHOD_SET:
+            return getattr(self.__graph_data, name)
+        raise AttributeError("'{}' is not available on a read-only graph view".format(name))
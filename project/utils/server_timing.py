@@ -0,0 +1,84 @@
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+class ServerTimingCollector:
+    """
+    一个请求中各部分的累计耗时, 同名部分多次计时(如每个方法的样例代码)时耗时相加
+    """
+
+    def __init__(self):
+        self.name_2_seconds = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def add(self, name, seconds):
+        with self.__lock:
+            self.name_2_seconds[name] = self.name_2_seconds.get(name, 0.0) + seconds
+
+    def to_header(self):
+        """
+        :return: Server-Timing响应头的值, 如 "methods;dur=12.31, extends;dur=0.05", 单位毫秒
+        """
+        with self.__lock:
+            return ", ".join("{};dur={:.2f}".format(name, seconds * 1000)
+                             for name, seconds in self.name_2_seconds.items())
+
+
+class ServerTiming:
+    """
+    按线程收集当前请求各部分的耗时, 用于Server-Timing响应头.
+    处理请求的线程调用start/stop, 中间用section计时; 没有调用start的线程中section不做记录.
+    在线程池中计算的部分用run_with把收集器带到工作线程
+    """
+    HEADER = "Server-Timing"
+    # 跨域的前端页面也能在Resource Timing中读到Server-Timing
+    ALLOW_ORIGIN_HEADER = "Timing-Allow-Origin"
+    __local = threading.local()
+
+    @staticmethod
+    def start():
+        ServerTiming.__local.collector = ServerTimingCollector()
+
+    @staticmethod
+    def stop():
+        """
+        :return: Server-Timing响应头的值, 没有计时的部分时为空字符串
+        """
+        collector = ServerTiming.get_collector()
+        ServerTiming.__local.collector = None
+        if collector is None:
+            return ""
+        return collector.to_header()
+
+    @staticmethod
+    def get_collector():
+        return getattr(ServerTiming.__local, "collector", None)
+
+    @staticmethod
+    @contextmanager
+    def section(name):
+        collector = ServerTiming.get_collector()
+        if collector is None:
+            yield
+            return
+        # 按第一次开始的顺序输出, 外层部分在内层前面
+        collector.add(name, 0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            collector.add(name, time.perf_counter() - start)
+
+    @staticmethod
+    def run_with(collector, function, *args):
+        """
+        在工作线程中使用请求线程的收集器运行function
+        """
+        previous_collector = ServerTiming.get_collector()
+        ServerTiming.__local.collector = collector
+        try:
+            return function(*args)
+        finally:
+            ServerTiming.__local.collector = previous_collector
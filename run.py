@@ -1,33 +1,511 @@
-from flask import Flask, request, jsonify
+import types
+
+from flask import Flask, request, jsonify, Response, stream_with_context, g, make_response
 from flask_cors import CORS
 from sekg.ir.doc.wrapper import MultiFieldDocumentCollection
 from sekg.graph.exporter.graph_data import GraphData, NodeInfo
 
+from project.artifact_registry import ArtifactRegistry, artifact_registry
+from project.cache_module.prefetcher import Prefetcher
+from project.cache_module.response_cache import ResponseCache
+from project.cache_module.single_flight import SingleFlight
+from project.cache_module.warmup import QueryRecorder, CacheWarmer
+from project.class_doc_service import ClassDocService
 from project.knowledge_service import KnowledgeService
+from project.utils.read_only_graph_view import ReadOnlyGraphView
 from project.doc_service import DocService
 from project.json_service import JsonService
+from project.service_state import ServiceState, ServiceStateHolder
+from project.storage_module.mmap_kv_store import MmapKVStore
+from project.utils.metrics import metrics
 from project.utils.path_util import PathUtil
-from pathlib import Path
+from project.utils.profile_tool import ProfileTool
+from project.utils.server_timing import ServerTiming
 import definitions
 import json
+import hmac
+import os
+import signal
+import threading
+import time
+import traceback
 
 app = Flask(__name__)
 cors = CORS(app, resources={r"/*": {"origins": "*"}})
 
-pro_name = "jabref"
-doc_dir = PathUtil.doc(pro_name=pro_name, version="v3.3")
-graph_data_path = PathUtil.graph_data(pro_name=pro_name, version="v3.10")
-graph_data: GraphData = GraphData.load(graph_data_path)
-doc_collection: MultiFieldDocumentCollection = MultiFieldDocumentCollection.load(doc_dir)
-simple_qualified_name_map_path = Path(definitions.ROOT_DIR) / "output" / "simple_qualified_name_map.json"
+with open(definitions.SERVICE_CONFIG_PATH, 'r') as f:
+    service_config = json.load(f)
+pro_name = service_config["pro_name"]
+start_time = time.time()
+
+# 同一台机器上的worker进程通过内存映射文件共用计算结果, 图或文档版本变化时清空
+shared_store = None
+if service_config.get("shared_cache", False):
+    shared_store = MmapKVStore(PathUtil.shared_response_cache(pro_name),
+                               capacity=service_config["shared_cache_size_mb"] * 1024 * 1024,
+                               slot_count=service_config["shared_cache_slot_count"],
+                               namespace="{}/{}".format(service_config["graph_version"],
+                                                        service_config["doc_version"]))
+response_cache = ResponseCache(max_size=service_config["response_cache_size"],
+                               max_memory=service_config["response_cache_memory_mb"] * 1024 * 1024,
+                               shared_store=shared_store)
+single_flight = SingleFlight()
+# 类的页面返回后, 后台预先计算用户接下来可能打开的相关类和关键方法
+prefetcher = None
+if service_config.get("prefetch", False):
+    prefetcher = Prefetcher(max_queue_size=service_config["prefetch_queue_size"],
+                            cpu_budget=service_config["prefetch_cpu_budget"])
+
+
+def get_cache_version(version, path):
+    """
+    响应缓存key中的版本, 带上文件的修改时间, 同一版本的文件重新生成后旧的结果不会再被命中.
+    修改时间在各个worker中相同, 共享缓存仍然可以共用
+    """
+    if not os.path.exists(path):
+        return version
+    return "{}@{}".format(version, int(os.path.getmtime(path)))
+
+
+def use_version_snapshot(graph_version, doc_version):
+    if not service_config.get("use_snapshot", False):
+        return
+    # script/build_service_snapshot.py构建的快照存在, 且其中产物的源文件在构建后都没有变化时, 产物从快照中取
+    snapshot_path = PathUtil.service_snapshot(pro_name, graph_version, doc_version)
+    if os.path.exists(snapshot_path):
+        artifact_registry.use_snapshot(snapshot_path)
+    else:
+        print("snapshot not found, load from original files: " + snapshot_path)
+        artifact_registry.use_snapshot(None)
+
+
+def build_service_state(graph_version, doc_version) -> ServiceState:
+    doc_version = ArtifactRegistry.get_available_doc_version(pro_name, doc_version,
+                                                             service_config.get("doc_fallback_version", ""))
+    # 先选定快照再从注册表取任何产物, 否则快照中已有的产物会从原始文件重新加载
+    use_version_snapshot(graph_version, doc_version)
+    json_service = JsonService(artifact_registry)
+    simple_qualified_name_map = artifact_registry.simple_qualified_name_map()
+    # 请求之间共享同一个图, 只通过只读视图访问, 可以用多线程的worker
+    graph_data = ReadOnlyGraphView(artifact_registry.graph_data(pro_name=pro_name, version=graph_version),
+                                   max_cached_node_count=service_config.get("graph_node_cache_size", 10000))
+    doc_collection: MultiFieldDocumentCollection = artifact_registry.doc_collection(pro_name=pro_name,
+                                                                                   version=doc_version)
+    graph_cache_version = get_cache_version(graph_version, PathUtil.graph_data(pro_name=pro_name,
+                                                                               version=graph_version))
+    doc_cache_version = get_cache_version(doc_version, ArtifactRegistry.get_doc_path(pro_name, doc_version))
+    knowledge_service = KnowledgeService(doc_collection, graph_data,
+                                         name_index=artifact_registry.name_index(pro_name, graph_version),
+                                         prefix_index=artifact_registry.prefix_index(pro_name, graph_version),
+                                         relation_index=artifact_registry.relation_index(pro_name, graph_version),
+                                         response_cache=response_cache, graph_version=graph_cache_version,
+                                         method_worker_count=service_config["method_worker_count"])
+    doc_service = DocService(doc_collection, response_cache=response_cache, doc_version=doc_cache_version)
+    class_doc_service = ClassDocService(knowledge_service, doc_service, json_service)
+    return ServiceState(graph_version, doc_version, graph_data, knowledge_service, doc_service, class_doc_service,
+                        ArtifactRegistry.get_version_artifact_names(pro_name, graph_version, doc_version),
+                        [graph_cache_version, doc_cache_version], json_service=json_service,
+                        simple_qualified_name_map=simple_qualified_name_map)
+
+
+# 请求开始时取当前版本的service, 热切换(reload_service)只替换service_holder中的状态
+service_holder = ServiceStateHolder(build_service_state(service_config["graph_version"],
+                                                        service_config["doc_version"]))
+print("load complete in {:.2f}s".format(time.time() - start_time))
+
+# 记录类页面的请求, 下次启动时在后台按热门程度预热前warmup_top_n个类
+popular_query_path = PathUtil.popular_query(pro_name)
+query_recorder = QueryRecorder(popular_query_path, flush_seconds=service_config["query_record_flush_seconds"])
+
+
+# 每个接口的处理函数, 参数是请求的json, 返回字符串(错误信息或纯文本)或可以jsonify的结果.
+# run.py的Flask app和asgi.py共用这些函数
+def doc_info_handler(request_json):
+    if "qualified_name" not in request_json:
+        return "qualified name need"
+    state = service_holder.get()
+    qualified_name = test_api(request_json['qualified_name'], state)
+    api_id = state.knowledge_service.get_api_id_by_name(qualified_name)
+    if api_id == -1:
+        return 'wrong qualified name'
+    return state.doc_service.get_doc_info(api_id)
+
+
+def api_knowledge_handler(request_json):
+    if "qualified_name" not in request_json:
+        return "qualified_name need"
+    state = service_holder.get()
+    qualified_name = test_api(request_json['qualified_name'], state)
+    return state.knowledge_service.get_knowledge(qualified_name)
+
+
+def api_structure_handler(request_json):
+    if "qualified_name" not in request_json:
+        return "qualified_name need"
+    page_param = KnowledgeService.get_method_page_param(request_json)
+    if isinstance(page_param, str):
+        return page_param
+    state = service_holder.get()
+    qualified_name = test_api(request_json['qualified_name'], state)
+    result = state.knowledge_service.api_base_structure(qualified_name, **page_param)
+    record_class_query(qualified_name)
+    return result
+
+
+def method_structure_handler(request_json):
+    if "qualified_name" not in request_json:
+        return "qualified_name need"
+    page_param = KnowledgeService.get_method_page_param(request_json)
+    if isinstance(page_param, str):
+        return page_param
+    state = service_holder.get()
+    qualified_name = test_api(request_json['qualified_name'], state)
+    return state.knowledge_service.api_method_structure(qualified_name, **page_param)
+
+
+def key_methods_handler(request_json):
+    if "qualified_name" not in request_json:
+        return "qualified_name need"
+    state = service_holder.get()
+    qualified_name = test_api(request_json['qualified_name'], state)
+    return state.knowledge_service.get_key_methods(qualified_name)
+
+
+def api_terminologies_handler(request_json):
+    if "qualified_name" not in request_json:
+        return "qualified_name need"
+    state = service_holder.get()
+    qualified_name = test_api(request_json['qualified_name'], state)
+    return state.knowledge_service.get_api_terminologies(qualified_name)
+
+
+def sample_code_handler(request_json):
+    if 'qualified_name' not in request_json:
+        return 'qualified name need'
+    state = service_holder.get()
+    qualified_name = test_api(request_json['qualified_name'], state)
+    api_id = state.knowledge_service.get_api_id_by_name(qualified_name)
+    if api_id == -1:
+        return 'wrong qualified name'
+    sample_code = state.doc_service.get_sample_code(api_id)
+    if sample_code is None:
+        return "no sample code"
+    return sample_code
+
+
+def parameter_return_value_handler(request_json):
+    if 'qualified_name' not in request_json:
+        return 'qualified name need'
+    state = service_holder.get()
+    qualified_name = test_api(request_json['qualified_name'], state)
+    return state.class_doc_service.get_parameter_return_value(qualified_name)
 
-knowledge_service = KnowledgeService(doc_collection, graph_data)
-doc_service = DocService()
-json_service = JsonService()
-with open(simple_qualified_name_map_path, 'r') as f:
-    json_str = f.read()
-simple_qualified_name_map = json.loads(json_str)
-print("load complete")
+
+def constructor_handler(request_json):
+    if 'qualified_name' not in request_json:
+        return 'qualified name need'
+    state = service_holder.get()
+    qualified_name = test_api(request_json['qualified_name'], state)
+    return state.knowledge_service.get_constructor(qualified_name)
+
+
+def related_api_handler(request_json):
+    if 'qualified_name' not in request_json:
+        return 'qualified name need'
+    state = service_holder.get()
+    qualified_name = test_api(request_json['qualified_name'], state)
+    return state.knowledge_service.get_related_api(qualified_name)
+
+
+def class_doc_handler(request_json):
+    if 'qualified_name' not in request_json:
+        return 'qualified name need'
+    section_list = request_json.get('sections', None)
+    if section_list is not None:
+        for section in section_list:
+            if section not in ClassDocService.SECTION_LIST:
+                return 'unknown section: ' + str(section)
+    state = service_holder.get()
+    qualified_name = test_api(request_json['qualified_name'], state)
+    result = state.class_doc_service.get_class_doc(qualified_name, section_list)
+    record_class_query(qualified_name)
+    return result
+
+
+def batch_doc_handler(request_json):
+    if 'qualified_names' not in request_json:
+        return 'qualified names need'
+    name_list = request_json['qualified_names']
+    if not isinstance(name_list, list):
+        return 'qualified_names should be a list'
+    if len(name_list) > service_config["batch_max_size"]:
+        return 'at most {} qualified names in one request'.format(service_config["batch_max_size"])
+    section_list = request_json.get('sections', None)
+    if section_list is not None:
+        for section in section_list:
+            if section not in ClassDocService.BATCH_SECTION_LIST:
+                return 'unknown section: ' + str(section)
+    # 先一次解析全部名字, 再逐个计算并流式返回
+    state = service_holder.get()
+    qualified_name_list = [test_api(name, state) for name in name_list]
+    return iter_batch_doc(name_list, state.class_doc_service.get_batch_doc(qualified_name_list, section_list))
+
+
+def iter_batch_doc(name_list, result_iter):
+    for name, result in zip(name_list, result_iter):
+        item = {"name": name}
+        item.update(result)
+        yield item
+
+
+def cache_stats_handler(request_json):
+    stats = response_cache.stats()
+    stats["single_flight"] = single_flight.stats()
+    if prefetcher is not None:
+        stats["prefetch"] = prefetcher.stats()
+    return stats
+
+
+def artifacts_handler(request_json):
+    return artifact_registry.memory_report()
+
+
+def ready_handler(request_json):
+    """
+    :return: (预热进度, 状态码), 预热达到warmup_ready_threshold前返回503
+    """
+    stats = cache_warmer.start().stats()
+    return stats, 200 if stats["ready"] else 503
+
+
+def probe_structure(endpoint, request_json):
+    """
+    在事件循环中调用, 只查本进程缓存中的api_structure/method_structure结果, 不做文件读写
+    :return: (结果, 命中后要放到线程池中运行的无参函数或None), 参数不合法或未命中时结果为None, 由处理函数重新处理
+    """
+    if "qualified_name" not in request_json:
+        return None, None
+    page_param = KnowledgeService.get_method_page_param(request_json)
+    if isinstance(page_param, str):
+        return None, None
+    state = service_holder.get()
+    qualified_name = test_api(request_json['qualified_name'], state)
+    result = state.knowledge_service.peek_cached_response(
+        KnowledgeService.get_page_endpoint(endpoint, **page_param), qualified_name, local_only=True)
+    # 命中缓存的类页面同样计入热门查询并预取, 否则最热门的类反而记录得最少. 记录时会写热门查询文件, 不在事件循环中进行
+    if result is not None and endpoint == "api_structure":
+        return result, lambda: record_class_query(qualified_name)
+    return result, None
+
+
+# 查询接口: 路径 -> 处理函数
+QUERY_ROUTE_MAP = {
+    '/get_doc/': doc_info_handler,
+    '/api_knowledge/': api_knowledge_handler,
+    '/api_structure/': api_structure_handler,
+    '/method_structure/': method_structure_handler,
+    '/key_methods/': key_methods_handler,
+    '/terminology/': api_terminologies_handler,
+    '/sample_code/': sample_code_handler,
+    '/parameter_return_value/': parameter_return_value_handler,
+    '/constructor/': constructor_handler,
+    '/related_api/': related_api_handler,
+    '/class_doc/': class_doc_handler,
+    '/batch_doc/': batch_doc_handler,
+}
+# 返回生成器的接口
+STREAM_HANDLER_SET = {batch_doc_handler}
+# 处理函数 -> 路径, 流式接口在取完最后一项时记录请求耗时
+HANDLER_ROUTE_MAP = {handler: path for path, handler in QUERY_ROUTE_MAP.items()}
+# 只读进程状态的接口, 不需要放到线程池里
+STATUS_ROUTE_MAP = {
+    '/cache_stats/': cache_stats_handler,
+    '/artifacts/': artifacts_handler,
+}
+# 有响应缓存的接口: 路径 -> 只查本进程缓存的函数, 见probe_structure
+PROBE_ROUTE_MAP = {
+    '/api_structure/': lambda request_json: probe_structure("api_structure", request_json),
+    '/method_structure/': lambda request_json: probe_structure("method_structure", request_json),
+}
+
+
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4"
+ADMIN_TOKEN_HEADER = "X-Admin-Token"
+
+
+def to_ndjson_line(item):
+    return json.dumps(item) + "\n"
+
+
+def to_response(result):
+    if isinstance(result, str):
+        return result
+    # 生成器按NDJSON逐行返回
+    if isinstance(result, types.GeneratorType):
+        return Response(stream_with_context(to_ndjson_line(item) for item in result), mimetype="application/x-ndjson")
+    with metrics.stage("serialization"):
+        return jsonify(result)
+
+
+def profile_handler(handler, request_json, profile_token, profile_output):
+    """
+    在cProfile下运行处理函数, 见ProfileTool
+    :return: (结果, 状态码, 额外的响应头)
+    """
+    if not ProfileTool.check_token(service_config.get("profile_token", ""), profile_token):
+        return 'wrong profile token', 403, {}
+    with service_holder.use():
+        result, profiler = ProfileTool.run(handler, request_json)
+    if profile_output == "file":
+        profile_path = ProfileTool.save(profiler, os.path.join(definitions.OUTPUT_DIR, "profile"), handler.__name__)
+        return result, 200, {ProfileTool.FILE_HEADER: profile_path}
+    return ProfileTool.report(profiler, service_config.get("profile_top_n", 30)), 200, {
+        "Content-Type": "text/plain; charset=utf-8"}
+
+
+def call_with_server_timing(handler, request_json):
+    """
+    :return: (结果, Server-Timing响应头的值). 流式返回的结果在响应头发出后才计算, 响应头中只有到开始返回的total;
+    计算每一项时仍使用这个请求的计时, 取完最后一项时整个流的耗时计入这个接口的请求耗时(/metrics)
+    """
+    ServerTiming.start()
+    start = time.perf_counter()
+    try:
+        # 处理期间一直使用开始时的版本, 热切换等这些请求结束后才释放旧版本
+        with service_holder.use():
+            result = handler(request_json)
+            if isinstance(result, types.GeneratorType):
+                result = service_holder.keep_in_use(result)
+    finally:
+        collector = ServerTiming.get_collector()
+        collector.add("total", time.perf_counter() - start)
+        server_timing = ServerTiming.stop()
+    if isinstance(result, types.GeneratorType):
+        result = iter_with_server_timing(result, collector, start, HANDLER_ROUTE_MAP.get(handler, handler.__name__))
+    return result, server_timing
+
+
+def iter_with_server_timing(result_iter, collector, start, route):
+    """
+    在请求的计时下取出流式结果的每一项, 每一项可能在不同的线程中计算(asgi.py)
+    """
+    end = object()
+    try:
+        while True:
+            item = ServerTiming.run_with(collector, next, result_iter, end)
+            if item is end:
+                return
+            yield item
+    finally:
+        metrics.observe_request(route, time.perf_counter() - start)
+
+
+def iter_in_context(result_iter, context):
+    """
+    在context中取出流式结果的每一项, 取完或生成器关闭时退出context.
+    返回前已经进入context, 从未开始迭代就被丢弃的生成器在关闭或回收时同样会退出
+    """
+    def iter_item():
+        with context:
+            yield
+            for item in result_iter:
+                yield item
+
+    stream = iter_item()
+    next(stream)
+    return stream
+
+
+def record_class_query(qualified_name):
+    """
+    类页面返回后记录热门查询并预取相关的类
+    """
+    if qualified_name == "Do Not Find API":
+        return
+    query_recorder.record(qualified_name)
+    submit_prefetch(qualified_name)
+
+
+def submit_prefetch(qualified_name):
+    if prefetcher is not None:
+        prefetcher.submit(("related", qualified_name), lambda: prefetch_related(qualified_name))
+
+
+def prefetch_related(qualified_name):
+    """
+    后台任务: 预取simrank最相关的几个类的结构和类的关键方法的结构, 都是带缓存的接口
+    """
+    state = service_holder.get()
+    if state.knowledge_service.get_api_id_by_name(qualified_name) == -1:
+        return
+    related_api_list = state.knowledge_service.get_related_api(qualified_name)["related_api"]
+    for related_api in related_api_list[:service_config["prefetch_related_count"]]:
+        prefetcher.submit(("api_structure", related_api),
+                          lambda name=related_api: state.knowledge_service.api_base_structure(name))
+    key_method_list = state.knowledge_service.get_key_methods(qualified_name)
+    for key_method in key_method_list[:service_config["prefetch_key_method_count"]]:
+        prefetcher.submit(("method_structure", key_method["qualified_name"]),
+                          lambda name=key_method["qualified_name"]: state.knowledge_service.api_method_structure(name))
+
+
+def get_single_flight_key(handler, request_json):
+    # 参数按key排序后序列化, 顺序不同的相同请求也能合并
+    return handler.__name__, json.dumps(request_json, sort_keys=True)
+
+
+def call_coalesced(handler, request_json):
+    """
+    同一个接口参数相同的并发请求只计算一次, 都返回这次的结果. 流式返回的接口不合并
+    :return: 见call_with_server_timing
+    """
+    if handler in STREAM_HANDLER_SET:
+        return call_in_foreground(handler, request_json)
+    return single_flight.do(get_single_flight_key(handler, request_json),
+                            lambda: call_in_foreground(handler, request_json))
+
+
+def call_in_foreground(handler, request_json):
+    """
+    前台请求处理期间后台预取暂停, 流式返回的结果取完之前一直算作前台请求
+    """
+    if prefetcher is None:
+        return call_with_server_timing(handler, request_json)
+    with prefetcher.foreground():
+        result, server_timing = call_with_server_timing(handler, request_json)
+        if isinstance(result, types.GeneratorType):
+            # 在退出这次的foreground之前进入新的, 中间后台不会开始任务
+            result = iter_in_context(result, prefetcher.foreground())
+    return result, server_timing
+
+
+def handle_request(handler):
+    profile_token = request.headers.get(ProfileTool.TOKEN_HEADER, request.args.get(ProfileTool.TOKEN_QUERY, None))
+    if profile_token is None:
+        result, server_timing = call_coalesced(handler, request.json)
+        response = make_response(to_response(result))
+        response.headers[ServerTiming.HEADER] = server_timing
+        response.headers[ServerTiming.ALLOW_ORIGIN_HEADER] = "*"
+        return response
+    result, status, headers = profile_handler(handler, request.json, profile_token,
+                                              request.args.get(ProfileTool.OUTPUT_QUERY, "report"))
+    response = make_response(to_response(result), status)
+    for name, value in headers.items():
+        response.headers[name] = value
+    return response
+
+
+@app.before_request
+def start_timer():
+    g.start_time = time.perf_counter()
+    cache_warmer.start()
+
+
+@app.after_request
+def observe_latency(response):
+    # 流式响应在取完最后一项时记录, 见iter_with_server_timing
+    if request.url_rule is not None and "start_time" in g and not response.is_streamed:
+        metrics.observe_request(request.url_rule.rule, time.perf_counter() - g.start_time)
+    return response
 
 
 @app.route('/')
@@ -38,144 +516,255 @@ def hello():
 # search doc info according to method name
 @app.route('/get_doc/', methods=["GET", "POST"])
 def doc_info():
-    if "qualified_name" not in request.json:
-        return "qualified name need"
-    qualified_name = test_api(request.json['qualified_name'])
-    node = graph_data.find_one_node_by_property(property_name="qualified_name", property_value=qualified_name)
-    result = doc_service.get_doc_info(node['id'])
-    return jsonify(result)
+    return handle_request(doc_info_handler)
 
 
 @app.route('/api_knowledge/', methods=["POST", "GET"])
 def api_knowledge():
-    if "qualified_name" not in request.json:
-        return "qualified_name need"
-    qualified_name = test_api(request.json['qualified_name'])
-    result = knowledge_service.get_knowledge(qualified_name)
-    return jsonify(result)
+    return handle_request(api_knowledge_handler)
 
 
 @app.route('/api_structure/', methods=["POST", "GET"])
 def api_structure():
-    if "qualified_name" not in request.json:
-        return "qualified_name need"
-    qualified_name = test_api(request.json['qualified_name'])
-    result = knowledge_service.api_base_structure(qualified_name)
-    return jsonify(result)
+    return handle_request(api_structure_handler)
 
 
 @app.route('/method_structure/', methods=["POST", "GET"])
 def method_structure():
-    if "qualified_name" not in request.json:
-        return "qualified_name need"
-    qualified_name = test_api(request.json['qualified_name'])
-    api_id = knowledge_service.get_api_id_by_name(qualified_name)
-    result = knowledge_service.get_api_methods(api_id, False)
-    return jsonify(result)
+    return handle_request(method_structure_handler)
 
 
 # return top5 key methods of specific class
 @app.route('/key_methods/', methods=["POST", "GET"])
 def key_methods():
-    if "qualified_name" not in request.json:
-        return "qualified_name need"
-    qualified_name = test_api(request.json['qualified_name'])
-    res = knowledge_service.get_key_methods(qualified_name)
-    return jsonify(res)
+    return handle_request(key_methods_handler)
 
 
 @app.route('/terminology/', methods=["POST", "GET"])
 def api_terminologies():
-    if "qualified_name" not in request.json:
-        return "qualified_name need"
-    qualified_name = test_api(request.json['qualified_name'])
-    terminology_list = knowledge_service.get_api_terminologies(qualified_name)
-    return jsonify(terminology_list)
+    return handle_request(api_terminologies_handler)
 
 
 # return sample code of specific class/method
 @app.route('/sample_code/', methods=['POST', 'GET'])
 def sample_code():
-    if 'qualified_name' not in request.json:
-        return 'qualified name need'
-    qualified_name = test_api(request.json['qualified_name'])
-    api_id = knowledge_service.get_api_id_by_name(qualified_name)
-    if api_id is -1:
-        return 'wrong qualified name'
-    sample_code = doc_service.get_sample_code(api_id)
-    if sample_code is None:
-        return "no sample code"
-    else:
-        return sample_code
+    return handle_request(sample_code_handler)
 
 
 # return result which api as parameter and returen value
 @app.route('/parameter_return_value/', methods=['POST', 'GET'])
 def parameter_return_value():
-    if 'qualified_name' not in request.json:
-        return 'qualified name need'
-    qualified_name = test_api(request.json['qualified_name'])
-    as_parameter_list = json_service.api_as_parameter(qualified_name)
-    as_return_value_list = json_service.api_as_return_value(qualified_name)
-
-    parameter_result = list()
-    for i in as_parameter_list:
-        info = dict()
-        node: NodeInfo = graph_data.find_one_node_by_property_value_starts_with(property_name="qualified_name",
-                                                                                property_value_starter=i[:i.rfind("(")])
-        info['qualified_name'] = i
-        if node is None:
-            info['sample_code'] = "No sample code available."
-        else:
-            info['sample_code'] = knowledge_service.get_one_sample_code(node['id'])
-        parameter_result.append(info)
-
-    return_value_result = list()
-    for i in as_return_value_list:
-        node: NodeInfo = graph_data.find_one_node_by_property_value_starts_with(property_name="qualified_name",
-                                                                                property_value_starter=i[:i.rfind("(")])
-        info = dict()
-        info['qualified_name'] = i
-        if node is None:
-            info['sample_code'] = "No sample code available."
-        else:
-            info['sample_code'] = knowledge_service.get_one_sample_code(node['id'])
-        return_value_result.append(info)
-    result = dict()
-    result['parameter'] = parameter_result
-    result['return_value'] = return_value_result
-    return jsonify(result)
+    return handle_request(parameter_return_value_handler)
 
 
 # return the constructor of the class
 @app.route('/constructor/', methods=['POST', 'GET'])
 def get_constructor():
-    if 'qualified_name' not in request.json:
-        return 'qualified name need'
-    qualified_name = test_api(request.json['qualified_name'])
-    res = knowledge_service.get_constructor(qualified_name)
-    return jsonify(res)
+    return handle_request(constructor_handler)
 
 
 # return related api
 @app.route('/related_api/', methods=['POST', 'GET'])
 def get_related_api():
-    if 'qualified_name' not in request.json:
-        return 'qualified name need'
-    qualified_name = test_api(request.json['qualified_name'])
-    res = knowledge_service.get_related_api(qualified_name)
-    return jsonify(res)
+    return handle_request(related_api_handler)
 
 
-def test_api(qualified_name):
-    if qualified_name.find("(") != -1:
-        return qualified_name
-    else:
-        if qualified_name in simple_qualified_name_map:
-            return simple_qualified_name_map[qualified_name]
+# return all sections of the class documentation in one request
+@app.route('/class_doc/', methods=['POST', 'GET'])
+def class_doc():
+    return handle_request(class_doc_handler)
+
+
+# return documentation of many classes or methods, one NDJSON line per name
+@app.route('/batch_doc/', methods=['POST'])
+def batch_doc():
+    return handle_request(batch_doc_handler)
+
+
+# return hit/miss counters of the response cache
+@app.route('/cache_stats/', methods=['GET'])
+def cache_stats():
+    return to_response(cache_stats_handler(None))
+
+
+# return load time and estimated memory of every shared artifact in this process
+@app.route('/artifacts/', methods=['GET'])
+def artifacts():
+    return to_response(artifacts_handler(None))
+
+
+# readiness probe: 200 once the cache warm-up reached warmup_ready_threshold, 503 before
+@app.route('/ready', methods=['GET'])
+def ready():
+    result, status = ready_handler(None)
+    return make_response(jsonify(result), status)
+
+
+# reload graph and doc versions without downtime: POST starts a reload, GET returns current versions and status
+@app.route('/admin/reload/', methods=['GET', 'POST'])
+def admin_reload():
+    if request.method == 'GET':
+        return to_response(reload_status_handler(None))
+    result, status = admin_reload_handler(request.get_json(silent=True), request.headers.get(ADMIN_TOKEN_HEADER, None))
+    return make_response(to_response(result), status)
+
+
+# return latency histograms of every route and processing stage in prometheus text format
+@app.route('/metrics', methods=['GET'])
+def metrics_text():
+    return Response(metrics.render(), mimetype=METRICS_CONTENT_TYPE)
+
+
+def test_api(qualified_name, state: ServiceState):
+    """
+    :param state: 请求开始时取的ServiceState, 名字的解析和之后的计算使用同一个版本
+    """
+    with metrics.stage("name_resolution"):
+        if qualified_name.find("(") != -1:
+            return qualified_name
         else:
+            if qualified_name in state.simple_qualified_name_map:
+                return state.simple_qualified_name_map[qualified_name]
+            # 不在类名映射中时, 按方法签名(不带参数)查找重载取第一个, 简单名只接受唯一的匹配
+            api_id = state.knowledge_service.resolve_api_id(qualified_name)
+            if api_id != -1:
+                return state.graph_data.get_node_info_dict(api_id)["properties"]["qualified_name"]
             return "Do Not Find API"
 
 
+def warm_up(qualified_name):
+    # 名称解析和类的结构都会进入缓存
+    state = service_holder.get()
+    state.knowledge_service.api_base_structure(test_api(qualified_name, state))
+
+
+popular_name_list = []
+if service_config.get("warmup", False):
+    popular_name_list = [item["qualified_name"] for item in
+                         QueryRecorder.load(popular_query_path)[:service_config["warmup_top_n"]]]
+# 在每个worker进程中第一次请求(Flask)或启动事件(ASGI)时开始预热, gunicorn --preload时不能在导入时启动
+cache_warmer = CacheWarmer(warm_up, popular_name_list, ready_threshold=service_config["warmup_ready_threshold"])
+
+reload_status_lock = threading.Lock()
+reload_status = {"reloading": False, "last_error": None, "last_seconds": None, "drained": None}
+
+
+def reload_service(graph_version, doc_version):
+    """
+    不停机切换图和文档的版本: 在旧版本旁边加载新版本并按热门查询预热, 原子地切换之后的请求,
+    等旧版本上的请求结束(最多reload_drain_seconds秒)后释放旧版本的产物, 并使旧版本的缓存失效.
+    加载失败时旧版本继续服务
+    :return: 旧版本上的请求是否已全部结束
+    """
+    # 文件(包括不分版本的json数据和类名映射)在加载之后重新生成过的产物从注册表中移除以重新加载,
+    # 旧版本的service仍然持有原来的产物
+    artifact_registry.release_outdated()
+    new_state = build_service_state(graph_version, doc_version)
+
+    def warm_up_new_state(qualified_name):
+        with service_holder.bind(new_state):
+            warm_up(qualified_name)
+
+    reload_warmer = CacheWarmer(warm_up_new_state, popular_name_list, ready_threshold=1.0).start()
+    reload_warmer.join()
+
+    old_state, drained = service_holder.swap(new_state, service_config.get("reload_drain_seconds", 60))
+    for name in old_state.artifact_name_list:
+        if name not in new_state.artifact_name_list:
+            artifact_registry.release(name)
+    for version in old_state.cache_version_list:
+        if version not in new_state.cache_version_list:
+            response_cache.invalidate_version(version)
+    if drained and old_state.knowledge_service.method_executor is not None:
+        old_state.knowledge_service.method_executor.shutdown(wait=False)
+    print("switch from {}/{} to {}/{}, drained: {}".format(old_state.graph_version, old_state.doc_version,
+                                                           graph_version, doc_version, drained))
+    return drained
+
+
+def run_reload(graph_version=None, doc_version=None):
+    """
+    :param graph_version: 为None时从service_config.json重新读取, doc_version同
+    """
+    start = time.time()
+    try:
+        if graph_version is None or doc_version is None:
+            with open(definitions.SERVICE_CONFIG_PATH, 'r') as f:
+                new_config = json.load(f)
+            graph_version = graph_version or new_config["graph_version"]
+            doc_version = doc_version or new_config["doc_version"]
+        drained = reload_service(graph_version, doc_version)
+        with reload_status_lock:
+            reload_status["drained"] = drained
+            reload_status["last_error"] = None
+    except Exception as e:
+        with reload_status_lock:
+            reload_status["last_error"] = repr(e)
+        print("reload {}/{} failed".format(graph_version, doc_version))
+        traceback.print_exc()
+    finally:
+        with reload_status_lock:
+            reload_status["last_seconds"] = time.time() - start
+            reload_status["reloading"] = False
+
+
+def start_reload(graph_version=None, doc_version=None):
+    """
+    在后台线程中重新加载, 参数见run_reload
+    :return: 是否开始了重新加载, 正在重新加载时返回False
+    """
+    with reload_status_lock:
+        if reload_status["reloading"]:
+            return False
+        reload_status["reloading"] = True
+    threading.Thread(target=run_reload, args=(graph_version, doc_version), name="service_reload",
+                     daemon=True).start()
+    return True
+
+
+def reload_status_handler(request_json):
+    state = service_holder.get()
+    result = {"graph_version": state.graph_version, "doc_version": state.doc_version}
+    with reload_status_lock:
+        result.update(reload_status)
+    return result
+
+
+def admin_reload_handler(request_json, admin_token):
+    """
+    :param request_json: 可以指定graph_version和doc_version, 不指定时从service_config.json读取
+    :return: (结果, 状态码), 没有配置admin_token或token不对时返回403, 开始重新加载返回202, 正在重新加载返回409
+    """
+    configured_token = service_config.get("admin_token", "")
+    if not configured_token or admin_token is None or not hmac.compare_digest(str(configured_token),
+                                                                              str(admin_token)):
+        return 'wrong admin token', 403
+    request_json = request_json or dict()
+    if not start_reload(request_json.get("graph_version", None), request_json.get("doc_version", None)):
+        return reload_status_handler(None), 409
+    return reload_status_handler(None), 202
+
+
+reload_signal_event = threading.Event()
+
+
+def reload_on_signal(signum, frame):
+    # 信号处理函数在主线程的字节码之间运行, 主线程可能正持有reload_status_lock, 这里只设置标记
+    reload_signal_event.set()
+
+
+def watch_reload_signal():
+    while True:
+        reload_signal_event.wait()
+        reload_signal_event.clear()
+        start_reload()
+
+
+# kill -USR2 <worker pid> 按service_config.json中的版本重新加载, 只能在主线程中注册
+if hasattr(signal, "SIGUSR2") and threading.current_thread() is threading.main_thread():
+    threading.Thread(target=watch_reload_signal, name="reload_signal_watcher", daemon=True).start()
+    signal.signal(signal.SIGUSR2, reload_on_signal)
+
+
 if __name__ == '__main__':
     app.run()
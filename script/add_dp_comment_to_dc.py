@@ -5,6 +5,8 @@ from sekg.graph.exporter.graph_data import NodeInfo
 import json
 from definitions import OUTPUT_DIR
 from pathlib import Path
+from project.index_module.name_index import NameIndex
+from project.index_module.prefix_index import PrefixIndex
 
 '''
 doc文件增加dp_comment
@@ -20,6 +22,8 @@ qualified_name_json_file = Path(OUTPUT_DIR) / "json" / "mid_2_qualified_name.jso
 if __name__ == '__main__':
     doc_collection: MultiFieldDocumentCollection = MultiFieldDocumentCollection.load(dc_file_location)
     graph_data: GraphData = GraphData.load(graph_data_file_location)
+    name_index = NameIndex(graph_data)
+    prefix_index = PrefixIndex(graph_data)
 
     comment_list = []
     comments = open(comment_json_file, 'r').readlines()
@@ -35,12 +39,15 @@ if __name__ == '__main__':
     # 根据qualified name找到graph data对应节点的api_id, 然后通过这个api_id找到doc_collection中对应的doc, 插入field和相应信息
     for item in qualified_name_list:
         qualified_name = item['qname']
-        node: NodeInfo = graph_data.find_one_node_by_property(property_name='qualified_name', property_value=qualified_name)
+        node: NodeInfo = None
+        api_id = name_index.get_id(qualified_name)
+        if api_id != -1:
+            node = graph_data.get_node_info_dict(api_id)
         if node is None:
             qualified_name_without_para = qualified_name[:qualified_name.find('(')]
-            nodes = graph_data.find_nodes_by_property_value_starts_with(property_name='qualified_name', property_value_starter=qualified_name_without_para)
-            if len(nodes) is not 0:
-                node = nodes[0]
+            node_ids = prefix_index.find_ids(qualified_name_without_para)
+            if len(node_ids) != 0:
+                node = graph_data.get_node_info_dict(node_ids[0])
             if node is not None:
                 doc_collection.add_field_to_doc(doc_id=node['id'], field_name='dp_comment', value=comment_list[item['mid'] - 1]['nl'])
     doc_collection.save(dc_file_destination)
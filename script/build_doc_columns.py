@@ -0,0 +1,26 @@
+import json
+
+import definitions
+from project.storage_module.column_doc_collection import ColumnDocCollection
+from project.utils.path_util import PathUtil
+from sekg.ir.doc.wrapper import MultiFieldDocumentCollection
+
+'''
+把服务使用的doc文件(service_config.json中的doc_version)转成按字段分列的存储, 每个字段一个文件.
+列存储存在时服务从它加载文档集合, 字段第一次被访问时才读入内存. doc文件更新后需要重新构建
+'''
+
+# 服务读取的字段
+field_list = ['full_description', 'full_html_description', 'sentence_description', 'short_description',
+              'dp_comment', 'sample_code', 'sample_code_cluster', 'functionality_list', 'directive_list']
+
+if __name__ == '__main__':
+    with open(definitions.SERVICE_CONFIG_PATH, 'r') as f:
+        service_config = json.load(f)
+    pro_name = service_config["pro_name"]
+    doc_version = service_config["doc_version"]
+    doc_collection: MultiFieldDocumentCollection = MultiFieldDocumentCollection.load(
+        PathUtil.doc(pro_name=pro_name, version=doc_version))
+    column_path = PathUtil.doc_columns(pro_name=pro_name, version=doc_version)
+    ColumnDocCollection.write(doc_collection.get_document_list(), field_list, column_path)
+    print("write {} fields: {}".format(len(field_list), column_path))
@@ -0,0 +1,12 @@
+from project.json_service import mid_to_method_info_json_path, mid_to_qualified_name_json_path
+from project.storage_module.jsonl_offset_index import JsonLinesOffsetIndex
+
+'''
+为JsonService使用的jsonl文件构建行偏移索引(<文件名>.idx), 服务运行时内存映射读取, 不再逐行解析
+jsonl文件更新后需要重新构建, 服务启动时发现索引比数据文件旧也会自动重建
+'''
+
+if __name__ == '__main__':
+    for path in [mid_to_method_info_json_path, mid_to_qualified_name_json_path]:
+        index_path = JsonLinesOffsetIndex.build(path)
+        print("build {} lines: {}".format(len(JsonLinesOffsetIndex(path)), index_path))
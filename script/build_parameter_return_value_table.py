@@ -0,0 +1,19 @@
+import json
+
+from project.json_service import JsonService, api_to_parameter_return_value_json_path
+
+'''
+预先解析每个api的样例方法签名, 保存api作为参数类型和返回值类型出现的mid列表,
+/parameter_return_value/接口直接查表, 不再每次请求都解析
+'''
+
+if __name__ == '__main__':
+    json_service = JsonService()
+    api_to_usage = dict()
+    for index, qualified_name in enumerate(json_service.api_to_mid):
+        api_to_usage[qualified_name] = json_service.build_usage(qualified_name)
+        if (index + 1) % 1000 == 0:
+            print("parsed {} apis".format(index + 1))
+    with open(str(api_to_parameter_return_value_json_path), 'w') as f:
+        json.dump(api_to_usage, f)
+    print("save {} apis to {}".format(len(api_to_usage), api_to_parameter_return_value_json_path))
@@ -0,0 +1,33 @@
+import json
+
+import definitions
+from project.artifact_registry import artifact_registry
+from project.json_service import JsonService
+from project.utils.path_util import PathUtil
+
+'''
+按service_config.json加载服务需要的全部产物(图, 文档集合, 名称/前缀/关系索引, 类名映射, json样例代码数据),
+写成一个快照文件. service_config.json中use_snapshot为true时, run.py启动时从快照中反序列化这些产物, 不再解析原始文件和构建索引.
+启动时间仍然随图的大小增长(图所在的分组在启动时整个反序列化), 快照省去的是解析和建索引的时间.
+图, 文档或json数据更新后需要重新构建快照
+'''
+
+if __name__ == '__main__':
+    with open(definitions.SERVICE_CONFIG_PATH, 'r') as f:
+        service_config = json.load(f)
+    pro_name = service_config["pro_name"]
+    graph_version = service_config["graph_version"]
+    doc_version = service_config["doc_version"]
+
+    artifact_registry.graph_data(pro_name, graph_version)
+    artifact_registry.name_index(pro_name, graph_version)
+    artifact_registry.prefix_index(pro_name, graph_version)
+    artifact_registry.relation_index(pro_name, graph_version)
+    artifact_registry.doc_collection(pro_name, doc_version)
+    artifact_registry.simple_qualified_name_map()
+    JsonService(artifact_registry)
+
+    snapshot_path = PathUtil.service_snapshot(pro_name, graph_version, doc_version)
+    meta = {"pro_name": pro_name, "graph_version": graph_version, "doc_version": doc_version}
+    artifact_registry.save_snapshot(snapshot_path, meta)
+    print("write {} artifacts: {}".format(len(artifact_registry.get_artifact_names()), snapshot_path))
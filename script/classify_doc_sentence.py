@@ -0,0 +1,46 @@
+from project.utils.path_util import PathUtil
+from sekg.ir.doc.wrapper import MultiFieldDocumentCollection, MultiFieldDocument
+from project.knowledge_service import KnowledgeService
+from script.classify_sentence import FastTextClassifier
+
+'''
+离线对doc文件中每个api的注释(full_description, 没有时使用dp_comment)分句并分类,
+结果写入functionality_list和directive_list字段, 服务直接读取这两个字段, 不再加载fastText模型.
+service_config.json中的doc_version为输出的版本, 启动服务前需要运行一次:
+python -m script.classify_doc_sentence
+'''
+
+pro_name = 'jabref'
+doc_collection_path = PathUtil.doc(pro_name=pro_name, version='v3.3')
+doc_collection_save_path = PathUtil.doc(pro_name=pro_name, version='v3.4')
+batch_size = 1000
+
+
+def classify_document_list(document_list, classifier, batch_size=1000):
+    """
+    每batch_size个文档的句子一起调用一次classifier.predict_list, 结果按句子数切回每个文档
+    """
+    for start in range(0, len(document_list), batch_size):
+        doc_batch = document_list[start:start + batch_size]
+        doc_2_sentence_list = []
+        all_sentence_list = []
+        for doc in doc_batch:
+            comment = KnowledgeService.get_doc_info_from_doc(doc)['comment']
+            sentence_list = KnowledgeService.split_comment_sentence(comment)
+            doc_2_sentence_list.append((doc, sentence_list))
+            all_sentence_list.extend(sentence_list)
+        all_label_list = classifier.predict_list(all_sentence_list)
+        index = 0
+        for doc, sentence_list in doc_2_sentence_list:
+            label_list = all_label_list[index:index + len(sentence_list)]
+            index += len(sentence_list)
+            fun_dir = KnowledgeService.build_directive_and_functionality(sentence_list, label_list)
+            doc.add_field(field_name='functionality_list', field_document=fun_dir['functionality_list'])
+            doc.add_field(field_name='directive_list', field_document=fun_dir['directive_list'])
+        print('classified {} / {} docs'.format(start + len(doc_batch), len(document_list)))
+
+
+if __name__ == '__main__':
+    doc_collection: MultiFieldDocumentCollection = MultiFieldDocumentCollection.load(doc_collection_path)
+    classify_document_list(doc_collection.get_document_list(), FastTextClassifier(), batch_size)
+    doc_collection.save(doc_collection_save_path)
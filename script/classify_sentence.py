@@ -25,6 +25,8 @@ from definitions import DATA_DIR, OUTPUT_DIR
 class PreprocessData:
     def __init__(self, data_path=None):
         self.__init__path()
+        self.tokenizer = WordPunctTokenizer()
+        self.stop_word_set = None
         self.data_path = data_path
         if not data_path:
             self.data_path = str(self.data_dir / 'annotation_sentence_vote_valid.json')
@@ -70,11 +72,12 @@ class PreprocessData:
         :return:
         """
         # print("start remove stop words")
-        words = WordPunctTokenizer().tokenize(sentence)
-        st = stopwords.words('english')
+        words = self.tokenizer.tokenize(sentence)
+        if self.stop_word_set is None:
+            self.stop_word_set = set(stopwords.words('english'))
         str_list = []
         for token in words:
-            if token not in st:
+            if token not in self.stop_word_set:
                 str_list.append(token)
         return " ".join(str_list)
 
@@ -169,6 +172,18 @@ class FastTextClassifier:
         # 打印预测标签
         return int(label[0][-1])
 
+    def predict_list(self, text_list):
+        """
+        batch version of predict, all the sentences are classified in one call of the model
+        :param text_list: a list of str query
+        :return: predicted labels, in the same order as text_list
+        """
+        if len(text_list) == 0:
+            return []
+        pre_data_list = [self.preprocessor.remove_stop_words(self.preprocessor.remove_sign(text)) for text in text_list]
+        label_list, probability_list = self.classifier.predict(pre_data_list)
+        return [int(label[0][-1]) for label in label_list]
+
 
 if __name__ == "__main__":
     classifier = FastTextClassifier()
@@ -4,6 +4,8 @@ from sekg.ir.doc.wrapper import MultiFieldDocument, MultiFieldDocumentCollection
 import json
 import definitions
 from pathlib import Path
+from project.index_module.name_index import NameIndex
+from project.index_module.prefix_index import PrefixIndex
 
 pro_name = 'jabref'
 graph_data_path = PathUtil.graph_data(pro_name=pro_name, version='v3.9')
@@ -13,18 +15,19 @@ api_to_example_json_path = Path(definitions.ROOT_DIR) / "output" / "json" / "api
 mid_to_method_info_json_path = Path(definitions.ROOT_DIR) / "output" / "json" / "mid_2_method_info_without_comment.json"
 graph_data: GraphData = GraphData.load(graph_data_path)
 doc_collection: MultiFieldDocumentCollection = MultiFieldDocumentCollection.load(doc_collection_path)
+name_index = NameIndex(graph_data)
+prefix_index = PrefixIndex(graph_data)
 
 '''
 doc文件抽取样例代码
 '''
 
 def find_doc(qualified_name):
-    node: NodeInfo = graph_data.find_one_node_by_property(property_name='qualified_name', property_value=qualified_name)
-    if node is None:
-        node: NodeInfo = graph_data.find_one_node_by_property_value_starts_with(property_name='qualified_name', property_value_starter=qualified_name)
+    api_id = name_index.get_id(qualified_name)
+    if api_id == -1:
+        api_id = prefix_index.find_one_id(qualified_name)
     doc = None
-    if node is not None:
-        api_id = node['id']
+    if api_id != -1:
         doc: MultiFieldDocument = doc_collection.get_by_id(api_id)
     return doc
 
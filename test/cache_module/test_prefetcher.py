@@ -0,0 +1,57 @@
+import threading
+
+from project.cache_module.prefetcher import Prefetcher
+
+
+def test_run_and_skip_duplicate():
+    prefetcher = Prefetcher(max_queue_size=4, cpu_budget=1)
+    result_list = []
+    assert prefetcher.submit(("api_structure", "a.B"), lambda: result_list.append("a.B"))
+    assert not prefetcher.submit(("api_structure", "a.B"), lambda: result_list.append("a.B"))
+    prefetcher.join()
+    assert result_list == ["a.B"]
+    assert prefetcher.stats()["run"] == 1
+
+
+def test_wait_for_foreground_and_drop_when_full():
+    prefetcher = Prefetcher(max_queue_size=1, cpu_budget=1)
+    release = threading.Event()
+    result_list = []
+    with prefetcher.foreground():
+        prefetcher.submit("block", lambda: release.wait(5))
+        # 第一个任务被取出后在等待前台结束, 队列中还能放一个
+        while prefetcher.stats()["queue"] > 0:
+            pass
+        assert prefetcher.submit("a.B", lambda: result_list.append("a.B"))
+        assert not prefetcher.submit("a.C", lambda: result_list.append("a.C"))
+        assert result_list == []
+    release.set()
+    prefetcher.join()
+    assert result_list == ["a.B"]
+    assert prefetcher.stats()["drop"] == 1
+
+
+def test_error_does_not_stop_worker():
+    prefetcher = Prefetcher(max_queue_size=4, cpu_budget=1)
+    result_list = []
+    prefetcher.submit("error", lambda: 1 / 0)
+    prefetcher.submit("a.B", lambda: result_list.append("a.B"))
+    prefetcher.join()
+    assert result_list == ["a.B"]
+    assert prefetcher.stats()["error"] == 1
+
+
+def test_worker_started_in_forked_process():
+    import os
+    prefetcher = Prefetcher(max_queue_size=4, cpu_budget=1)
+    prefetcher.submit("parent", lambda: None)
+    prefetcher.join()
+    pid = os.fork()
+    if pid == 0:
+        # 子进程中没有父进程的线程, 第一次submit时启动自己的线程
+        result_list = []
+        prefetcher.submit("child", lambda: result_list.append("child"))
+        prefetcher.join()
+        os._exit(0 if result_list == ["child"] else 1)
+    _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 0
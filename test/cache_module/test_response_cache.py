@@ -0,0 +1,75 @@
+from project.cache_module.response_cache import ResponseCache
+
+
+def test_hit_and_miss_counter():
+    cache = ResponseCache(max_size=4)
+    compute_count = []
+
+    def compute():
+        compute_count.append(1)
+        return {"methods": []}
+
+    key = ("v3.10", "org.jabref.model.entry.BibEntry", "api_structure")
+    assert cache.get_or_compute(key, compute) == {"methods": []}
+    assert cache.get_or_compute(key, compute) == {"methods": []}
+    assert len(compute_count) == 1
+    stats = cache.stats()
+    assert stats["hit"] == 1
+    assert stats["miss"] == 1
+
+
+def test_lru_eviction_by_size():
+    cache = ResponseCache(max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+    assert cache.stats()["evict"] == 1
+
+
+def test_eviction_by_memory():
+    cache = ResponseCache(max_size=100, max_memory=3000)
+    cache.put("a", "x" * 1000)
+    cache.put("b", "x" * 1000)
+    cache.put("c", "x" * 1000)
+    assert "a" not in cache
+    assert cache.stats()["memory"] <= 3000
+    cache.put("too large", "x" * 5000)
+    assert "too large" not in cache
+
+
+def test_peek_does_not_count_miss():
+    cache = ResponseCache(max_size=2)
+    assert cache.peek("a") is None
+    cache.put("a", 1)
+    assert cache.peek("a") == 1
+    stats = cache.stats()
+    assert stats["hit"] == 1
+    assert stats["miss"] == 0
+
+
+def test_shared_store_between_workers(tmp_path):
+    from project.storage_module.mmap_kv_store import MmapKVStore
+    path = tmp_path / "response_cache.mmap"
+    cache = ResponseCache(max_size=2, shared_store=MmapKVStore(path, capacity=64 * 1024, slot_count=64))
+    other_cache = ResponseCache(max_size=2, shared_store=MmapKVStore(path, capacity=64 * 1024, slot_count=64))
+    key = ("v3.10", "org.jabref.model.entry.BibEntry", "api_structure")
+    cache.get_or_compute(key, lambda: {"methods": []})
+    assert other_cache.peek(key) == {"methods": []}
+    assert key in other_cache
+    assert other_cache.stats()["shared_hit"] == 1
+    third_cache = ResponseCache(max_size=2, shared_store=MmapKVStore(path, capacity=64 * 1024, slot_count=64))
+    assert third_cache.peek(key, local_only=True) is None
+    assert key not in third_cache
+
+
+def test_invalidate_version():
+    cache = ResponseCache(max_size=4)
+    cache.put(("v3.10", "org.jabref.model.entry.BibEntry", "api_structure"), {"methods": []})
+    cache.put(("v3.11", "org.jabref.model.entry.BibEntry", "api_structure"), {"methods": ["getId()"]})
+    assert cache.invalidate_version("v3.10") == 1
+    assert ("v3.10", "org.jabref.model.entry.BibEntry", "api_structure") not in cache
+    assert ("v3.11", "org.jabref.model.entry.BibEntry", "api_structure") in cache
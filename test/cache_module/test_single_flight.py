@@ -0,0 +1,43 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from project.cache_module.single_flight import SingleFlight
+
+
+def test_concurrent_calls_are_coalesced():
+    single_flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    compute_count = []
+
+    def compute():
+        compute_count.append(1)
+        started.set()
+        release.wait(5)
+        return {"methods": []}
+
+    key = ("/api_structure/", '{"qualified_name": "org.jabref.model.entry.BibEntry"}')
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        leader = executor.submit(single_flight.do, key, compute)
+        started.wait(5)
+        follower_list = [executor.submit(single_flight.do, key, compute) for i in range(3)]
+        while single_flight.stats()["coalesced"] < 3:
+            pass
+        release.set()
+        result_list = [leader.result()] + [follower.result() for follower in follower_list]
+    assert len(compute_count) == 1
+    assert all(result is result_list[0] for result in result_list)
+    assert single_flight.stats() == {"in_flight": 0, "call": 1, "coalesced": 3}
+
+
+def test_error_is_shared_and_key_released():
+    single_flight = SingleFlight()
+
+    def compute():
+        raise ValueError("can't find api by name")
+
+    with pytest.raises(ValueError):
+        single_flight.do("key", compute)
+    assert single_flight.do("key", lambda: 1) == 1
@@ -0,0 +1,58 @@
+from project.cache_module.warmup import QueryRecorder, CacheWarmer
+
+
+def test_recorder_merges_ranked_counts(tmp_path):
+    path = tmp_path / "jabref.popular_query.json"
+    recorder = QueryRecorder(path, flush_seconds=3600)
+    for name in ["a.B", "a.C", "a.B"]:
+        recorder.record(name)
+    recorder.flush()
+    other_recorder = QueryRecorder(path, flush_seconds=3600)
+    other_recorder.record("a.C")
+    other_recorder.record("a.C")
+    other_recorder.flush()
+    assert QueryRecorder.load(path) == [{"qualified_name": "a.C", "count": 3}, {"qualified_name": "a.B", "count": 2}]
+
+
+def test_warmer_ready_after_threshold():
+    warmed_list = []
+
+    def warm(qualified_name):
+        if qualified_name == "a.D":
+            raise KeyError(qualified_name)
+        warmed_list.append(qualified_name)
+
+    warmer = CacheWarmer(warm, ["a.B", "a.C", "a.D", "a.E"], ready_threshold=0.5)
+    assert not warmer.is_ready()
+    warmer.start().join(5)
+    assert warmer.is_ready()
+    assert warmed_list == ["a.B", "a.C", "a.E"]
+    assert warmer.stats()["error"] == 1
+
+
+def test_empty_list_is_ready():
+    assert CacheWarmer(lambda name: None, []).is_ready()
+
+
+def test_warmer_not_started_until_start():
+    warmed_list = []
+    warmer = CacheWarmer(warmed_list.append, ["a.B"], ready_threshold=1.0)
+    assert warmer.stats()["warmed"] == 0
+    assert not warmer.is_ready()
+    # 同一个进程中重复调用start只预热一次
+    warmer.start().join(5)
+    warmer.start().join(5)
+    assert warmed_list == ["a.B"]
+
+
+def test_warmer_restarts_in_forked_process():
+    import os
+    warmed_list = []
+    warmer = CacheWarmer(warmed_list.append, ["a.B", "a.C"], ready_threshold=1.0)
+    warmer.start().join(5)
+    pid = os.fork()
+    if pid == 0:
+        warmer.start().join(5)
+        os._exit(0 if warmed_list == ["a.B", "a.C", "a.B", "a.C"] and warmer.is_ready() else 1)
+    _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 0
@@ -0,0 +1,41 @@
+"""
+文档和fastText分类器的替身, test_knowledge_service.py和test_classify_doc_sentence.py共用
+"""
+
+
+class FakeDocument:
+    def __init__(self, doc_id, field_2_text):
+        self.id = doc_id
+        self.field_2_text = field_2_text
+
+    def get_doc_text_by_field(self, field_name):
+        # 和sekg的MultiFieldDocument一样, 没有的字段返回""
+        return self.field_2_text.get(field_name, "")
+
+    def add_field(self, field_name, field_document):
+        self.field_2_text[field_name] = field_document
+
+
+class FakeDocCollection:
+    def __init__(self, document_list=()):
+        self.id_2_document = {doc.id: doc for doc in document_list}
+
+    def get_by_id(self, doc_id):
+        return self.id_2_document.get(doc_id, None)
+
+
+class StubClassifier:
+    """
+    按句子内容给出标签, 记录每次predict_list的输入
+    """
+
+    def __init__(self):
+        self.call_list = []
+
+    @staticmethod
+    def get_label(sentence):
+        return 1 if sentence.strip().startswith("Returns") else 2
+
+    def predict_list(self, sentence_list):
+        self.call_list.append(list(sentence_list))
+        return [self.get_label(sentence) for sentence in sentence_list]
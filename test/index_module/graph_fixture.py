@@ -0,0 +1,43 @@
+class FakeGraphData:
+    """
+    只实现索引构建用到的GraphData读接口, 方便在没有图文件的情况下测试
+    """
+
+    def __init__(self, node_list, relation_list=()):
+        self.nodes = {node["id"]: node for node in node_list}
+        self.relations = set(relation_list)
+
+    def get_node_ids(self):
+        return set(self.nodes.keys())
+
+    def get_node_info_dict(self, node_id):
+        return self.nodes.get(node_id)
+
+    def find_nodes_by_ids(self, *ids):
+        return [self.nodes[node_id] for node_id in ids if node_id in self.nodes]
+
+    def get_all_out_relations(self, node_id):
+        return {r for r in self.relations if r[0] == node_id}
+
+    def get_all_in_relations(self, node_id):
+        return {r for r in self.relations if r[2] == node_id}
+
+
+def make_node(node_id, qualified_name, labels=("method",)):
+    return {"id": node_id, "labels": set(labels), "properties": {"qualified_name": qualified_name}}
+
+
+def jabref_graph():
+    return FakeGraphData([
+        make_node(1, "org.jabref.model.entry.BibEntry", ("class",)),
+        make_node(2, "org.jabref.model.entry.BibEntry.getField(String)"),
+        make_node(3, "org.jabref.model.entry.BibEntry.getField(Field)"),
+        make_node(4, "org.jabref.model.entry.BibEntry.setField(Field,String)"),
+        make_node(5, "org.jabref.model.entry.BibEntryType", ("class",)),
+        {"id": 6, "labels": {"terminology"}, "properties": {"terminology_name": "entry"}},
+    ], [
+        (2, "belong to", 1),
+        (3, "belong to", 1),
+        (4, "belong to", 1),
+        (1, "has terminology", 6),
+    ])
@@ -0,0 +1,27 @@
+from project.index_module.name_index import NameIndex
+from test.index_module.graph_fixture import jabref_graph
+
+
+def test_exact_lookup():
+    name_index = NameIndex(jabref_graph())
+    assert name_index.get_id("org.jabref.model.entry.BibEntry") == 1
+    assert name_index.get_id("org.jabref.model.entry.BibEntry.getField(Field)") == 3
+    assert name_index.get_id("org.jabref.model.entry.Missing") == -1
+
+
+def test_overload_lookup():
+    name_index = NameIndex(jabref_graph())
+    assert name_index.get_ids("org.jabref.model.entry.BibEntry.getField") == [2, 3]
+    assert name_index.get_ids("getField") == [2, 3]
+    assert name_index.get_ids("BibEntry") == [1]
+    assert name_index.get_ids("org.jabref.model.entry.BibEntry.setField(Field,String)") == [4]
+    assert name_index.get_ids("entry") == []
+
+
+def test_resolve_id():
+    name_index = NameIndex(jabref_graph())
+    assert name_index.resolve_id("org.jabref.model.entry.BibEntry.getField") == 2
+    assert name_index.resolve_id("BibEntry") == 1
+    # 有多个重载的简单名有歧义, 不取id最小的一个
+    assert name_index.resolve_id("getField") == -1
+    assert name_index.resolve_id("entry") == -1
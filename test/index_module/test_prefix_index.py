@@ -0,0 +1,15 @@
+from project.index_module.prefix_index import PrefixIndex
+from test.index_module.graph_fixture import jabref_graph
+
+
+def test_find_ids_by_prefix():
+    prefix_index = PrefixIndex(jabref_graph())
+    assert prefix_index.find_ids("org.jabref.model.entry.BibEntry.getField") == [2, 3]
+    assert prefix_index.find_ids("org.jabref.model.entry.BibEntry") == [1, 2, 3, 4, 5]
+    assert prefix_index.find_ids("org.jabref.gui") == []
+
+
+def test_find_one_id_by_prefix():
+    prefix_index = PrefixIndex(jabref_graph())
+    assert prefix_index.find_one_id("org.jabref.model.entry.BibEntry.set") == 4
+    assert prefix_index.find_one_id("org.jabref.logic") == -1
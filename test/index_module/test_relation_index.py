@@ -0,0 +1,17 @@
+from project.index_module.relation_index import RelationIndex
+from test.index_module.graph_fixture import jabref_graph
+
+
+def test_directed_lookup():
+    relation_index = RelationIndex(jabref_graph())
+    assert relation_index.get_in_ids(1, "belong to") == [2, 3, 4]
+    assert relation_index.get_out_ids(2, "belong to") == [1]
+    assert relation_index.get_out_ids(1, "belong to") == []
+    assert relation_index.get_out_ids(1, "has terminology") == [6]
+
+
+def test_neighbour_lookup():
+    relation_index = RelationIndex(jabref_graph())
+    assert relation_index.get_neighbour_ids(1, "has terminology") == [6]
+    assert relation_index.get_neighbour_ids(6, "has terminology") == [1]
+    assert relation_index.get_neighbour_ids(1, "has concept") == []
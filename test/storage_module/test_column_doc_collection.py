@@ -0,0 +1,44 @@
+import pickle
+
+from project.storage_module.column_doc_collection import ColumnDocCollection
+
+
+class FakeDocument:
+    def __init__(self, doc_id, field_2_text):
+        self.id = doc_id
+        self.field_2_text = field_2_text
+
+    def get_doc_text_by_field(self, field_name):
+        # 和sekg的MultiFieldDocument一样, 没有的字段返回""
+        return self.field_2_text.get(field_name, "")
+
+
+def build_collection(path):
+    document_list = [
+        FakeDocument(1, {"full_description": "Represents a BibTeX entry.", "sample_code": ["// a", "// b"]}),
+        FakeDocument(2, {"full_description": "", "full_html_description": "<p></p>"}),
+    ]
+    ColumnDocCollection.write(document_list, ["full_description", "full_html_description", "sample_code"], path)
+    return ColumnDocCollection(path)
+
+
+def test_lazy_field_loading(tmp_path):
+    doc_collection = build_collection(tmp_path / "jabref.v3.4.dc.columns")
+    assert doc_collection.get_num() == 2
+    assert doc_collection.get_loaded_fields() == []
+    doc = doc_collection.get_by_id(1)
+    assert doc.get_doc_text_by_field("full_description") == "Represents a BibTeX entry."
+    assert doc_collection.get_loaded_fields() == ["full_description"]
+    assert doc.get_doc_text_by_field("sample_code") == ["// a", "// b"]
+    assert doc.get_doc_text_by_field("full_html_description") == ""
+    assert doc.get_doc_text_by_field("dp_comment") == ""
+    assert doc_collection.get_by_id(3) is None
+    assert [doc.id for doc in doc_collection.get_document_list()] == [1, 2]
+
+
+def test_pickle_keeps_only_path(tmp_path):
+    doc_collection = build_collection(tmp_path / "jabref.v3.4.dc.columns")
+    doc_collection.get_column("full_description")
+    restored = pickle.loads(pickle.dumps(doc_collection))
+    assert restored.get_loaded_fields() == []
+    assert restored.get_by_id(2).get_doc_text_by_field("full_html_description") == "<p></p>"
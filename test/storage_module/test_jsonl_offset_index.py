@@ -0,0 +1,33 @@
+import json
+import os
+
+import pytest
+
+from project.storage_module.jsonl_offset_index import JsonLinesOffsetIndex
+
+
+def write_json_lines(path, obj_list):
+    with open(str(path), "w") as f:
+        for obj in obj_list:
+            f.write(json.dumps(obj) + "\n")
+
+
+def test_lazy_field_access(tmp_path):
+    path = tmp_path / "mid_2_qualified_name.json"
+    write_json_lines(path, [{"mid": 1, "qname": "a.B.c()"}, {"mid": 2, "qname": "a.B.d(int)"},
+                            {"mid": 3, "qname": "a.B.é()"}])
+    method_names = JsonLinesOffsetIndex(path, "qname")
+    assert os.path.exists(JsonLinesOffsetIndex.get_index_path(path))
+    assert len(method_names) == 3
+    assert method_names[0] == "a.B.c()"
+    assert method_names[2] == "a.B.é()"
+    assert method_names[-1] == "a.B.é()"
+    assert list(method_names) == ["a.B.c()", "a.B.d(int)", "a.B.é()"]
+    with pytest.raises(IndexError):
+        method_names[3]
+
+
+def test_empty_file(tmp_path):
+    path = tmp_path / "empty.json"
+    path.write_text("")
+    assert len(JsonLinesOffsetIndex(path)) == 0
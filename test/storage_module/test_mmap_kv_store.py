@@ -0,0 +1,67 @@
+import os
+
+from project.storage_module.mmap_kv_store import MmapKVStore
+
+
+def test_put_and_get(tmp_path):
+    store = MmapKVStore(tmp_path / "response_cache.mmap", capacity=64 * 1024, slot_count=64, namespace="v3.10")
+    key = ("v3.10", "org.jabref.model.entry.BibEntry", "api_structure")
+    assert store.get(key) is None
+    assert store.put(key, {"methods": [{"name": "getField"}]})
+    assert store.get(key) == {"methods": [{"name": "getField"}]}
+    # 另一个进程打开同一个文件时能读到
+    other_store = MmapKVStore(tmp_path / "response_cache.mmap", capacity=64 * 1024, slot_count=64, namespace="v3.10")
+    assert other_store.get(key) == {"methods": [{"name": "getField"}]}
+
+
+def test_ring_eviction(tmp_path):
+    store = MmapKVStore(tmp_path / "response_cache.mmap", capacity=4096, slot_count=64)
+    for i in range(100):
+        store.put(("v3.10", "a.B" + str(i), "api_structure"), "x" * 100)
+    assert store.get(("v3.10", "a.B0", "api_structure")) is None
+    assert store.get(("v3.10", "a.B99", "api_structure")) == "x" * 100
+    assert store.stats()["used"] <= 4096
+    assert not store.put(("v3.10", "a.C", "api_structure"), "x" * 2048)
+
+
+def test_namespace_invalidation(tmp_path):
+    path = tmp_path / "response_cache.mmap"
+    store = MmapKVStore(path, capacity=4096, slot_count=64, namespace="v3.10")
+    store.put("key", "value")
+    store.close()
+    assert MmapKVStore(path, capacity=4096, slot_count=64, namespace="v3.10").get("key") == "value"
+    assert MmapKVStore(path, capacity=4096, slot_count=64, namespace="v3.11").get("key") is None
+
+
+def test_long_namespace_persists(tmp_path):
+    path = tmp_path / "response_cache.mmap"
+    namespace = "jabref:" + "v3.10-" * 20
+    store = MmapKVStore(path, capacity=4096, slot_count=64, namespace=namespace)
+    store.put("key", "value")
+    store.close()
+    # 超过64字节的namespace不能因截断而在每次打开时清空
+    assert MmapKVStore(path, capacity=4096, slot_count=64, namespace=namespace).get("key") == "value"
+    assert MmapKVStore(path, capacity=4096, slot_count=64, namespace=namespace + "x").get("key") is None
+
+
+def test_reopen_after_fork(tmp_path):
+    store = MmapKVStore(tmp_path / "response_cache.mmap", capacity=4096, slot_count=64)
+    store.put("parent", 1)
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.close(read_fd)
+            fd_count = len(os.listdir("/proc/self/fd"))
+            ok = store.get("parent") == 1 and store.put("child", 2)
+            # 子进程重新打开时关闭了继承的文件描述符, 数量不变
+            ok = ok and len(os.listdir("/proc/self/fd")) == fd_count
+            os.write(write_fd, b"1" if ok else b"0")
+        finally:
+            os._exit(0)
+    os.close(write_fd)
+    result = os.read(read_fd, 1)
+    os.close(read_fd)
+    os.waitpid(pid, 0)
+    assert result == b"1"
+    assert store.get("child") == 2
@@ -0,0 +1,42 @@
+import pytest
+
+from project.storage_module.service_snapshot import ServiceSnapshot
+
+
+def test_write_and_load_group(tmp_path):
+    path = tmp_path / "jabref.v3.10.v3.4.snapshot"
+    ServiceSnapshot.write(path, {
+        "graph:jabref.v3.10": {"graph:jabref.v3.10": {"nodes": [1, 2]}, "name_index:jabref.v3.10": {"a.B": 1}},
+        "json:simple_qualified_name_map.json": {"json:simple_qualified_name_map.json": {"B": "a.B"}},
+    }, meta={"graph_version": "v3.10"})
+    snapshot = ServiceSnapshot(path)
+    assert snapshot.meta == {"graph_version": "v3.10"}
+    assert "name_index:jabref.v3.10" in snapshot
+    assert snapshot.get_group_name("name_index:jabref.v3.10") == "graph:jabref.v3.10"
+    group = snapshot.load_group("graph:jabref.v3.10")
+    assert group["name_index:jabref.v3.10"] == {"a.B": 1}
+    assert snapshot.load_group("json:simple_qualified_name_map.json") == {
+        "json:simple_qualified_name_map.json": {"B": "a.B"}}
+
+
+def test_reject_other_file(tmp_path):
+    path = tmp_path / "jabref.v3.10.graph"
+    path.write_bytes(b"not a snapshot file")
+    with pytest.raises(ValueError):
+        ServiceSnapshot(path)
+
+
+def test_changed_source_list(tmp_path):
+    source_path = tmp_path / "api_2_example_sorted.json"
+    source_path.write_text("{}")
+    missing_path = tmp_path / "missing.json"
+    path = tmp_path / "jabref.v3.10.v3.4.snapshot"
+    ServiceSnapshot.write(path, {"json:api_2_example_sorted.json": {"json:api_2_example_sorted.json": {}}}, meta={
+        ServiceSnapshot.SOURCE_META_KEY: {
+            "json:api_2_example_sorted.json": [str(source_path)] + ServiceSnapshot.get_source_state(source_path),
+            "json:missing.json": [str(missing_path)] + ServiceSnapshot.get_source_state(missing_path),
+        }})
+    assert ServiceSnapshot(path).get_changed_source_list() == []
+    source_path.write_text('{"a.B": [1]}')
+    missing_path.write_text("{}")
+    assert sorted(ServiceSnapshot(path).get_changed_source_list()) == sorted([str(source_path), str(missing_path)])
@@ -0,0 +1,45 @@
+import os
+import threading
+
+from project.artifact_registry import ArtifactRegistry
+
+
+def test_report_does_not_wait_for_loading():
+    registry = ArtifactRegistry()
+    started = threading.Event()
+    release = threading.Event()
+    load_count = []
+
+    def load():
+        load_count.append(1)
+        started.set()
+        release.wait(5)
+        return {"loaded": True}
+
+    result_list = []
+    thread_list = [threading.Thread(target=lambda: result_list.append(registry.get("graph:jabref.v3.10", load)))
+                   for _ in range(2)]
+    for thread in thread_list:
+        thread.start()
+    started.wait(5)
+    # 加载图期间/artifacts/和其他产物不用等待
+    assert registry.memory_report() == []
+    assert registry.get("json:other", lambda: [1]) == [1]
+    release.set()
+    for thread in thread_list:
+        thread.join(5)
+    assert len(load_count) == 1
+    assert result_list == [{"loaded": True}, {"loaded": True}]
+    assert result_list[0] is result_list[1]
+
+
+def test_release_outdated(tmp_path):
+    path = tmp_path / "simple_qualified_name_map.json"
+    path.write_text('{"BibEntry": "org.jabref.model.entry.BibEntry"}')
+    registry = ArtifactRegistry()
+    name_map = registry.json_file(path)
+    assert registry.release_outdated() == []
+    load_time = registry.get_load_time("json:" + str(path))
+    os.utime(str(path), (load_time + 10, load_time + 10))
+    assert registry.release_outdated() == ["json:" + str(path)]
+    assert registry.json_file(path) is not name_map
@@ -0,0 +1,90 @@
+from project.class_doc_service import ClassDocService
+
+
+class FakeKnowledgeService:
+    """
+    只实现ClassDocService用到的接口, 记录每次调用和收到的api_id, 名字中带broken的api计算时出错
+    """
+
+    def __init__(self):
+        self.name_2_id = {"a.B": 1, "a.C": 2, "a.broken.D": 3}
+        self.call_list = []
+
+    def get_api_id_by_name(self, qualified_name):
+        self.call_list.append(("get_api_id_by_name", qualified_name))
+        return self.name_2_id.get(qualified_name, -1)
+
+    def get_method_base_list(self, api_id):
+        self.call_list.append(("get_method_base_list", api_id))
+        return [{"id": 10, "declare": "B()"}, {"id": 11, "declare": "get()"}]
+
+    def get_knowledge(self, qualified_name, api_id=None):
+        self.call_list.append(("get_knowledge", api_id))
+        return {"message": "", "characteristic": [], "category": []}
+
+    def get_cached_response(self, endpoint, qualified_name, compute):
+        return compute()
+
+    def build_api_base_structure(self, qualified_name, method_list=None, api_id=None):
+        self.call_list.append(("build_api_base_structure", api_id))
+        return {"method_count": len(method_list)}
+
+    def get_key_methods(self, qualified_name, api_id=None):
+        self.call_list.append(("get_key_methods", api_id))
+        if "broken" in qualified_name:
+            raise KeyError(qualified_name)
+        return [{"qualified_name": qualified_name + ".get()"}]
+
+    def get_api_terminologies(self, qualified_name, api_id=None):
+        self.call_list.append(("get_api_terminologies", api_id))
+        return []
+
+    def get_constructor(self, qualified_name, method_list=None, api_id=None):
+        self.call_list.append(("get_constructor", api_id))
+        return {"number_of_constructor": 1, "constructor_detail": method_list[:1]}
+
+    def get_related_api(self, qualified_name, api_id=None):
+        self.call_list.append(("get_related_api", api_id))
+        return {"related_api": [], "related_api_simplified": []}
+
+
+class FakeDocService:
+    def get_doc_info(self, api_id):
+        return {"full_description": "doc of {}".format(api_id)}
+
+    def get_sample_code(self, api_id):
+        return "sample code of {}".format(api_id)
+
+
+def test_class_doc_resolves_name_once():
+    knowledge_service = FakeKnowledgeService()
+    class_doc_service = ClassDocService(knowledge_service, FakeDocService(), None)
+    section_list = ["doc", "knowledge", "structure", "key_methods", "terminology", "sample_code", "constructor",
+                    "related_api"]
+    result = class_doc_service.get_class_doc("a.C", section_list)
+    assert set(section_list).issubset(result.keys())
+    assert result["doc"] == {"full_description": "doc of 2"}
+    assert result["structure"] == {"method_count": 2}
+    assert knowledge_service.call_list.count(("get_api_id_by_name", "a.C")) == 1
+    # 方法列表只查询一次, 每个部分都拿到已经解析出的id
+    assert knowledge_service.call_list.count(("get_method_base_list", 2)) == 1
+    for name, api_id in knowledge_service.call_list:
+        if name not in ("get_api_id_by_name",):
+            assert api_id == 2
+
+
+def test_class_doc_unknown_name():
+    class_doc_service = ClassDocService(FakeKnowledgeService(), FakeDocService(), None)
+    assert class_doc_service.get_class_doc("a.Missing") == {"qualified_name": "a.Missing",
+                                                            "message": "can't find api by name"}
+
+
+def test_batch_doc_continues_after_error():
+    knowledge_service = FakeKnowledgeService()
+    class_doc_service = ClassDocService(knowledge_service, None, None)
+    result_list = list(class_doc_service.get_batch_doc(["a.B", "a.broken.D", "a.C", "a.B"], ["key_methods"]))
+    assert [result["qualified_name"] for result in result_list] == ["a.B", "a.broken.D", "a.C", "a.B"]
+    assert "error" in result_list[1] and "KeyError" in result_list[1]["error"]
+    assert result_list[2]["key_methods"] == [{"qualified_name": "a.C.get()"}]
+    # 重复的名字只计算一次
+    assert knowledge_service.call_list.count(("get_key_methods", 1)) == 1
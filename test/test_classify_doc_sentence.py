@@ -0,0 +1,19 @@
+from script.classify_doc_sentence import classify_document_list
+from test.conftest import FakeDocument, StubClassifier
+
+
+def test_labels_written_back_to_each_document():
+    document_list = [
+        FakeDocument(1, {"full_description": "Returns the entry. Must not be null"}),
+        FakeDocument(2, {"dp_comment": "<p>Returns the key</p>"}),
+        FakeDocument(3, {"full_description": "Call it first"}),
+    ]
+    classifier = StubClassifier()
+    classify_document_list(document_list, classifier, batch_size=2)
+    # 两个批次, 每批的句子只调用一次模型
+    assert [len(sentence_list) for sentence_list in classifier.call_list] == [3, 1]
+    assert document_list[0].get_doc_text_by_field("functionality_list") == ["Returns the entry. "]
+    assert document_list[0].get_doc_text_by_field("directive_list") == ["Must not be null. "]
+    # 没有full_description时用dp_comment, 分句前去掉"Generated by DeepLearning:"前缀
+    assert document_list[1].get_doc_text_by_field("functionality_list") == [" Returns the key. "]
+    assert document_list[2].get_doc_text_by_field("directive_list") == ["Call it first. "]
@@ -0,0 +1,42 @@
+import json
+
+import definitions
+from project import doc_service as doc_service_module
+from project.artifact_registry import ArtifactRegistry
+from project.doc_service import DocService
+
+
+def use_config(monkeypatch, tmp_path, built_version_list):
+    config_path = tmp_path / "service_config.json"
+    config_path.write_text(json.dumps({"pro_name": "jabref", "doc_version": "v3.4", "doc_fallback_version": "v3.3"}))
+    monkeypatch.setattr(definitions, "SERVICE_CONFIG_PATH", str(config_path))
+    for version in built_version_list:
+        (tmp_path / (version + ".dc")).write_text("")
+    monkeypatch.setattr(ArtifactRegistry, "get_doc_path",
+                        staticmethod(lambda pro_name, version: str(tmp_path / (version + ".dc"))))
+    loaded_version_list = []
+
+    def doc_collection(pro_name, version):
+        loaded_version_list.append(version)
+        return "collection " + version
+
+    monkeypatch.setattr(doc_service_module.artifact_registry, "doc_collection", doc_collection)
+    return loaded_version_list
+
+
+def test_default_collection_uses_given_version(monkeypatch, tmp_path):
+    loaded_version_list = use_config(monkeypatch, tmp_path, ["v3.4", "v3.5"])
+    doc_service = DocService(doc_version="v3.5")
+    assert loaded_version_list == ["v3.5"]
+    assert doc_service.doc_collection == "collection v3.5"
+    assert doc_service.doc_version == "v3.5"
+    DocService()
+    assert loaded_version_list == ["v3.5", "v3.4"]
+
+
+def test_default_collection_falls_back(monkeypatch, tmp_path):
+    # 分类后的文档还没有生成时和run.py一样退回doc_fallback_version
+    loaded_version_list = use_config(monkeypatch, tmp_path, ["v3.3"])
+    doc_service = DocService()
+    assert loaded_version_list == ["v3.3"]
+    assert doc_service.doc_version == "v3.3"
@@ -0,0 +1,213 @@
+import threading
+
+import pytest
+from sekg.constant.code import CodeEntityRelationCategory
+
+from project.knowledge_service import KnowledgeService
+from project.utils.read_only_graph_view import ReadOnlyGraphView
+from test.conftest import FakeDocument, FakeDocCollection, StubClassifier
+from test.index_module.graph_fixture import FakeGraphData, jabref_graph, make_node
+
+HAS_PARAMETER = CodeEntityRelationCategory.category_code_to_str_map[
+    CodeEntityRelationCategory.RELATION_CATEGORY_HAS_PARAMETER]
+HAS_RETURN_VALUE = CodeEntityRelationCategory.category_code_to_str_map[
+    CodeEntityRelationCategory.RELATION_CATEGORY_HAS_RETURN_VALUE]
+
+
+def build_service(document_list=(), method_worker_count=0):
+    return KnowledgeService(FakeDocCollection(document_list), ReadOnlyGraphView(jabref_graph()),
+                            method_worker_count=method_worker_count)
+
+
+def build_method_list(count):
+    return [{"id": 100 + i, "name": "method{}".format(i), "declare": "method{}()".format(i)} for i in range(count)]
+
+
+def fake_add_method_fields(m, field_list, fun_dir_map=None):
+    m["label"] = "label of {}".format(m["id"])
+    m["field_list"] = list(field_list)
+
+
+class RecordingDocCollection(FakeDocCollection):
+    """
+    记录读取文档的线程, fail_id的文档读取时抛出异常
+    """
+
+    def __init__(self, document_list=(), fail_id=None):
+        super().__init__(document_list)
+        self.fail_id = fail_id
+        self.thread_name_set = set()
+        self.__lock = threading.Lock()
+
+    def get_by_id(self, doc_id):
+        with self.__lock:
+            self.thread_name_set.add(threading.current_thread().name)
+        if doc_id == self.fail_id:
+            raise ValueError("broken doc {}".format(doc_id))
+        return super().get_by_id(doc_id)
+
+
+def method_graph(method_count):
+    """
+    类1和它的方法100, 101, ..., 每个方法有参数, 返回值, 异常, 部分方法有概念和指令
+    """
+    node_list = [make_node(1, "org.jabref.model.entry.BibEntry", ("class",))]
+    relation_list = []
+    for i in range(method_count):
+        method_id = 100 + i
+        node_list.append(make_node(method_id, "org.jabref.model.entry.BibEntry.method{}()".format(i),
+                                   ("method", "accessor method" if i % 2 == 0 else "mutator method")))
+        # 描述为空的参数和返回值从文档中补充
+        node_list.append({"id": 1000 + i, "labels": {"parameter"},
+                          "properties": {"qualified_name": "String key", "short_description":
+                                         "" if i % 3 == 0 else "the key {}".format(i)}})
+        node_list.append({"id": 2000 + i, "labels": {"return value"},
+                          "properties": {"qualified_name": "String", "description": ""}})
+        node_list.append({"id": 3000 + i, "labels": {"exception condition"},
+                          "properties": {"qualified_name": "org.jabref.model.entry.BibEntry.method{}() "
+                                                           "IllegalArgumentException".format(i),
+                                         "short_description": "if key {} is empty".format(i)}})
+        relation_list.extend([(method_id, "belong to", 1), (method_id, HAS_PARAMETER, 1000 + i),
+                              (method_id, HAS_RETURN_VALUE, 2000 + i),
+                              (method_id, "has exception condition", 3000 + i)])
+        if i % 2 == 0:
+            node_list.append(make_node(4000 + i, "concept {}".format(i), ("concept",)))
+            node_list.append({"id": 5000 + i, "labels": {"directive"},
+                              "properties": {"description": "Returns null || Never empty", "short_description":
+                                             "Throws if closed"}})
+            relation_list.extend([(method_id, "has concept", 4000 + i),
+                                  (method_id, "has return code directive", 5000 + i),
+                                  (method_id, "has exception code directive", 5000 + i)])
+    return FakeGraphData(node_list, relation_list)
+
+
+def method_document_list(method_count):
+    document_list = []
+    for i in range(method_count):
+        document_list.append(FakeDocument(100 + i, {"full_description": "Returns value {}. Must not be null".format(i),
+                                                    "sample_code": ["  entry.method{}();".format(i)]}))
+        document_list.append(FakeDocument(1000 + i, {"short_description": "key from doc {}".format(i)}))
+        document_list.append(FakeDocument(2000 + i, {"full_description": "the value {}".format(i)}))
+    return document_list
+
+
+def build_method_service(graph_view, doc_collection, method_worker_count=0):
+    service = KnowledgeService(doc_collection, graph_view, method_worker_count=method_worker_count)
+    service.functionClassifier = StubClassifier()
+    return service
+
+
+def test_parallel_methods_equal_sequential():
+    # 两个service共用同一个图和文档集合, 和服务中一样
+    graph_view = ReadOnlyGraphView(method_graph(20))
+    doc_collection = RecordingDocCollection(method_document_list(20))
+    sequential_service = build_method_service(graph_view, doc_collection)
+    parallel_service = build_method_service(graph_view, doc_collection, method_worker_count=4)
+    assert parallel_service.method_executor is not None
+    sequential_result = sequential_service.get_api_methods(1, method_list=build_method_list(20))
+    assert doc_collection.thread_name_set == {threading.current_thread().name}
+    doc_collection.thread_name_set.clear()
+    parallel_result = parallel_service.get_api_methods(1, method_list=build_method_list(20))
+    # 每个方法的字段在线程池的线程中计算
+    assert len(doc_collection.thread_name_set - {threading.current_thread().name}) > 0
+    assert parallel_result == sequential_result
+    assert [m["id"] for m in parallel_result] == [100 + i for i in range(20)]
+    assert set(parallel_result[0].keys()) == {"id", "name", "declare"} | set(KnowledgeService.METHOD_FIELD_LIST)
+    assert parallel_result[0]["label"] == "accessor method"
+    assert parallel_result[1]["label"] == "mutator method"
+    assert parallel_result[0]["parameters"][0][1]["properties"]["description"] == "key from doc 0"
+    assert parallel_result[1]["parameters"][0][1]["properties"]["description"] == "the key 1"
+    assert parallel_result[1]["return_value"][1]["properties"]["description"] == "the value 1"
+    assert parallel_result[2]["exception_info"] == [{"exception_name": "IllegalArgumentException",
+                                                     "description": "if key 2 is empty"}]
+    assert parallel_result[2]["concepts"] == ["concept 2"]
+    assert parallel_result[3]["concepts"] == []
+    assert parallel_result[2]["return_value_directive"] == ["Never empty", "Returns null"]
+    assert parallel_result[2]["throws_directive"] == ["Throws if closed"]
+    assert parallel_result[4]["sample_code"] == "entry.method4();"
+    assert parallel_result[4]["functionality_list"] == ["Returns value 4. "]
+    assert parallel_result[4]["directive_list"] == ["Must not be null. "]
+    # 补充描述是在副本上做的, 共享的图没有被修改
+    assert graph_view.get_node_info_dict(1000)["properties"]["short_description"] == ""
+
+
+@pytest.mark.parametrize("method_worker_count", [0, 4])
+def test_method_error_propagates(method_worker_count):
+    graph_view = ReadOnlyGraphView(method_graph(20))
+    doc_collection = RecordingDocCollection(method_document_list(20), fail_id=105)
+    service = build_method_service(graph_view, doc_collection, method_worker_count=method_worker_count)
+    with pytest.raises(ValueError, match="broken doc 105"):
+        service.get_api_methods(1, method_list=build_method_list(20), field_list=["doc_info", "label"])
+
+
+def test_batch_classification_maps_labels_back():
+    document_list = [
+        FakeDocument(2, {"full_description": "Returns the field. Must not be null. Returns empty otherwise"}),
+        FakeDocument(3, {"functionality_list": ["Stored functionality. "], "directive_list": []}),
+        FakeDocument(4, {"full_description": "Must be called first"}),
+        # 没有注释
+        FakeDocument(5, {}),
+    ]
+    service = build_service(document_list)
+    classifier = StubClassifier()
+    service.functionClassifier = classifier
+    result = service.classify_directive_and_functionality_batch([2, 3, 4, 5, 2])
+    # 离线分类过的3不送进模型, 其余的句子只调用一次模型
+    assert len(classifier.call_list) == 1
+    for api_id in [2, 4, 5]:
+        sentence_list = KnowledgeService.split_comment_sentence(service.get_method_doc_info(api_id)["comment"])
+        label_list = [StubClassifier.get_label(sentence) for sentence in sentence_list]
+        assert result[api_id] == KnowledgeService.build_directive_and_functionality(sentence_list, label_list)
+    assert result[2]["functionality_list"] == ["Returns the field. ", "Returns empty otherwise. "]
+    assert result[2]["directive_list"] == ["Must not be null. "]
+    assert result[4]["functionality_list"] == []
+    assert result[3]["functionality_list"] == ["Stored functionality. "]
+    assert result[3]["directive_list"] == []
+
+
+def test_method_page_param():
+    assert KnowledgeService.get_method_page_param({}) == {"field_list": None, "offset": 0, "limit": None}
+    assert KnowledgeService.get_method_page_param({"method_fields": ["label"], "offset": 2, "limit": 3}) == {
+        "field_list": ["label"], "offset": 2, "limit": 3}
+    assert KnowledgeService.get_method_page_param({"method_fields": ["unknown"]}) == 'unknown method field: unknown'
+    # bool是int的子类, 也要拒绝
+    assert isinstance(KnowledgeService.get_method_page_param({"offset": True}), str)
+    assert isinstance(KnowledgeService.get_method_page_param({"limit": False}), str)
+    assert isinstance(KnowledgeService.get_method_page_param({"offset": -1}), str)
+    assert isinstance(KnowledgeService.get_method_page_param({"limit": "10"}), str)
+
+
+def test_page():
+    item_list = list(range(10))
+    assert KnowledgeService.get_page(item_list) == item_list
+    assert KnowledgeService.get_page(item_list, offset=8) == [8, 9]
+    assert KnowledgeService.get_page(item_list, offset=2, limit=3) == [2, 3, 4]
+    assert KnowledgeService.get_page(item_list, offset=9, limit=5) == [9]
+    assert KnowledgeService.get_page(item_list, limit=0) == []
+
+
+def test_page_skips_constructors():
+    service = build_service()
+    service.add_method_fields = fake_add_method_fields
+    method_list = [{"id": 99, "name": "Method", "declare": "Method()"}] + build_method_list(5)
+    result = service.get_api_methods(1, method_list=method_list, field_list=["label"], offset=1, limit=2)
+    assert [m["id"] for m in result] == [101, 102]
+
+
+def test_field_projection():
+    document_list = [FakeDocument(100, {"full_description": "Returns the field."})]
+    service = build_service(document_list)
+    result = service.get_api_methods(1, method_list=build_method_list(1), field_list=["doc_info"])
+    # 只计算请求的字段
+    assert set(result[0].keys()) == {"id", "name", "declare", "doc_info"}
+    assert result[0]["doc_info"] == {"comment": "Returns the field."}
+
+
+def test_cache_key_changes_with_projection():
+    assert KnowledgeService.get_page_endpoint("api_structure") == "api_structure"
+    label_key = KnowledgeService.get_page_endpoint("api_structure", field_list=["label", "doc_info"])
+    assert label_key != "api_structure"
+    assert label_key == KnowledgeService.get_page_endpoint("api_structure", field_list=["doc_info", "label"])
+    assert label_key != KnowledgeService.get_page_endpoint("api_structure", field_list=["label"])
+    assert KnowledgeService.get_page_endpoint("api_structure", offset=0, limit=10) != \
+        KnowledgeService.get_page_endpoint("api_structure", offset=10, limit=10)
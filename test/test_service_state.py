@@ -0,0 +1,54 @@
+import threading
+
+from project.service_state import ServiceState, ServiceStateHolder
+
+
+def make_state(graph_version):
+    return ServiceState(graph_version, "v3.4", None, None, None, None, ["graph:jabref." + graph_version],
+                        [graph_version])
+
+
+def test_swap_waits_for_in_flight_requests():
+    holder = ServiceStateHolder(make_state("v3.10"))
+    entered = threading.Event()
+    release = threading.Event()
+    seen_version_list = []
+
+    def request():
+        with holder.use():
+            entered.set()
+            release.wait(5)
+            seen_version_list.append(holder.get().graph_version)
+
+    thread = threading.Thread(target=request)
+    thread.start()
+    entered.wait(5)
+    old_state, drained = holder.swap(make_state("v3.11"), drain_timeout=0.05)
+    assert not drained
+    assert holder.get().graph_version == "v3.11"
+    release.set()
+    thread.join(5)
+    # 切换前开始的请求一直使用旧状态
+    assert seen_version_list == ["v3.10"]
+    assert old_state.in_flight_count == 0
+
+
+def test_bind():
+    holder = ServiceStateHolder(make_state("v3.10"))
+    new_state = make_state("v3.11")
+    with holder.bind(new_state):
+        assert holder.get() is new_state
+    assert holder.get().graph_version == "v3.10"
+    assert holder.swap(new_state, drain_timeout=1)[1]
+
+
+def test_keep_in_use_until_stream_exhausted():
+    holder = ServiceStateHolder(make_state("v3.10"))
+    with holder.use() as state:
+        result_iter = holder.keep_in_use(iter([1, 2]))
+    # use()结束后流式结果还没有取完, 旧状态不能释放
+    assert next(result_iter) == 1
+    assert state.in_flight_count == 1
+    assert not holder.swap(make_state("v3.11"), drain_timeout=0.01)[1]
+    assert list(result_iter) == [2]
+    assert state.in_flight_count == 0
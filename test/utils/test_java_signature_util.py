@@ -0,0 +1,27 @@
+from project.utils.java_signature_util import JavaSignatureUtil
+
+
+def test_parse_method_signature():
+    method_info = "@Override public static <T extends BibEntry> List<T> filter(final Map<String, BibEntry> entryMap, " \
+                  "@NonNull BibDatabase database, String... keys) throws IOException { return null; }"
+    return_type_tokens, parameter_type_tokens = JavaSignatureUtil.parse_method_signature(method_info)
+    assert return_type_tokens == ["List", "T"]
+    assert parameter_type_tokens == ["Map", "String", "BibEntry", "BibDatabase", "String"]
+
+
+def test_constructor_has_no_return_type():
+    method_info = "public BibEntryWriter(LatexFieldFormatter fieldFormatter) { this.fieldFormatter = fieldFormatter; }"
+    return_type_tokens, parameter_type_tokens = JavaSignatureUtil.parse_method_signature(method_info)
+    assert return_type_tokens == []
+    assert JavaSignatureUtil.contains_type(parameter_type_tokens, "org.jabref.logic.bibtex.LatexFieldFormatter")
+
+
+def test_without_body():
+    assert JavaSignatureUtil.parse_method_signature("abstract BibEntry getEntry();") is None
+
+
+def test_contains_type_is_not_substring_match():
+    return_type_tokens, _ = JavaSignatureUtil.parse_method_signature("BibEntryType getType() { return type; }")
+    assert not JavaSignatureUtil.contains_type(return_type_tokens, "org.jabref.model.entry.BibEntry")
+    assert JavaSignatureUtil.contains_type(return_type_tokens, "org.jabref.model.entry.BibEntryType")
+    assert JavaSignatureUtil.contains_type(["org.jabref.model.entry.BibEntry"], "org.jabref.model.entry.BibEntry")
@@ -0,0 +1,25 @@
+from project.utils.metrics import Metrics
+
+
+def test_histogram_buckets():
+    metrics = Metrics()
+    metrics.observe_request("/api_structure/", 0.003)
+    metrics.observe_request("/api_structure/", 0.2)
+    metrics.observe_request("/api_structure/", 30)
+    text = metrics.render()
+    assert '# TYPE docgen_request_seconds histogram' in text
+    assert 'docgen_request_seconds_bucket{route="/api_structure/",le="0.001"} 0' in text
+    assert 'docgen_request_seconds_bucket{route="/api_structure/",le="0.005"} 1' in text
+    assert 'docgen_request_seconds_bucket{route="/api_structure/",le="0.25"} 2' in text
+    assert 'docgen_request_seconds_bucket{route="/api_structure/",le="1.0"} 2' in text
+    assert 'docgen_request_seconds_bucket{route="/api_structure/",le="10.0"} 2' in text
+    assert 'docgen_request_seconds_bucket{route="/api_structure/",le="+Inf"} 3' in text
+    assert 'le="1"' not in text
+    assert 'docgen_request_seconds_count{route="/api_structure/"} 3' in text
+
+
+def test_stage_timer():
+    metrics = Metrics()
+    with metrics.stage("name_resolution"):
+        pass
+    assert 'docgen_stage_seconds_count{stage="name_resolution"} 1' in metrics.render()
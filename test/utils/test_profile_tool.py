@@ -0,0 +1,36 @@
+from project.utils.profile_tool import ProfileTool
+
+
+def build_structure(qualified_name):
+    return {"qualified_name": qualified_name, "methods": sorted(str(i) for i in range(100))}
+
+
+def iter_structure(qualified_name_list):
+    for qualified_name in qualified_name_list:
+        yield build_structure(qualified_name)
+
+
+def test_check_token():
+    assert ProfileTool.check_token("secret", "secret")
+    assert not ProfileTool.check_token("secret", "other")
+    assert not ProfileTool.check_token("", "")
+    assert not ProfileTool.check_token("secret", None)
+
+
+def test_report_contains_handler():
+    result, profiler = ProfileTool.run(build_structure, "org.jabref.model.entry.BibEntry")
+    assert result["qualified_name"] == "org.jabref.model.entry.BibEntry"
+    assert "build_structure" in ProfileTool.report(profiler, 10)
+
+
+def test_generator_is_consumed_in_profile():
+    result, profiler = ProfileTool.run(iter_structure, ["a.B", "a.C"])
+    assert "build_structure" in ProfileTool.report(profiler, 10)
+    assert [item["qualified_name"] for item in result] == ["a.B", "a.C"]
+
+
+def test_save(tmp_path):
+    result, profiler = ProfileTool.run(build_structure, "a.B")
+    path = ProfileTool.save(profiler, tmp_path / "profile", "api_structure_handler")
+    assert path.endswith(".prof")
+    assert (tmp_path / "profile").exists()
@@ -0,0 +1,45 @@
+import pytest
+
+from project.utils.read_only_graph_view import ReadOnlyGraphView
+from test.index_module.graph_fixture import jabref_graph
+
+
+def test_node_is_read_only():
+    graph_view = ReadOnlyGraphView(jabref_graph())
+    node_id = next(iter(graph_view.get_node_ids()))
+    node = graph_view.get_node_info_dict(node_id)
+    with pytest.raises(TypeError):
+        node["properties"]["description"] = "changed"
+    with pytest.raises(AttributeError):
+        graph_view.add_node
+
+
+def test_thaw_returns_copy():
+    graph_data = jabref_graph()
+    graph_view = ReadOnlyGraphView(graph_data)
+    node_id = next(iter(graph_view.get_node_ids()))
+    node = ReadOnlyGraphView.thaw(graph_view.get_node_info_dict(node_id))
+    node["properties"]["description"] = "changed"
+    assert isinstance(node["labels"], list)
+    assert graph_data.get_node_info_dict(node_id)["properties"].get("description") != "changed"
+
+
+def test_repeated_reads_return_same_frozen_node():
+    graph_view = ReadOnlyGraphView(jabref_graph())
+    node_id = next(iter(graph_view.get_node_ids()))
+    node = graph_view.get_node_info_dict(node_id)
+    # 只在第一次读取时冻结, 之后不再复制
+    assert graph_view.get_node_info_dict(node_id) is node
+    assert graph_view.get_node_info_dict(node_id)["properties"] is node["properties"]
+
+
+def test_frozen_node_cache_is_bounded():
+    graph_view = ReadOnlyGraphView(jabref_graph(), max_cached_node_count=2)
+    node_id_list = list(graph_view.get_node_ids())
+    assert len(node_id_list) > 2
+    for node_id in node_id_list:
+        graph_view.get_node_info_dict(node_id)
+    # 读过的节点再多, 保存的冻结节点也不超过上限
+    assert graph_view.get_cached_node_count() == 2
+    assert graph_view.get_node_info_dict(node_id_list[0])["id"] == node_id_list[0]
+    assert graph_view.get_cached_node_count() == 2
@@ -0,0 +1,35 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from project.utils.server_timing import ServerTiming
+
+
+def test_sections_are_summed():
+    ServerTiming.start()
+    with ServerTiming.section("methods"):
+        for i in range(3):
+            with ServerTiming.section("sample_code"):
+                pass
+    with ServerTiming.section("extends"):
+        pass
+    header = ServerTiming.stop()
+    assert [item.split(";")[0] for item in header.split(", ")] == ["methods", "sample_code", "extends"]
+    assert all(item.split(";")[1].startswith("dur=") for item in header.split(", "))
+
+
+def test_no_collector_outside_request():
+    with ServerTiming.section("methods"):
+        pass
+    assert ServerTiming.stop() == ""
+
+
+def test_run_with_in_worker_thread():
+    ServerTiming.start()
+    collector = ServerTiming.get_collector()
+
+    def add_method_fields(m):
+        with ServerTiming.section("sample_code"):
+            return m
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        assert list(executor.map(lambda m: ServerTiming.run_with(collector, add_method_fields, m), [1, 2])) == [1, 2]
+    assert ServerTiming.stop().startswith("sample_code;dur=")